@@ -0,0 +1,70 @@
+"""
+Aho–Corasick multi-pattern matcher shared by the build tools.
+
+All patterns are compiled once into a trie with failure links, after which a
+text is scanned in a single left-to-right pass no matter how many patterns
+there are. puzzle_engine.py uses it to count every target word in all lines
+of a grid at once, and dict_pipeline.py to check each candidate word against
+the whole exclusion list in one pass.
+
+    matcher = AhoCorasick(["HE", "SHE", "HERS"])
+    list(matcher.iter_matches("USHERS"))   # [(3, 1), (3, 0), (5, 2)]
+
+Matches are reported as (end, pattern_index), where end is the index of the
+pattern's last character in the text.
+"""
+
+
+class AhoCorasick:
+    """An automaton over a fixed list of patterns (see the module docstring)."""
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            if not pattern:
+                raise ValueError("Patterns must not be empty.")
+            state = 0
+            for ch in pattern:
+                next_state = self._goto[state].get(ch)
+                if next_state is None:
+                    next_state = len(self._goto)
+                    self._goto[state][ch] = next_state
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                state = next_state
+            self._output[state] += (index,)
+
+        # Breadth-first, so every failure target is finished before it is used;
+        # each state's output then also holds the outputs of its failure chain.
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, next_state in self._goto[state].items():
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] += self._output[self._fail[next_state]]
+                queue.append(next_state)
+
+    def __len__(self):
+        return len(self.patterns)
+
+    def iter_matches(self, text):
+        """Yields (end, pattern_index) for every occurrence of every pattern in text, overlaps included."""
+        goto, fail, output = self._goto, self._fail, self._output
+        state = 0
+        for position, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for index in output[state]:
+                yield position, index
+
+    def first_match(self, text):
+        """Returns the first (end, pattern_index) found in text, or None."""
+        return next(self.iter_matches(text), None)
@@ -0,0 +1,379 @@
+"""
+Benchmarks for the build tools, run on synthetic inputs of configurable size.
+
+Every stage gets a generated input shaped like the real data:
+
+    wiktionary_scan   read + filter stages of dict_pipeline on Wiktionary-shaped JSONL
+    wiktionary_build  the whole dict_pipeline.build_dictionary run on the same JSONL
+    wiktionary_cached build_dictionary on the same JSONL from a warm Phase 1 cache
+    dex_build         build_dictionary on a DEX-shaped {word: html} JSON object
+    bible_format      bible_format.format_bible_stream on verse-per-line text
+    bible_parse       create_bible_json.parse_bible_text on "Chapter N" text
+    bible_parse_raw   create_bible_json.parse_raw_bible_text on verse-per-line text
+    bible_update      create_bible_json.update_bible_json into a fresh output folder
+    puzzle_pack       puzzle_engine.generate_pack (verified grids)
+    store_dict        first-wins {word: definition} dict loaded from word<TAB>definition lines
+    store_compact     the same entries loaded into a compact_store.CompactEntries
+
+store_dict and store_compact are a pair: their peak memory compares the plain
+dict of Python strings with the compact store the pipeline keeps its Phase 1
+entries in.
+
+Each stage is timed over several repeats (the best wall time counts, CPU time
+is reported next to it) and then run once more under tracemalloc for its peak
+Python memory. Throughput is given in items/s (lines, DEX entries or puzzles)
+and MB/s of input:
+
+    python benchmark.py                              # all stages, scale 1
+    python benchmark.py --scale 4 --stages bible_parse bible_parse_raw
+    python benchmark.py --save-baseline              # keep these numbers as the baseline
+    python benchmark.py --record                     # append this run to the history
+
+Results live in benchmark_results.json: "baseline" is what later runs are
+compared against (same scale only), "history" keeps one entry per recorded
+run with its git commit, so regressions across commits show up as numbers.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+from bible_format import format_bible_stream, load_versification
+from compact_store import CompactEntries
+from create_bible_json import parse_bible_text, parse_raw_bible_text, update_bible_json
+from dict_pipeline import WordFilter, build_dictionary, filter_wiktionary, read_lines
+from language_profiles import LANGUAGE_PROFILES
+from puzzle_engine import ALPHABETS, WordSource, generate_pack
+
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_results.json")
+DEFAULT_REPEATS = 3
+
+# Items per stage at scale 1
+WIKTIONARY_LINES = 200000
+DEX_ENTRIES = 100000
+BIBLE_COPIES = 1
+PUZZLES = 300
+STORE_ENTRIES = 500000
+
+ENGLISH_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+ROMANIAN_LETTERS = "abcdefghijklmnopqrstuvwxyzăâîșț"
+WIKTIONARY_LANGS = ["en"] * 4 + ["fr", "de", "ro", "es", "it", "la"]
+GLOSSES = ["A domesticated animal (Canis lupus familiaris).", "(informal) Something very large.",
+           "To move quickly on foot.", "The act of \"running\" away.", "(obsolete) A small coin; (figuratively) a trifle."]
+VERSE_WORDS = ["and", "the", "LORD", "said", "unto", "Moses", "Dumnezeu", "pământul", "Și", "ÎMPĂRĂȚIA",
+               "heaven", "earth", "light", "darkness", "waters", "firmament", "spirit", "cuvântul", "lumina"]
+
+
+# --- Synthetic inputs ---
+
+def _random_word(rng, letters, low, high):
+    return ''.join(rng.choice(letters) for _ in range(rng.randint(low, high)))
+
+
+def write_wiktionary_jsonl(path, lines, seed=0):
+    """Wiktionary-shaped JSONL: mixed languages and lengths, some bad words, duplicates and broken lines."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            if rng.random() < 0.005:
+                f.write('{"word": "broken\n')
+                continue
+            word = _random_word(rng, ENGLISH_LETTERS, 2, 14)
+            if rng.random() < 0.05:
+                word = word[:3] + "-" + word[3:]
+            if rng.random() < 0.1:
+                word = f"word{i % 1000}"
+            entry = {"word": word, "lang_code": rng.choice(WIKTIONARY_LANGS), "pos": "noun",
+                     "senses": [{"glosses": [rng.choice(GLOSSES)], "tags": ["countable"]}] if rng.random() < 0.9 else [],
+                     "sounds": [{"ipa": "/ˈwɜːd/"}], "translations": [{"word": "cuvânt", "lang_code": "ro"}] * rng.randint(0, 5)}
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def write_dex_json(path, entries, seed=0):
+    """DEX-shaped JSON object of {word: html definition}."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("{")
+        for i in range(entries):
+            word = _random_word(rng, ROMANIAN_LETTERS, 2, 13)
+            html = (f"<b>{word.upper()},</b> <i>s. f.</i> Definiția {i} a cuvântului <i>{word}</i>. "
+                    f"<abbr class=\"abbrev\">Pl.</abbr> {word}e. &#8211; Din lat. {word}us.") if rng.random() < 0.95 else "<b></b>"
+            f.write((", " if i else "") + json.dumps(word, ensure_ascii=False) + ": " + json.dumps(html, ensure_ascii=False))
+        f.write("}")
+
+
+def write_entries_tsv(path, entries, seed=0):
+    """word<TAB>definition lines like a Phase 1 scan's output, about one word in ten repeated."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(entries):
+            word = _random_word(rng, ENGLISH_LETTERS, 4, 9).upper() if rng.random() < 0.9 else f"WORD{i % 1000}"
+            f.write(f"{word}\t{rng.choice(GLOSSES)} ({_random_word(rng, ENGLISH_LETTERS, 3, 10)})\n")
+
+
+def write_raw_bible(path, copies=1, seed=0, versification="niv"):
+    """Verse-per-line text with book headings, following a versification table (copies full passes)."""
+    rng = random.Random(seed)
+    table = load_versification(versification)
+    with open(path, 'w', encoding='utf-8') as f:
+        for _ in range(copies):
+            for book in table.book_order:
+                f.write(book.title() + "\n")
+                for _ in range(table.total_verses[book]):
+                    f.write(' '.join(rng.choice(VERSE_WORDS) for _ in range(rng.randint(8, 30))) + ".\n")
+
+
+def write_formatted_bible(raw_path, path, versification="niv"):
+    """"Chapter N" text with numbered verses, made from raw text by bible_format."""
+    with open(raw_path, 'r', encoding='utf-8') as infile, open(path, 'w', encoding='utf-8') as outfile:
+        format_bible_stream(infile, outfile, load_versification(versification))
+
+
+# --- Stages ---
+
+def _quiet(*_):
+    pass
+
+
+def _count_lines(path):
+    with open(path, 'rb') as f:
+        return sum(1 for _ in f)
+
+
+STAGES = ("wiktionary_scan", "wiktionary_build", "wiktionary_cached", "dex_build", "bible_format",
+          "bible_parse", "bible_parse_raw", "bible_update", "puzzle_pack", "store_dict", "store_compact")
+# The generated inputs each stage reads ('warm_cache' is a Phase 1 cache filled from the Wiktionary JSONL)
+STAGE_INPUTS = {
+    "wiktionary_scan": ("wiktionary",),
+    "wiktionary_build": ("wiktionary",),
+    "wiktionary_cached": ("wiktionary", "warm_cache"),
+    "dex_build": ("dex",),
+    "bible_format": ("raw_bible",),
+    "bible_parse": ("raw_bible", "formatted_bible"),
+    "bible_parse_raw": ("raw_bible",),
+    "bible_update": ("raw_bible",),
+    "puzzle_pack": (),
+    "store_dict": ("entries_tsv",),
+    "store_compact": ("entries_tsv",),
+}
+
+
+def prepare_stages(work_dir, scale, seed, stages=STAGES):
+    """
+    Generates only the inputs the given stages read (see STAGE_INPUTS) and
+    returns {stage: (run, items, input_bytes)} for those stages, in order;
+    run() performs one timed iteration of the stage.
+    """
+    wiktionary = os.path.join(work_dir, "wiktionary.jsonl")
+    dex = os.path.join(work_dir, "dex.json")
+    raw_bible = os.path.join(work_dir, "bible_raw.txt")
+    formatted_bible = os.path.join(work_dir, "bible_formatted.txt")
+    entries_tsv = os.path.join(work_dir, "entries.tsv")
+    dex_entries = int(DEX_ENTRIES * scale)
+    store_entries = int(STORE_ENTRIES * scale)
+    output_dir = os.path.join(work_dir, "out")
+    cache_dir = os.path.join(work_dir, "cache")
+    # In dependency order: the formatted Bible is made from the raw one, the cache from the JSONL
+    generators = {
+        "wiktionary": lambda: write_wiktionary_jsonl(wiktionary, int(WIKTIONARY_LINES * scale), seed),
+        "dex": lambda: write_dex_json(dex, dex_entries, seed),
+        "raw_bible": lambda: write_raw_bible(raw_bible, max(1, round(BIBLE_COPIES * scale)), seed),
+        "formatted_bible": lambda: write_formatted_bible(raw_bible, formatted_bible),
+        "entries_tsv": lambda: write_entries_tsv(entries_tsv, store_entries, seed),
+        "warm_cache": lambda: build_dictionary(wiktionary, os.path.join(work_dir, "warm.json"), seed=seed,
+                                               write_report=False, cache_dir=cache_dir, log=_quiet),
+    }
+    needed = {name for stage in stages for name in STAGE_INPUTS[stage]}
+    for name, generate in generators.items():
+        if name in needed:
+            generate()
+
+    def fresh_output():
+        shutil.rmtree(output_dir, ignore_errors=True)
+        os.makedirs(output_dir)
+        return output_dir
+
+    def wiktionary_scan():
+        word_filter = WordFilter(4, 9, LANGUAGE_PROFILES['english'])
+        for _ in filter_wiktionary(read_lines(wiktionary, _quiet), word_filter):
+            pass
+
+    def bible_format():
+        with open(raw_bible, 'r', encoding='utf-8') as infile, \
+                open(os.path.join(fresh_output(), "formatted.txt"), 'w', encoding='utf-8') as outfile:
+            format_bible_stream(infile, outfile, load_versification("niv"))
+
+    def load_entries(add):
+        with open(entries_tsv, 'r', encoding='utf-8') as f:
+            for line in f:
+                word, _, definition = line[:-1].partition('\t')
+                add(word, definition)
+
+    def store_dict():
+        entries = {}
+        load_entries(entries.setdefault)
+        return entries
+
+    def store_compact():
+        entries = CompactEntries()
+        load_entries(entries.add)
+        return entries
+
+    dictionary_words = {}
+    for i in range(5000):
+        word = _random_word(random.Random(i), ENGLISH_LETTERS.upper(), 4, 9)
+        dictionary_words.setdefault(len(word), []).append(word)
+    puzzle_count = max(1, int(PUZZLES * scale))
+
+    def puzzle_pack():
+        source = WordSource('standard', 13, dictionary_words)
+        for _ in generate_pack(source, 'english', 'standard', 13, puzzle_count, seed, ALPHABETS['english']):
+            pass
+
+    # (run, input file, items): items None means the input's line count; only the selected stages' inputs exist
+    stage_table = {
+        "wiktionary_scan": (wiktionary_scan, wiktionary, None),
+        "wiktionary_build": (lambda: build_dictionary(wiktionary, os.path.join(fresh_output(), "en.json"), seed=seed, log=_quiet),
+                             wiktionary, None),
+        "wiktionary_cached": (lambda: build_dictionary(wiktionary, os.path.join(fresh_output(), "en.json"), seed=seed,
+                                                       cache_dir=cache_dir, log=_quiet),
+                              wiktionary, None),
+        "dex_build": (lambda: build_dictionary(dex, os.path.join(fresh_output(), "ro.json"), seed=seed, log=_quiet),
+                      dex, dex_entries),
+        "bible_format": (bible_format, raw_bible, None),
+        "bible_parse": (lambda: parse_bible_text(formatted_bible, "english", {}, _quiet), formatted_bible, None),
+        "bible_parse_raw": (lambda: parse_raw_bible_text(raw_bible, "english", {}, _quiet), raw_bible, None),
+        "bible_update": (lambda: update_bible_json(raw_bible, "english", os.path.join(fresh_output(), "bible_data.json"),
+                                                   _quiet, "book", versification="niv"),
+                         raw_bible, None),
+        "puzzle_pack": (puzzle_pack, None, puzzle_count),
+        "store_dict": (store_dict, entries_tsv, store_entries),
+        "store_compact": (store_compact, entries_tsv, store_entries),
+    }
+    prepared = {}
+    for stage in stages:
+        run, path, items = stage_table[stage]
+        prepared[stage] = (run, _count_lines(path) if items is None else items, os.path.getsize(path) if path else 0)
+    return prepared
+
+
+def measure(run, items, input_bytes, repeats=DEFAULT_REPEATS):
+    """Times run() repeats times (best wall time wins), then once under tracemalloc for peak memory."""
+    best_wall = best_cpu = None
+    for _ in range(repeats):
+        wall, cpu = time.perf_counter(), time.process_time()
+        run()
+        wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+        if best_wall is None or wall < best_wall:
+            best_wall, best_cpu = wall, cpu
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "items": items,
+        "input_mb": round(input_bytes / 1e6, 3),
+        "wall_s": round(best_wall, 4),
+        "cpu_s": round(best_cpu, 4),
+        "items_per_s": round(items / best_wall, 1) if best_wall else None,
+        "mb_per_s": round(input_bytes / 1e6 / best_wall, 2) if best_wall and input_bytes else None,
+        "peak_mb": round(peak / 1e6, 2),
+    }
+
+
+# --- Results ---
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load_results(path):
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {"version": 1, "baseline": None, "history": []}
+
+
+def save_results(path, results):
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    os.replace(path + '.part', path)
+
+
+def format_report(run, baseline=None):
+    """Returns the results table; with a baseline of the same scale, adds the change in wall time."""
+    comparable = baseline if baseline and baseline["scale"] == run["scale"] else None
+    header = f"{'Stage':<18}{'Items':>9}{'MB':>8}{'Wall s':>9}{'CPU s':>9}{'Items/s':>11}{'MB/s':>8}{'Peak MB':>9}"
+    lines = [header + ("  vs baseline" if comparable else "")]
+    for stage, r in run["stages"].items():
+        line = (f"{stage:<18}{r['items']:>9}{r['input_mb']:>8.1f}{r['wall_s']:>9.3f}{r['cpu_s']:>9.3f}"
+                f"{r['items_per_s'] or 0:>11,.0f}{r['mb_per_s'] or 0:>8.1f}{r['peak_mb']:>9.1f}")
+        base = comparable and comparable["stages"].get(stage)
+        if base:
+            line += f"  {(r['wall_s'] - base['wall_s']) / base['wall_s']:+8.1%} (was {base['wall_s']:.3f}s @ {comparable['commit']})"
+        lines.append(line)
+    return "\n".join(lines)
+
+
+def run_benchmarks(stages=None, scale=1.0, repeats=DEFAULT_REPEATS, seed=0, log=print):
+    """Generates the selected stages' inputs in a temporary folder and measures the stages."""
+    work_dir = tempfile.mkdtemp(prefix="wordsearch-bench-")
+    try:
+        log(f"Generating synthetic inputs (scale {scale}) in {work_dir}...")
+        prepared = prepare_stages(work_dir, scale, seed, stages or STAGES)
+        results = {}
+        for stage, (run, items, input_bytes) in prepared.items():
+            log(f"  {stage}...")
+            results[stage] = measure(run, items, input_bytes, repeats)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "machine": platform.platform(),
+        "scale": scale,
+        "repeats": repeats,
+        "stages": results,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the build stages on synthetic inputs.")
+    parser.add_argument("--stages", nargs="+", choices=STAGES, help="Stages to run (default: all)")
+    parser.add_argument("--scale", type=float, default=1.0, help="Input size multiplier (1 = about 60 MB of JSONL)")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="Timed runs per stage; the best counts")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--results", default=RESULTS_FILE, help="Baseline/history file")
+    parser.add_argument("--record", action="store_true", help="Append this run to the history")
+    parser.add_argument("--save-baseline", action="store_true", help="Make this run the baseline (also records it)")
+    args = parser.parse_args(argv)
+
+    run = run_benchmarks(args.stages, args.scale, args.repeats, args.seed)
+    results = load_results(args.results)
+    print(format_report(run, results["baseline"]))
+    if args.record or args.save_baseline:
+        results["history"].append(run)
+        if args.save_baseline:
+            results["baseline"] = run
+        save_results(args.results, results)
+        print(f"Results saved to {args.results}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
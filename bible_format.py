@@ -1,171 +1,262 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog, messagebox, ttk
+import io
+import json
 import os
+import unicodedata
+from collections import Counter
 
-def format_niv_bible_text(input_text):
+from build_report import BuildReport
+
+# Folder holding the versification tables (<name>.json)
+VERSIFICATION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "versification")
+DEFAULT_VERSIFICATION = "niv"
+# Romanian texts spell Ș and Ț with either a comma below or a cedilla
+HEADING_FOLD = str.maketrans("ŞŢ", "ȘȚ")
+
+def heading_key(text):
+    """The form in which book headings are compared: NFC, single spaces, uppercase, comma-below Ș and Ț."""
+    return unicodedata.normalize("NFC", " ".join(text.split())).upper().translate(HEADING_FOLD)
+
+class Versification:
     """
-    Formats NIV Bible text by adding chapter and verse numbers.
+    Chapter and verse counts of one translation, loaded from a JSON table:
 
-    Args:
-        input_text (str): The raw text content of the NIV Bible file,
-                          where each line is a verse and book names are
-                          headings.
+        {"name": "NIV",
+         "books": [{"name": "GENESIS", "chapters": [31, 25, ...],
+                    "aliases": ["GEN"], "total_verses": 1533}, ...]}
 
-    Returns:
-        tuple: A tuple containing:
-               - str: The formatted text with chapter and verse numbers.
-               - list: A list of strings, each representing a book-level status or warning.
+    Book order is canonical order. "aliases" (other headings that mean the
+    same book) and "total_verses" (the expected total when it differs from
+    the sum of the chapters) are optional. Headings are matched after
+    heading_key(), so case, spacing and the cedilla spellings of Romanian
+    names don't matter.
+
+    A table file may instead name a "base" table (another file in the same
+    folder) and give its books as a name map; a book without "chapters"
+    takes the counts of the base book named by its "base" key:
+
+        {"name": "Cornilescu", "base": "niv",
+         "books": [{"name": "GENEZA", "base": "GENESIS", "aliases": ["FACEREA"]}, ...]}
+
+    For every book the cumulative verse offsets and the chapter of every verse
+    index are precomputed, so locate() maps the n-th verse of a book to its
+    (chapter, verse) in O(1).
+    """
+    def __init__(self, name, books):
+        self.name = name
+        self.book_order = []
+        self.chapters = {}
+        self.total_verses = {}
+        self.offsets = {}
+        self.chapter_of_index = {}
+        self.headings = {}
+        self._longest_heading = 0
+        for book in books:
+            book_name = heading_key(book["name"])
+            chapters = book["chapters"]
+            if not chapters or any(count < 1 for count in chapters):
+                raise ValueError(f"Versification '{name}': book '{book_name}' needs at least one chapter and positive verse counts.")
+            self.book_order.append(book_name)
+            self.chapters[book_name] = chapters
+            self.total_verses[book_name] = book.get("total_verses", sum(chapters))
+            offsets = [0]
+            chapter_of_index = bytearray() if len(chapters) < 256 else []
+            for chapter_number, verse_count in enumerate(chapters, 1):
+                offsets.append(offsets[-1] + verse_count)
+                chapter_of_index.extend([chapter_number] * verse_count)
+            self.offsets[book_name] = offsets
+            self.chapter_of_index[book_name] = chapter_of_index
+            for heading in [book_name] + [heading_key(alias) for alias in book.get("aliases", [])]:
+                self.headings[heading] = book_name
+                self._longest_heading = max(self._longest_heading, len(heading))
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, 'r', encoding='utf-8') as f:
+            table = json.load(f)
+        name = table.get("name", os.path.splitext(os.path.basename(path))[0])
+        books = table["books"]
+        if "base" in table:
+            base = cls.from_file(os.path.join(os.path.dirname(path), f"{table['base']}.json"))
+            books = [book if "chapters" in book else dict(book, **base.counts_of(book.get("base", book["name"]), name))
+                     for book in books]
+        return cls(name, books)
+
+    def counts_of(self, book_name, table_name):
+        """The "chapters" and "total_verses" of a book, for a table built on this one."""
+        key = heading_key(book_name)
+        if key not in self.chapters:
+            raise ValueError(f"Versification '{table_name}': base table '{self.name}' has no book '{book_name}'.")
+        return {"chapters": self.chapters[key], "total_verses": self.total_verses[key]}
+
+    def book_for_heading(self, line):
+        """The canonical book name if line is a book heading, otherwise None."""
+        # Verse lines are nearly always longer than any heading, so most never get normalized
+        if len(line) > 2 * self._longest_heading:
+            return None
+        return self.headings.get(heading_key(line))
+
+    def locate(self, book_name, verse_index):
+        """
+        Maps the 0-based verse_index within a book to (chapter, verse).
+
+        Verses past the end of the table stay in the last chapter and are
+        numbered again from 1, as the formatter has always done.
+        """
+        chapter_of_index = self.chapter_of_index[book_name]
+        if verse_index < len(chapter_of_index):
+            chapter_number = chapter_of_index[verse_index]
+            return chapter_number, verse_index - self.offsets[book_name][chapter_number - 1] + 1
+        return len(self.chapters[book_name]), verse_index - len(chapter_of_index) + 1
+
+def available_versifications():
+    """Names of the versification tables shipped in VERSIFICATION_DIR."""
+    if not os.path.isdir(VERSIFICATION_DIR):
+        return []
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(VERSIFICATION_DIR) if name.endswith(".json"))
+
+def load_versification(name_or_path=DEFAULT_VERSIFICATION):
+    """Loads a table by name from VERSIFICATION_DIR, or from an explicit .json path."""
+    if os.path.exists(name_or_path):
+        return Versification.from_file(name_or_path)
+    return Versification.from_file(os.path.join(VERSIFICATION_DIR, f"{name_or_path}.json"))
+
+def iter_versified(lines, versification, book_summary_log, counters=None):
     """
+    Walks raw text where each line is a verse and book names are headings,
+    yielding the structure as it goes:
 
-    # Comprehensive NIV Bible chapter and verse counts
-    # Each entry now includes a list of chapter verse counts and the total verses for the book.
-    niv_book_data = {
-        "GENESIS": {"chapters": [31, 25, 24, 26, 32, 22, 24, 22, 29, 32, 32, 20, 18, 24, 21, 16, 27, 33, 38, 18, 34, 24, 20, 67, 34, 35, 46, 22, 35, 43, 55, 32, 20, 31, 29, 43, 36, 30, 23, 23, 57, 38, 34, 34, 28, 34, 31, 22, 33, 26], "total_verses": 1533},
-        "EXODUS": {"chapters": [22, 25, 22, 31, 23, 30, 25, 32, 35, 29, 10, 51, 22, 31, 27, 36, 16, 27, 25, 26, 36, 31, 33, 18, 40, 37, 21, 43, 46, 38, 18, 35, 23, 35, 35, 38, 29, 31, 43, 38], "total_verses": 1213},
-        "LEVITICUS": {"chapters": [17, 16, 17, 35, 19, 30, 38, 36, 24, 20, 47, 8, 59, 57, 33, 34, 16, 30, 37, 27, 24, 33, 44, 23, 55, 46, 34], "total_verses": 859},
-        "NUMBERS": {"chapters": [54, 34, 51, 49, 31, 27, 89, 26, 23, 36, 35, 16, 33, 45, 41, 50, 13, 32, 22, 29, 35, 41, 30, 25, 18, 65, 23, 31, 40, 16, 54, 42, 56, 29, 34, 13], "total_verses": 1288},
-        "DEUTERONOMY": {"chapters": [46, 37, 29, 49, 33, 25, 26, 20, 29, 22, 32, 32, 18, 29, 23, 22, 20, 22, 21, 20, 23, 30, 25, 22, 19, 19, 26, 68, 29, 20, 30, 52, 29, 12], "total_verses": 959},
-        "JOSHUA": {"chapters": [18, 24, 17, 24, 15, 27, 26, 35, 27, 43, 23, 24, 33, 15, 63, 10, 18, 28, 51, 9, 45, 34, 16, 33], "total_verses": 658},
-        "JUDGES": {"chapters": [36, 23, 31, 24, 31, 40, 25, 35, 57, 18, 40, 15, 25, 20, 20, 31, 13, 31, 30, 48, 25], "total_verses": 618},
-        "RUTH": {"chapters": [22, 23, 18, 22], "total_verses": 85},
-        "1 SAMUEL": {"chapters": [28, 36, 21, 22, 12, 21, 17, 22, 27, 27, 15, 25, 23, 52, 35, 23, 58, 30, 24, 42, 15, 23, 29, 22, 44, 25, 12, 25, 11, 31, 13], "total_verses": 810},
-        "2 SAMUEL": {"chapters": [27, 32, 39, 12, 25, 23, 29, 18, 13, 19, 27, 31, 39, 33, 37, 23, 29, 33, 43, 26, 22, 51, 39, 25], "total_verses": 695},
-        "1 KINGS": {"chapters": [53, 46, 28, 34, 18, 38, 51, 66, 28, 29, 43, 33, 34, 31, 34, 34, 24, 46, 21, 43, 29, 53], "total_verses": 816},
-        "2 KINGS": {"chapters": [18, 25, 27, 44, 27, 33, 20, 29, 37, 36, 21, 21, 25, 29, 38, 20, 41, 37, 37, 21, 26, 20, 37, 20, 30], "total_verses": 719},
-        "1 CHRONICLES": {"chapters": [54, 55, 24, 43, 26, 81, 40, 40, 44, 14, 47, 40, 14, 17, 29, 43, 27, 17, 19, 8, 30, 19, 32, 31, 31, 32, 34, 21, 30], "total_verses": 942},
-        "2 CHRONICLES": {"chapters": [17, 18, 17, 22, 14, 42, 22, 18, 31, 19, 23, 16, 22, 15, 19, 14, 19, 34, 11, 37, 20, 12, 21, 27, 28, 23, 9, 27, 36, 27, 21, 33, 25, 33, 27, 23], "total_verses": 822},
-        "EZRA": {"chapters": [11, 70, 13, 24, 17, 22, 28, 36, 15, 44], "total_verses": 280},
-        "NEHEMIAH": {"chapters": [11, 20, 32, 23, 19, 19, 73, 18, 38, 39, 36, 47, 31], "total_verses": 406},
-        "ESTHER": {"chapters": [22, 23, 15, 17, 14, 14, 10, 17, 32, 3], "total_verses": 167},
-        "JOB": {"chapters": [22, 13, 26, 21, 27, 30, 21, 22, 35, 22, 20, 25, 28, 22, 35, 22, 16, 21, 29, 29, 34, 30, 17, 25, 6, 14, 23, 28, 25, 31, 40, 22, 33, 37, 16, 33, 24, 41, 30, 24, 34, 17], "total_verses": 1070},
-        "PSALMS": {"chapters": [6, 12, 8, 8, 12, 10, 17, 9, 20, 18, 7, 8, 6, 7, 5, 11, 15, 50, 14, 9, 13, 31, 6, 10, 22, 12, 14, 9, 11, 12, 24, 11, 22, 22, 28, 12, 40, 22, 13, 17, 13, 11, 5, 26, 17, 11, 9, 14, 20, 23, 19, 9, 6, 7, 23, 13, 11, 11, 17, 12, 8, 12, 11, 10, 13, 20, 7, 35, 36, 5, 24, 20, 28, 23, 10, 12, 20, 72, 13, 19, 16, 8, 18, 12, 13, 17, 7, 18, 52, 17, 16, 15, 5, 23, 11, 13, 12, 9, 9, 5, 8, 28, 22, 35, 45, 48, 43, 13, 31, 7, 10, 10, 9, 8, 18, 19, 2, 29, 176, 7, 8, 9, 4, 8, 5, 6, 5, 6, 8, 8, 3, 18, 3, 3, 21, 26, 9, 8, 24, 13, 10, 7, 12, 15, 21, 10, 20, 14, 9, 6], "total_verses": 2461},
-        "PROVERBS": {"chapters": [33, 22, 35, 27, 23, 35, 27, 36, 18, 32, 31, 28, 25, 35, 33, 33, 28, 24, 29, 30, 31, 29, 35, 34, 28, 28, 27, 28, 27, 33, 31], "total_verses": 915},
-        "ECCLESIASTES": {"chapters": [18, 26, 22, 16, 20, 12, 29, 17, 18, 20, 10, 14], "total_verses": 222},
-        "SONG OF SONGS": {"chapters": [17, 17, 11, 16, 16, 13, 13, 14], "total_verses": 117},
-        "ISAIAH": {"chapters": [31, 22, 26, 6, 30, 13, 25, 22, 21, 34, 16, 6, 22, 32, 9, 14, 14, 7, 25, 6, 17, 25, 18, 23, 12, 21, 13, 29, 24, 33, 9, 20, 24, 17, 10, 22, 38, 22, 8, 31, 29, 25, 28, 28, 25, 13, 15, 22, 26, 11, 23, 12, 12, 17, 13, 12, 21, 14, 21, 22, 11, 12, 19, 12, 25, 24], "total_verses": 1292},
-        "JEREMIAH": {"chapters": [19, 37, 25, 31, 31, 30, 34, 22, 26, 25, 23, 17, 27, 22, 21, 21, 27, 23, 15, 18, 14, 30, 40, 10, 38, 24, 22, 17, 32, 24, 40, 44, 26, 22, 19, 32, 21, 28, 18, 16, 18, 22, 13, 30, 5, 28, 7, 47, 39, 46, 64, 34], "total_verses": 1364},
-        "LAMENTATIONS": {"chapters": [22, 22, 66, 22, 22], "total_verses": 154},
-        "EZEKIEL": {"chapters": [28, 10, 27, 17, 17, 14, 27, 18, 11, 22, 25, 28, 23, 23, 8, 63, 24, 32, 14, 49, 32, 31, 49, 27, 17, 21, 36, 26, 21, 26, 18, 32, 33, 31, 15, 38, 28, 23, 29, 49, 26, 20, 27, 31, 17, 24, 23, 35], "total_verses": 1273},
-        "DANIEL": {"chapters": [21, 49, 30, 37, 31, 28, 28, 27, 27, 21, 45, 13], "total_verses": 357},
-        "HOSEA": {"chapters": [11, 23, 5, 19, 15, 11, 16, 14, 17, 15, 12, 14, 16, 9], "total_verses": 197},
-        "JOEL": {"chapters": [20, 32, 21], "total_verses": 73},
-        "AMOS": {"chapters": [15, 16, 15, 13, 27, 14, 17, 14, 15], "total_verses": 146},
-        "OBADIAH": {"chapters": [21], "total_verses": 21},
-        "JONAH": {"chapters": [17, 10, 10, 11], "total_verses": 48},
-        "MICAH": {"chapters": [16, 13, 12, 13, 15, 16, 20], "total_verses": 105},
-        "NAHUM": {"chapters": [15, 13, 19], "total_verses": 47},
-        "HABAKKUK": {"chapters": [17, 20, 19], "total_verses": 56},
-        "ZEPHANIAH": {"chapters": [18, 15, 20], "total_verses": 53},
-        "HAGGAI": {"chapters": [15, 23], "total_verses": 38},
-        "ZECHARIAH": {"chapters": [21, 13, 10, 14, 11, 15, 14, 23, 17, 12, 17, 14, 9, 21], "total_verses": 211},
-        "MALACHI": {"chapters": [14, 17, 18, 6], "total_verses": 55},
-        "MATTHEW": {"chapters": [25, 23, 17, 25, 48, 34, 29, 34, 38, 42, 30, 50, 58, 36, 39, 28, 27, 35, 30, 34, 46, 46, 39, 51, 46, 75, 66, 20], "total_verses": 1071},
-        "MARK": {"chapters": [45, 28, 35, 41, 43, 56, 37, 38, 50, 52, 33, 44, 37, 72, 47, 20], "total_verses": 678},
-        "LUKE": {"chapters": [80, 52, 38, 44, 39, 49, 50, 56, 62, 42, 54, 59, 35, 35, 32, 31, 37, 43, 48, 47, 38, 71, 56, 53], "total_verses": 1151},
-        "JOHN": {"chapters": [51, 25, 36, 54, 47, 71, 53, 59, 41, 42, 57, 50, 38, 31, 27, 33, 26, 40, 42, 31, 25], "total_verses": 879},
-        "ACTS": {"chapters": [26, 47, 26, 37, 42, 15, 60, 40, 43, 48, 30, 25, 52, 28, 41, 40, 34, 28, 41, 38, 40, 30, 35, 27, 27, 32, 44, 31], "total_verses": 1007},
-        "ROMANS": {"chapters": [32, 29, 31, 25, 21, 23, 25, 39, 33, 21, 36, 21, 14, 23, 33, 27], "total_verses": 433},
-        "1 CORINTHIANS": {"chapters": [31, 16, 23, 21, 13, 20, 40, 13, 27, 33, 34, 31, 13, 40, 58, 24], "total_verses": 437},
-        "2 CORINTHIANS": {"chapters": [24, 17, 18, 18, 21, 18, 16, 24, 15, 18, 33, 21, 14], "total_verses": 257},
-        "GALATIANS": {"chapters": [24, 21, 29, 31, 26, 18], "total_verses": 149},
-        "EPHESIANS": {"chapters": [23, 22, 21, 32, 33, 24], "total_verses": 155},
-        "PHILIPPIANS": {"chapters": [30, 30, 21, 23], "total_verses": 104},
-        "COLOSSIANS": {"chapters": [29, 23, 25, 18], "total_verses": 95},
-        "1 THESSALONIANS": {"chapters": [10, 20, 13, 18, 28], "total_verses": 89},
-        "2 THESSALONIANS": {"chapters": [12, 17, 18], "total_verses": 47},
-        "1 TIMOTHY": {"chapters": [20, 15, 16, 16, 25, 21], "total_verses": 113},
-        "2 TIMOTHY": {"chapters": [18, 26, 17, 22], "total_verses": 83},
-        "TITUS": {"chapters": [16, 15, 15], "total_verses": 46},
-        "PHILEMON": {"chapters": [25], "total_verses": 25},
-        "HEBREWS": {"chapters": [14, 18, 19, 16, 14, 20, 28, 13, 28, 39, 40, 29, 25], "total_verses": 303},
-        "JAMES": {"chapters": [27, 26, 18, 17, 20], "total_verses": 108},
-        "1 PETER": {"chapters": [25, 25, 22, 19, 14], "total_verses": 105},
-        "2 PETER": {"chapters": [21, 22, 18], "total_verses": 61},
-        "1 JOHN": {"chapters": [10, 29, 24, 21, 21], "total_verses": 105},
-        "2 JOHN": {"chapters": [13], "total_verses": 13},
-        "3 JOHN": {"chapters": [14], "total_verses": 14},
-        "JUDE": {"chapters": [25], "total_verses": 25},
-        "REVELATION": {"chapters": [20, 29, 22, 11, 14, 17, 17, 13, 21, 11, 19, 17, 18, 20, 8, 21, 18, 24, 21, 15, 27, 21], "total_verses": 404}
-    }
-
-    # List of all book names in canonical order for checking missing books
-    expected_book_order = list(niv_book_data.keys())
-
-    output_lines = []
-    book_summary_log = []
-    
-    current_book_name = None
-    current_chapter_index = 0 # 0-indexed for list access
-    verses_found_in_current_book = 0
-    verses_found_in_current_chapter = 0
-    
-    processed_books_set = set() # To track which books were found in the input file
+        ("book", name), ("chapter", number), ("verse", chapter, verse, text)
 
-    lines = input_text.strip().split('\n')
+    Lines before the first book heading are ignored. When a book ends its
+    verse count is checked against the table and "BOOK - Good" or a mismatch
+    line is appended to book_summary_log; after the input, every book of the
+    table that was never found is logged as missing.
+
+    Args:
+        lines (iterable): Input lines (a file object streams the input).
+        versification (Versification): The table to number verses with.
+        book_summary_log (list): Receives the book-level status lines.
+        counters (Counter): Optional; receives 'lines', 'ignored_lines' and the
+                            'books_good', 'books_mismatched' and 'books_missing' counts.
+    """
+    if counters is None:
+        counters = Counter()
+    processed_books_set = set()
+    current_book_name = None
+    verses_found_in_book = 0
 
     def finalize_previous_book_summary():
-        nonlocal current_book_name, verses_found_in_book, book_summary_log
         if current_book_name:
-            expected_total = niv_book_data[current_book_name]["total_verses"]
+            expected_total = versification.total_verses[current_book_name]
             if verses_found_in_book == expected_total:
                 book_summary_log.append(f"{current_book_name} - Good")
+                counters['books_good'] += 1
             else:
+                counters['books_mismatched'] += 1
                 book_summary_log.append(
                     f"{current_book_name} overall expected {expected_total} verses but found {verses_found_in_book} verses."
                 )
             processed_books_set.add(current_book_name)
 
-    for line_num, line in enumerate(lines, 1):
+    for line in lines:
+        counters['lines'] += 1
         cleaned_line = line.lstrip('\ufeff').strip()
         if not cleaned_line:
             continue
 
-        if cleaned_line.upper() in niv_book_data:
+        book_name = versification.book_for_heading(cleaned_line)
+        if book_name:
             finalize_previous_book_summary()
-
-            current_book_name = cleaned_line.upper()
-            output_lines.append(f"\n{current_book_name}\n")
-            chapter_number = 1
-            verse_number = 1
+            current_book_name = book_name
             verses_found_in_book = 0
-            output_lines.append(f"Chapter {chapter_number}")
+            yield ("book", current_book_name)
+            yield ("chapter", 1)
             continue
 
         if current_book_name:
-            # Get chapter definitions for the current book
-            chapter_definitions = niv_book_data[current_book_name]["chapters"]
-
-            # Check if we need to roll over to the next chapter
-            # This must happen BEFORE processing the current verse
-            if chapter_number <= len(chapter_definitions) and verse_number > chapter_definitions[chapter_number - 1]:
-                chapter_number += 1
-                verse_number = 1
-                if chapter_number <= len(chapter_definitions):
-                    output_lines.append(f"\nChapter {chapter_number}")
-
-            output_lines.append(f"{verse_number} {cleaned_line}")
-            verse_number += 1
+            chapter_number, verse_number = versification.locate(current_book_name, verses_found_in_book)
+            # A new chapter starts at its first verse; overflow verses restart at 1 without a heading
+            if verse_number == 1 and verses_found_in_book and verses_found_in_book < len(versification.chapter_of_index[current_book_name]):
+                yield ("chapter", chapter_number)
+            yield ("verse", chapter_number, verse_number, cleaned_line)
             verses_found_in_book += 1
-            
+        else:
+            counters['ignored_lines'] += 1
+
     finalize_previous_book_summary()
 
-    for expected_book in expected_book_order:
+    for expected_book in versification.book_order:
         if expected_book not in processed_books_set:
             book_summary_log.append(f"{expected_book} - Missing")
+            counters['books_missing'] += 1
 
-    return "\n".join(output_lines).strip(), book_summary_log
+def format_bible_stream(lines, out, versification, counters=None):
+    """
+    Writes the formatted text ("BOOK", "Chapter N" headings and numbered
+    verses) to out while reading lines, so memory use does not grow with
+    the input size.
+
+    Args:
+        counters (Counter): Optional; receives the 'books', 'chapters' and 'verses'
+                            written plus the counts of iter_versified().
+
+    Returns:
+        list: The book-level status or warning lines.
+    """
+    if counters is None:
+        counters = Counter()
+    book_summary_log = []
+    first = True
+    for event in iter_versified(lines, versification, book_summary_log, counters):
+        counters[event[0] + "s"] += 1
+        if event[0] == "book":
+            text = f"\n{event[1]}\n"
+        elif event[0] == "chapter":
+            if event[1] == 1:
+                text = "Chapter 1"
+            else:
+                text = f"\nChapter {event[1]}"
+        else:
+            text = f"{event[2]} {event[3]}"
+        if first:
+            out.write(text.lstrip())
+            first = False
+        else:
+            out.write("\n" + text)
+    return book_summary_log
+
+def format_niv_bible_text(input_text):
+    """
+    Formats NIV Bible text by adding chapter and verse numbers.
+
+    Args:
+        input_text (str): The raw text content of the NIV Bible file,
+                          where each line is a verse and book names are
+                          headings.
+
+    Returns:
+        tuple: A tuple containing:
+               - str: The formatted text with chapter and verse numbers.
+               - list: A list of strings, each representing a book-level status or warning.
+    """
+    out = io.StringIO()
+    book_summary_log = format_bible_stream(io.StringIO(input_text.strip()), out, load_versification("niv"))
+    return out.getvalue(), book_summary_log
 
 class BibleFormatterApp:
     def __init__(self, master):
         self.master = master
-        master.title("NIV Bible Formatter")
-        master.geometry("600x450") # Set a default window size
+        master.title("Bible Formatter")
+        master.geometry("600x500") # Set a default window size
         master.resizable(True, True) # Allow resizing
 
         self.input_file_path = tk.StringVar()
         self.output_folder_path = tk.StringVar()
         self.output_file_name = tk.StringVar(value="formatted_bible_niv.txt") # Default output filename
         self.mismatch_log_file_name = tk.StringVar(value="niv_summary_log.txt") # Default mismatch log filename
+        self.versification_name = tk.StringVar(value=DEFAULT_VERSIFICATION)
 
         # Input File Selection
         self.input_frame = tk.LabelFrame(master, text="Input File", padx=10, pady=10)
@@ -177,6 +268,13 @@ class BibleFormatterApp:
         self.input_button = tk.Button(self.input_frame, text="Select File", command=self.select_input_file)
         self.input_button.pack(side="right")
 
+        # Versification Table (chapter/verse counts of the translation)
+        self.versification_frame = tk.LabelFrame(master, text="Versification", padx=10, pady=10)
+        self.versification_frame.pack(padx=10, pady=5, fill="x")
+        self.versification_combobox = ttk.Combobox(self.versification_frame, textvariable=self.versification_name,
+                                                   values=available_versifications(), state="readonly")
+        self.versification_combobox.pack(fill="x")
+
         # Output Location Selection
         self.output_frame = tk.LabelFrame(master, text="Output Location", padx=10, pady=10)
         self.output_frame.pack(padx=10, pady=5, fill="x")
@@ -252,13 +350,19 @@ class BibleFormatterApp:
         mismatch_full_path = os.path.join(output_folder, mismatch_log_name)
 
         try:
-            with open(input_path, 'r', encoding='utf-8') as infile:
-                input_content = infile.read()
-
-            formatted_content, book_summary_log = format_niv_bible_text(input_content)
-
-            with open(output_full_path, 'w', encoding='utf-8') as outfile:
-                outfile.write(formatted_content)
+            report = BuildReport("bible_format", output_full_path,
+                                 {"source": input_path, "versification": self.versification_name.get()})
+            with report.phase("load_versification"):
+                versification = load_versification(self.versification_name.get())
+
+            # Stream from input to a temporary file so a failed run never leaves a half-written output
+            temp_path = output_full_path + ".part"
+            with report.phase("format"):
+                with open(input_path, 'r', encoding='utf-8') as infile, \
+                        open(temp_path, 'w', encoding='utf-8') as outfile:
+                    book_summary_log = format_bible_stream(infile, outfile, versification, report.counters)
+                os.replace(temp_path, output_full_path)
+            report.write()
 
             status_message = f"Successfully formatted and saved to:\n{output_full_path}"
             if book_summary_log:
@@ -276,6 +380,8 @@ class BibleFormatterApp:
             messagebox.showerror("Error", "Input file not found. Please check the path.")
             self.status_label.config(text="Error: Input file not found.", fg="red")
         except Exception as e:
+            if os.path.exists(output_full_path + ".part"):
+                os.remove(output_full_path + ".part")
             messagebox.showerror("Error", f"An error occurred during processing: {e}")
             self.status_label.config(text=f"Error: {e}", fg="red")
 
@@ -0,0 +1,236 @@
+"""
+Machine-readable build reports shared by the build tools.
+
+A BuildReport collects, for one run of a tool, the wall and CPU time of each
+phase, a Counter of events (lines read, JSON errors, rejections by reason,
+...) and optionally the peak Python memory seen by tracemalloc. It is written
+as JSON next to the output:
+
+    bible_data.json        ->  bible_data_report.json
+    english_dictionary.json ->  english_dictionary_report.json
+    dictionary/ (a folder) ->  dictionary/build_report.json
+
+Phases are either timed blocks:
+
+    with report.phase("load_exclusions"):
+        ...
+
+or stages of a generator pipeline, where the stages run interleaved:
+
+    entries = report.stage("scan", iter_source(...))
+    final = report.stage("reduce", reduce_entries(entries, ...))
+
+A stage's time excludes the time spent in the stage wrapped just before it,
+and a block that drains a chain names its last stage as upstream:
+
+    with report.phase("write", upstream="reduce"):
+        write_entries(final, writer)
+
+so the phases of a chain add up to the time of the whole chain. A chain
+can also start with a function whose calls are timed, such as the block
+reads of a source file, which is much cheaper than timing every line:
+
+    wrap = report.timed_calls("read")
+    entries = report.stage("scan", parse(open_source(path, wrap)))
+
+Each phase also gets its throughput: stages count the items they yield,
+and measure() names the counters holding the items and bytes a phase
+processed, e.g. the decompressed bytes behind a read stage:
+
+    report.measure("read", nbytes="bytes_read")
+
+which adds items/s and MB/s next to the phase's times.
+
+CPU times are those of the reporting process only; time spent in worker
+processes shows up as wall time.
+"""
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+REPORT_VERSION = 1
+
+
+def report_path_for(output_path):
+    """Where the report of a build writing output_path goes."""
+    if os.path.isdir(output_path):
+        return os.path.join(output_path, "build_report.json")
+    root, _ = os.path.splitext(output_path)
+    return f"{root}_report.json"
+
+
+class BuildReport:
+    """
+    Timings and counters of one build (see the module docstring). Anything
+    tool-specific (e.g. a per-file table) can be put in details.
+
+    Args:
+        tool (str): Name of the tool, e.g. 'dict_pipeline'.
+        output_path (str): The build's output; the report is written next to it.
+        settings (dict): Options of the run, copied into the report as given.
+        trace_memory (bool): Record the peak traced memory (slows the build down).
+        report_path (str): Where write() puts the report, for builds that share an
+                           output folder; defaults to report_path_for(output_path).
+    """
+    def __init__(self, tool, output_path, settings=None, trace_memory=False, report_path=None):
+        self.tool = tool
+        self.output_path = output_path
+        self.report_path = report_path
+        self.settings = dict(settings or {})
+        self.counters = Counter()
+        self.phases = {}
+        self.details = {}
+        self.trace_memory = trace_memory
+        self._started = datetime.now(timezone.utc)
+        self._wall = time.perf_counter()
+        self._cpu = time.process_time()
+        self._inclusive = {}
+        self._upstream = {}
+        self._order = []
+        self._last_stage = None
+        self._items = Counter()
+        self._measures = {}
+        self._started_tracing = trace_memory and not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+
+    def _add(self, name, wall, cpu, chained=False, upstream=None):
+        # Chained phases accumulate inclusive times; _phase_times subtracts their upstream
+        phases = self._inclusive if chained else self.phases
+        if name not in phases:
+            self._order.append(name)
+        phase = phases.setdefault(name, {"wall_s": 0.0, "cpu_s": 0.0})
+        phase["wall_s"] += wall
+        phase["cpu_s"] += cpu
+        if chained:
+            self._upstream[name] = upstream
+
+    @contextmanager
+    def phase(self, name, upstream=None):
+        """
+        Times the enclosed block as phase name (repeated blocks add up).
+
+        If the block drains a stage, name that stage as upstream so its time
+        is taken out of this phase.
+        """
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._add(name, time.perf_counter() - wall, time.process_time() - cpu, upstream is not None, upstream)
+
+    def stage(self, name, iterable):
+        """Wraps one generator stage; see the module docstring."""
+        upstream = self._last_stage
+        self._last_stage = name
+        self._add(name, 0.0, 0.0, True, upstream)
+
+        def timed():
+            iterator = iter(iterable)
+            count = 0
+            try:
+                while True:
+                    wall, cpu = time.perf_counter(), time.process_time()
+                    try:
+                        item = next(iterator)
+                    except StopIteration:
+                        return
+                    finally:
+                        self._add(name, time.perf_counter() - wall, time.process_time() - cpu, True, upstream)
+                    count += 1
+                    yield item
+            finally:
+                self._items[name] += count
+        return timed()
+
+    def timed_calls(self, name):
+        """
+        Starts a chain like stage() for a stage that is a function rather
+        than a generator: returns wrap(function), and the calls of every
+        wrapped function are timed as stage name.
+        """
+        upstream = self._last_stage
+        self._last_stage = name
+        self._add(name, 0.0, 0.0, True, upstream)
+
+        def wrap(function):
+            def timed(*args):
+                wall, cpu = time.perf_counter(), time.process_time()
+                try:
+                    return function(*args)
+                finally:
+                    self._add(name, time.perf_counter() - wall, time.process_time() - cpu, True, upstream)
+            return timed
+        return wrap
+
+    def measure(self, name, items=None, nbytes=None):
+        """
+        Names the counters holding the number of items and of bytes phase
+        name processed; a stage counts its own items unless items is given.
+        """
+        self._measures[name] = (items, nbytes)
+
+    def _phase_times(self):
+        phases = {}
+        for name in self._order:
+            if name in self._upstream:
+                below = self._inclusive.get(self._upstream[name], {})
+                phases[name] = {key: value - below.get(key, 0.0) for key, value in self._inclusive[name].items()}
+            else:
+                phases[name] = dict(self.phases[name])
+            items, nbytes = self._measures.get(name, (None, None))
+            items = self.counters[items] if items else self._items.get(name)
+            wall = phases[name]["wall_s"]
+            if items is not None:
+                phases[name]["items"] = items
+                if wall > 0:
+                    phases[name]["items_per_s"] = items / wall
+            if nbytes and self.counters[nbytes]:
+                phases[name]["mb"] = self.counters[nbytes] / 1e6
+                if wall > 0:
+                    phases[name]["mb_per_s"] = self.counters[nbytes] / 1e6 / wall
+        return phases
+
+    def to_dict(self):
+        """The report as a JSON-ready dict; totals run from construction until now."""
+        report = {
+            "version": REPORT_VERSION,
+            "tool": self.tool,
+            "started": self._started.isoformat(timespec="seconds"),
+            "output": self.output_path,
+            "python": platform.python_version(),
+            "argv": sys.argv[1:],
+            "settings": self.settings,
+            "total": {"wall_s": round(time.perf_counter() - self._wall, 4),
+                      "cpu_s": round(time.process_time() - self._cpu, 4)},
+            "phases": {name: {key: value if key == "items" else round(value, 4) for key, value in phase.items()}
+                       for name, phase in self._phase_times().items()},
+            "counters": dict(sorted(self.counters.items())),
+        }
+        if self.details:
+            report["details"] = self.details
+        if self.trace_memory and tracemalloc.is_tracing():
+            report["memory"] = {"peak_mb": round(tracemalloc.get_traced_memory()[1] / 1e6, 2)}
+        return report
+
+    def close(self):
+        """Stops tracemalloc if this report started it; for builds that end without a report."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def write(self, path=None):
+        """Writes the report (default: report_path, or report_path_for(output_path)) and closes it."""
+        path = path or self.report_path or report_path_for(self.output_path)
+        report = self.to_dict()
+        self.close()
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(path + ".part", path)
+        return path
@@ -0,0 +1,131 @@
+"""
+Compact in-memory store of (word, definition) pairs for the build phase.
+
+A dict, set or list of Python strings costs an object header per word and
+per definition, a tuple per pair and a hash table slot per word, several
+times the size of the text itself. CompactEntries instead appends the UTF-8
+bytes of every word and definition to two bytearrays addressed by offset
+arrays, and finds words through an open-addressing table of entry numbers:
+
+    store = CompactEntries()
+    store.add("DOG", "A domesticated animal.")   # True
+    store.add("DOG", "Something else.")          # False: the first entry wins
+    store.get("DOG")                             # 'A domesticated animal.'
+    list(store)                                  # [('DOG', 'A domesticated animal.')]
+
+Entries keep their insertion order and can be read back by position
+(store.entry(i)), which is all a shuffle needs. With definitions=False only
+the words are kept, as a compact set of seen words; with indexed=False there
+is no table, for entries already known to be unique.
+
+Words are indexed by their str hash, so a store is only valid in the process
+that filled it.
+"""
+from array import array
+
+INITIAL_SLOTS = 1 << 10
+
+
+class CompactEntries:
+    """Insertion-ordered (word, definition) pairs in contiguous buffers (see the module docstring)."""
+    def __init__(self, definitions=True, indexed=True):
+        self._words = bytearray()
+        self._word_ends = array('q')
+        self._definitions = bytearray() if definitions else None
+        self._definition_ends = array('q') if definitions else None
+        self._hashes = array('q') if indexed else None
+        self._slots = array('I', bytes(4 * INITIAL_SLOTS)) if indexed else None
+
+    def __len__(self):
+        return len(self._word_ends)
+
+    def _word_bytes(self, i):
+        ends = self._word_ends
+        return self._words[ends[i - 1] if i else 0:ends[i]]
+
+    def _find(self, key, h):
+        # Linear probing: returns (entry number or -1, the slot where the search ended)
+        slots, hashes, words, ends = self._slots, self._hashes, self._words, self._word_ends
+        mask = len(slots) - 1
+        slot = h & mask
+        found = slots[slot]
+        while found:
+            i = found - 1
+            if hashes[i] == h and words[ends[i - 1] if i else 0:ends[i]] == key:
+                return i, slot
+            slot = (slot + 1) & mask
+            found = slots[slot]
+        return -1, slot
+
+    def _grow(self):
+        slots = array('I', bytes(8 * len(self._slots)))
+        mask = len(slots) - 1
+        for i, h in enumerate(self._hashes):
+            slot = h & mask
+            while slots[slot]:
+                slot = (slot + 1) & mask
+            slots[slot] = i + 1
+        self._slots = slots
+
+    def add(self, word, definition=''):
+        """
+        Appends (word, definition) unless word is already stored; returns
+        whether it was added. Stores without an index append unconditionally.
+        """
+        key = word.encode('utf-8')
+        words, ends, slots = self._words, self._word_ends, self._slots
+        if slots is not None:
+            # _find(), inlined: this is called once per scanned entry
+            hashes = self._hashes
+            h = hash(word)
+            mask = len(slots) - 1
+            slot = h & mask
+            found = slots[slot]
+            while found:
+                i = found - 1
+                if hashes[i] == h and words[ends[i - 1] if i else 0:ends[i]] == key:
+                    return False
+                slot = (slot + 1) & mask
+                found = slots[slot]
+            hashes.append(h)
+            slots[slot] = len(ends) + 1
+        words += key
+        ends.append(len(words))
+        if self._definitions is not None:
+            self._definitions += definition.encode('utf-8')
+            self._definition_ends.append(len(self._definitions))
+        if slots is not None and 2 * len(ends) > len(slots):
+            self._grow()
+        return True
+
+    def index(self, word):
+        """The position of word, or -1 if it isn't stored (needs an index)."""
+        return self._find(word.encode('utf-8'), hash(word))[0]
+
+    def __contains__(self, word):
+        return self.index(word) >= 0
+
+    def get(self, word, default=None):
+        """The definition stored with word, or default."""
+        i = self.index(word)
+        return self.entry(i)[1] if i >= 0 else default
+
+    def word(self, i):
+        return self._word_bytes(i).decode('utf-8')
+
+    def entry(self, i):
+        """The i-th (word, definition) pair in insertion order; the definition is None without definitions."""
+        if self._definitions is None:
+            return self.word(i), None
+        ends = self._definition_ends
+        return self.word(i), self._definitions[ends[i - 1] if i else 0:ends[i]].decode('utf-8')
+
+    def __iter__(self):
+        for i in range(len(self._word_ends)):
+            yield self.entry(i)
+
+    @property
+    def nbytes(self):
+        """Bytes held by the buffers, offset arrays and index."""
+        parts = (self._words, self._word_ends, self._definitions, self._definition_ends, self._hashes, self._slots)
+        return sum(len(part) * (part.itemsize if isinstance(part, array) else 1) for part in parts if part is not None)
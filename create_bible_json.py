@@ -1,16 +1,33 @@
+import argparse
 import json
 import re
 import os
+import sys
+import time
+import hashlib
+import queue
+import tempfile
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
 import tkinter as tk
 from tkinter import filedialog, messagebox, scrolledtext
 from tkinter import ttk # Import ttk for Combobox
+from bible_format import iter_versified, load_versification, available_versifications
+from build_report import BuildReport
+# How often (in lines) parse_bible_text reports progress and checks for cancellation
+PROGRESS_EVERY_LINES = 500
 
-def parse_bible_text(filepath, lang_key, bible_data, status_callback):
+def parse_bible_text(filepath, lang_key, bible_data, status_callback, progress_callback=None, cancel_event=None,
+                     counters=None):
     """
     Parses a plain text Bible file according to the specified format
     and adds it to the main data dictionary. Handles multi-line verses.
     Applies unified book name detection logic (first non-blank line before Chapter 1)
-    and reduces output verbosity.
+    and reduces output verbosity. That line is never part of the previous book's
+    last verse, even when it reads like a verse number ("1 SAMUEL").
 
     Args:
         filepath (str): The path to the input text file.
@@ -19,7 +36,14 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
         bible_data (dict): The main dictionary to which parsed data will be added.
                             This dictionary will be modified in place.
         status_callback (function): A function to update the GUI status.
+        progress_callback (function): Optional, called as progress_callback(bytes_read, total_bytes)
+                                      every PROGRESS_EVERY_LINES lines and once at the end.
+        cancel_event (threading.Event): Optional; when set, parsing stops and False is returned.
+        counters (Counter): Optional; receives 'lines', 'books', 'chapters', 'verses',
+                            'skipped_verses' and 'unrecognized_lines' counts.
     """
+    if counters is None:
+        counters = Counter()
     status_callback(f"Starting to parse '{os.path.basename(filepath)}' for language '{lang_key}'...")
 
     # Initialize counters for summary within this parsing run
@@ -45,6 +69,8 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
     # This is crucial for the "line before Chapter 1" logic.
     non_blank_line_buffer = [] # Stores (line_content, line_num)
     BUFFER_SIZE = 2 # We need at least the immediate preceding non-blank line
+    # How the last non-blank line was read: 'verse' (it started one), 'continuation' or None
+    last_line_role = None
 
     # Helper function to finalize and store the current verse
     def finalize_current_verse():
@@ -62,10 +88,21 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
         current_verse_text_lines = []
 
     try:
-        # Use 'utf-8-sig' to handle Byte Order Mark (BOM) if present, common in text files
-        with open(filepath, 'r', encoding='utf-8-sig') as f:
-            for line_num, raw_line in enumerate(f, 1):
-                line = raw_line.strip()
+        # Read bytes so progress can be measured against the file size; the first line
+        # is decoded as 'utf-8-sig' to drop a Byte Order Mark (BOM) if present
+        with open(filepath, 'rb') as f:
+            total_bytes = os.fstat(f.fileno()).st_size
+            bytes_read = 0
+            line_num = 0
+            for line_num, raw_bytes in enumerate(f, 1):
+                bytes_read += len(raw_bytes)
+                if line_num % PROGRESS_EVERY_LINES == 0:
+                    if cancel_event is not None and cancel_event.is_set():
+                        status_callback(f"Parsing of '{os.path.basename(filepath)}' cancelled (Line {line_num}).")
+                        return False
+                    if progress_callback:
+                        progress_callback(bytes_read, total_bytes)
+                line = raw_bytes.decode('utf-8-sig' if line_num == 1 else 'utf-8').strip()
 
                 # Add current non-blank line to buffer before processing it.
                 # This ensures the buffer always contains the most recent non-blank lines
@@ -83,10 +120,20 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
                 match_chapter_ro = chapter_pattern_ro.match(line)
 
                 if match_chapter_en or match_chapter_ro:
-                    # If we were collecting a verse, finalize it before moving to a new chapter
-                    finalize_current_verse() 
-
                     chapter_num = match_chapter_en.group(1) if match_chapter_en else match_chapter_ro.group(1)
+
+                    # The line before Chapter 1 is the next book's name, not part of the last verse,
+                    # even when it looks like one ("1 SAMUEL" reads as verse 1)
+                    if int(chapter_num) == 1 and last_line_role == 'continuation':
+                        current_verse_text_lines.pop()
+                    elif int(chapter_num) == 1 and last_line_role == 'verse':
+                        current_verse_num = None
+                        current_verse_text_lines = []
+                        verse_count -= 1
+                    last_line_role = None
+
+                    # If we were collecting a verse, finalize it before moving to a new chapter
+                    finalize_current_verse()
                     
                     # Unified logic for identifying book name when Chapter 1 is encountered
                     if int(chapter_num) == 1:
@@ -126,15 +173,18 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
                 if match_verse_start:
                     # If we were collecting a previous verse, finalize it now
                     finalize_current_verse()
+                    last_line_role = None
 
                     verse_num, verse_text = match_verse_start.groups()
                     
                     if current_book is None or current_chapter is None:
                         status_callback(f"WARNING: Skipping verse: '{line}' (No book/chapter context, Line {line_num}).")
+                        counters['skipped_verses'] += 1
                         continue # Skip this verse if context is missing
                     
                     current_verse_num = verse_num
                     current_verse_text_lines.append(verse_text)
+                    last_line_role = 'verse'
                     verse_count += 1 # Increment verse count
                     # Reduced output: No status_callback for every started verse
                     continue # Move to next line
@@ -142,6 +192,7 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
                 # 3. If we are currently parsing a verse, this line is its continuation
                 if current_verse_num is not None:
                     current_verse_text_lines.append(line)
+                    last_line_role = 'continuation'
                     # Reduced output: No status_callback for every continued verse
                     continue # Move to next line
                 
@@ -149,9 +200,13 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
                 # then it's an unrecognized line. The general `book_name_pattern` is no longer used
                 # as the primary book identification method.
                 status_callback(f"WARNING: Unrecognized line: '{line}' (Line {line_num}).")
+                counters['unrecognized_lines'] += 1
                 
         # After the loop, finalize any remaining verse that was being collected
         finalize_current_verse()
+        if progress_callback:
+            progress_callback(total_bytes, total_bytes)
+        counters.update(lines=line_num, books=book_count, chapters=chapter_count, verses=verse_count)
 
         status_callback(f"Successfully finished parsing '{os.path.basename(filepath)}'.")
         status_callback(f"Summary for '{lang_key}': Books found: {book_count}, Chapters found: {chapter_count}, Verses found: {verse_count}")
@@ -165,6 +220,679 @@ def parse_bible_text(filepath, lang_key, bible_data, status_callback):
         status_callback(f"An error occurred while parsing {filepath}: {e}")
         return False
 
+def parse_raw_bible_text(filepath, lang_key, bible_data, status_callback, versification="niv",
+                         progress_callback=None, cancel_event=None, counters=None):
+    """
+    Parses raw verse-per-line text (book names as headings, no chapter or verse
+    numbers) straight into bible_data in a single pass, numbering the verses
+    with a versification table (see bible_format.iter_versified).
+
+    This gives the same structure as formatting the text with bible_format.py
+    and then running parse_bible_text on the result, without the intermediate
+    file. Each book's verse count is checked against the table as soon as the
+    book ends, and those summary lines go to status_callback.
+
+    Args:
+        filepath (str): The raw text file.
+        lang_key (str): The language key to use as the top-level key in the JSON.
+        bible_data (dict): The main dictionary to which parsed data will be added.
+        status_callback (function): A function to update the GUI status.
+        versification (str): Table name in the 'versification' folder, or a path to one.
+        progress_callback (function): Optional, called as progress_callback(bytes_read, total_bytes).
+        cancel_event (threading.Event): Optional; when set, parsing stops and False is returned.
+        counters (Counter): Optional; receives 'books', 'chapters', 'verses' and the
+                            counts of bible_format.iter_versified().
+    """
+    if counters is None:
+        counters = Counter()
+    status_callback(f"Starting to parse raw text '{os.path.basename(filepath)}' for language '{lang_key}' "
+                    f"with '{versification}' versification...")
+    book_count = 0
+    chapter_count = 0
+    verse_count = 0
+    lang_data = bible_data.setdefault(lang_key, {})
+    progress = {"cancelled_at": None}
+
+    def read_lines(f):
+        # Decodes lines lazily while tracking progress; iter_versified strips a BOM itself.
+        total_bytes = os.fstat(f.fileno()).st_size
+        bytes_read = 0
+        for line_num, raw_bytes in enumerate(f, 1):
+            bytes_read += len(raw_bytes)
+            if line_num % PROGRESS_EVERY_LINES == 0:
+                if cancel_event is not None and cancel_event.is_set():
+                    progress["cancelled_at"] = line_num
+                    return
+                if progress_callback:
+                    progress_callback(bytes_read, total_bytes)
+            yield raw_bytes.decode('utf-8')
+        if progress_callback:
+            progress_callback(total_bytes, total_bytes)
+
+    try:
+        table = load_versification(versification)
+        book_summary_log = []
+        logged = 0
+        with open(filepath, 'rb') as f:
+            chapter_data = None
+            for event in iter_versified(read_lines(f), table, book_summary_log, counters):
+                if event[0] == "book":
+                    book_data = lang_data.setdefault(event[1], {})
+                    book_count += 1
+                elif event[0] == "chapter":
+                    chapter_data = book_data[str(event[1])] = {}
+                    chapter_count += 1
+                else:
+                    # Verses past the table's last chapter restart at 1, exactly as in the formatted text
+                    chapter_data[str(event[2])] = event[3]
+                    verse_count += 1
+                for line in book_summary_log[logged:]:
+                    status_callback(line)
+                logged = len(book_summary_log)
+
+        if progress["cancelled_at"] is not None:
+            status_callback(f"Parsing of '{os.path.basename(filepath)}' cancelled (Line {progress['cancelled_at']}).")
+            return False
+        for line in book_summary_log[logged:]:
+            status_callback(line)
+        counters.update(books=book_count, chapters=chapter_count, verses=verse_count)
+
+        status_callback(f"Successfully finished parsing '{os.path.basename(filepath)}'.")
+        status_callback(f"Summary for '{lang_key}': Books found: {book_count}, Chapters found: {chapter_count}, Verses found: {verse_count}")
+        status_callback("--------------------------")
+        return True
+
+    except FileNotFoundError:
+        status_callback(f"ERROR: File not found at {filepath}.")
+        return False
+    except Exception as e:
+        status_callback(f"An error occurred while parsing {filepath}: {e}")
+        return False
+
+def parse_source(filepath, lang_key, bible_data, status_callback, versification=None,
+                 progress_callback=None, cancel_event=None, counters=None):
+    """Parses formatted text with parse_bible_text, or raw text with parse_raw_bible_text when a versification is given."""
+    if versification:
+        return parse_raw_bible_text(filepath, lang_key, bible_data, status_callback, versification,
+                                    progress_callback, cancel_event, counters)
+    return parse_bible_text(filepath, lang_key, bible_data, status_callback, progress_callback, cancel_event,
+                            counters)
+
+def source_fingerprint(filepath, versification=None):
+    """Content hash of a source, tied to how it is parsed so switching modes forces a re-parse."""
+    source_hash = file_sha256(filepath)
+    return f"{source_hash}:{versification}" if versification else source_hash
+
+# Word lengths the game uses for Bible-mode puzzles
+INDEX_MIN_WORD_LEN = 4
+INDEX_MAX_WORD_LEN = 9
+
+def js_length(text):
+    """Length of a string as JavaScript counts it (UTF-16 code units)."""
+    return len(text.encode('utf-16-le')) // 2
+
+def js_key_order(keys):
+    """
+    Orders object keys the way a JavaScript for...in loop visits them:
+    integer-like keys ascending, then the other keys in insertion order.
+    """
+    def sort_key(item):
+        position, key = item
+        if key.isdigit() and (key == "0" or not key.startswith("0")):
+            return (0, int(key), position)
+        return (1, 0, position)
+    return [key for _, key in sorted(enumerate(keys), key=sort_key)]
+
+def extract_candidate_words(verse_text):
+    """
+    Yields the puzzle-sized words of a verse, normalized exactly like the game
+    does at runtime: NFC, then uppercase, then runs of Unicode letters (\\p{L}+).
+    """
+    normalized = unicodedata.normalize('NFC', verse_text).upper()
+    for is_letter, run in groupby(normalized, str.isalpha):
+        if is_letter:
+            word = ''.join(run)
+            if INDEX_MIN_WORD_LEN <= js_length(word) <= INDEX_MAX_WORD_LEN:
+                yield word
+
+def build_chapter_index(chapter_data):
+    """
+    Maps every unique candidate word of a chapter to the first verse it appears in.
+
+    Args:
+        chapter_data (dict): Verse number -> verse text.
+
+    Returns:
+        dict: Word -> verse number, in order of first appearance.
+    """
+    index = {}
+    for verse_num in js_key_order(list(chapter_data)):
+        for word in extract_candidate_words(chapter_data[verse_num]):
+            index.setdefault(word, verse_num)
+    return index
+
+def build_bible_index(bible_data):
+    """
+    Builds the per-chapter candidate word index for every language, book and chapter.
+
+    Returns:
+        dict: {language: {book: {chapter: {WORD: verse}}}}, mirroring bible_data.
+    """
+    return {
+        lang_key: {
+            book: {chapter: build_chapter_index(chapter_data) for chapter, chapter_data in book_data.items()}
+            for book, book_data in lang_data.items()
+        }
+        for lang_key, lang_data in bible_data.items()
+    }
+
+def index_path_for(output_path):
+    """The word index lives next to the Bible JSON: bible_data.json -> bible_data_index.json."""
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_index{ext or '.json'}"
+
+SHARD_GRANULARITIES = ("book", "chapter")
+
+def shard_slug(name):
+    """Filesystem-safe version of a book name ('1 Samuel' -> '1_Samuel')."""
+    return re.sub(r'\W+', '_', name).strip('_') or "book"
+
+def file_sha256(path):
+    """Hex SHA-256 of a file's contents, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def atomic_write_text(path, text):
+    """
+    Writes text to a temporary file in the target folder and renames it over
+    the target, so readers (and the game) never see a half-written file.
+    """
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                     prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+def write_bible_shards(bible_data, shard_dir, granularity="book", languages=None):
+    """
+    Writes the Bible data as small per-book or per-chapter files plus a manifest,
+    so the game only downloads the chapter it is about to play.
+
+    Layout:
+        <shard_dir>/manifest.json
+        <shard_dir>/<lang>/<book>.json              (granularity 'book')
+        <shard_dir>/<lang>/<book>/<chapter>.json    (granularity 'chapter')
+
+    Every shard maps chapter numbers to {"verses": {...}, "words": {...}}, where
+    "words" is that chapter's candidate word index (see build_chapter_index).
+    The manifest maps language -> book -> chapter -> shard file, in book order,
+    and records a content hash per shard so unchanged shards are not rewritten.
+
+    Args:
+        bible_data (dict): {language: {book: {chapter: {verse: text}}}} for the languages to write.
+        shard_dir (str): Output folder for the shards and manifest.
+        granularity (str): 'book' or 'chapter'.
+        languages (list): Only rewrite these languages and keep the others from the
+                          existing manifest. None rewrites the manifest from bible_data alone.
+
+    Returns:
+        int: The number of shard files actually written.
+    """
+    if granularity not in SHARD_GRANULARITIES:
+        raise ValueError(f"Unknown shard granularity '{granularity}'.")
+    manifest_path = os.path.join(shard_dir, "manifest.json")
+    previous = {"languages": {}, "files": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+    if languages is not None and previous.get("granularity") != granularity:
+        raise ValueError("Shard granularity changed; all languages must be rewritten.")
+
+    manifest = {"version": 1, "granularity": granularity, "languages": {}, "files": {}}
+    rewritten = set(bible_data) if languages is None else set(languages)
+    for lang_key, books in previous["languages"].items():
+        if lang_key not in rewritten:
+            manifest["languages"][lang_key] = books
+            for book in books.values():
+                for shard_file in book["chapters"].values():
+                    manifest["files"][shard_file] = previous["files"].get(shard_file)
+
+    written_count = 0
+    for lang_key in bible_data:
+        if lang_key not in rewritten:
+            continue
+        manifest["languages"][lang_key] = {}
+        used_slugs = set()
+        for book, book_data in bible_data[lang_key].items():
+            slug = shard_slug(book)
+            while slug in used_slugs:
+                slug += "_"
+            used_slugs.add(slug)
+
+            shards = {}
+            chapters = {}
+            for chapter, chapter_data in book_data.items():
+                if granularity == "book":
+                    shard_file = f"{lang_key}/{slug}.json"
+                else:
+                    shard_file = f"{lang_key}/{slug}/{chapter}.json"
+                shards.setdefault(shard_file, {})[chapter] = {"verses": chapter_data, "words": build_chapter_index(chapter_data)}
+                chapters[chapter] = shard_file
+            manifest["languages"][lang_key][book] = {"chapters": chapters}
+
+            for shard_file, shard in shards.items():
+                text = json.dumps(shard, ensure_ascii=False, separators=(',', ':'))
+                content_hash = hashlib.sha256(text.encode('utf-8')).hexdigest()
+                manifest["files"][shard_file] = content_hash
+                shard_path = os.path.join(shard_dir, *shard_file.split("/"))
+                if previous["files"].get(shard_file) == content_hash and os.path.exists(shard_path):
+                    continue
+                os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+                atomic_write_text(shard_path, text)
+                written_count += 1
+
+    atomic_write_text(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2))
+
+    for stale_file in set(previous["files"]) - set(manifest["files"]):
+        stale_path = os.path.join(shard_dir, *stale_file.split("/"))
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+            if not os.listdir(os.path.dirname(stale_path)):
+                os.rmdir(os.path.dirname(stale_path))  # per-chapter book folder left empty
+    return written_count
+
+class BibleStore:
+    """
+    Keeps a combined Bible JSON file up to date one language at a time.
+
+    Each language's section is cached as pre-serialized JSON in
+    '<output>_sections/' and the combined file is assembled from those texts,
+    so an update only decodes and re-encodes the language that changed.
+    '<output>.state.json' records the SHA-256 of every source file per
+    language, which lets unchanged inputs be skipped entirely. Every file is
+    written atomically (temporary file + rename).
+
+    The assembled file is byte-for-byte what json.dump(data, indent=2) gives.
+    """
+    def __init__(self, output_path, status_callback):
+        self.output_path = output_path
+        root, _ = os.path.splitext(output_path)
+        self.sections_dir = f"{root}_sections"
+        self.state_path = f"{root}.state.json"
+        self.index_path = index_path_for(output_path)
+        self.status_callback = status_callback
+        self.state = {"version": 1, "languages": [], "sources": {}}
+        if os.path.exists(self.state_path):
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                self.state = json.load(f)
+        if not all(os.path.exists(self._section_path(lang_key)) for lang_key in self.state["languages"]) \
+                or (not self.state["languages"] and os.path.exists(output_path)):
+            self._import_existing_output()
+
+    def _section_path(self, lang_key, suffix=".json"):
+        return os.path.join(self.sections_dir, shard_slug(lang_key) + suffix)
+
+    def _import_existing_output(self):
+        # First run against a file written by an older version (or a lost cache):
+        # split the existing combined file into sections once.
+        combined_data = {}
+        if os.path.exists(self.output_path):
+            self.status_callback(f"Loading existing JSON data from {self.output_path}...")
+            try:
+                with open(self.output_path, 'r', encoding='utf-8') as f:
+                    combined_data = json.load(f)
+                self.status_callback("Existing JSON data loaded.")
+            except json.JSONDecodeError:
+                self.status_callback(f"WARNING: Existing file '{os.path.basename(self.output_path)}' is not valid JSON. Overwriting.")
+            except Exception as e:
+                self.status_callback(f"WARNING: Could not read existing JSON file: {e}. Starting with new data.")
+        self.state = {"version": 1, "languages": [], "sources": {}}
+        for lang_key, lang_data in combined_data.items():
+            self.save_section(lang_key, lang_data)
+
+    def is_current(self, lang_key, source_path, source_hash):
+        """True if this exact source content was already merged into lang_key."""
+        return (self.state["sources"].get(lang_key, {}).get(os.path.abspath(source_path)) == source_hash
+                and os.path.exists(self.output_path))
+
+    def load_section(self, lang_key):
+        if lang_key not in self.state["languages"]:
+            return None
+        with open(self._section_path(lang_key), 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def save_section(self, lang_key, lang_data):
+        os.makedirs(self.sections_dir, exist_ok=True)
+        atomic_write_text(self._section_path(lang_key), json.dumps(lang_data, ensure_ascii=False, indent=2))
+        index = {book: {chapter: build_chapter_index(chapter_data) for chapter, chapter_data in book_data.items()}
+                 for book, book_data in lang_data.items()}
+        atomic_write_text(self._section_path(lang_key, ".index.json"), json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+        if lang_key not in self.state["languages"]:
+            self.state["languages"].append(lang_key)
+
+    def merge_language(self, lang_key, new_lang_data, status_callback):
+        """
+        Deep merges freshly parsed data into the cached section of lang_key:
+        new books are added, chapters of existing books are replaced.
+        Returns the merged section; call save_section to keep it.
+        """
+        existing_lang_data = self.load_section(lang_key)
+        if existing_lang_data is None:
+            status_callback(f"Adding new language '{lang_key}' to combined data.")
+            return new_lang_data
+        for book_name, book_content in new_lang_data.items():
+            if book_name in existing_lang_data:
+                existing_lang_data[book_name].update(book_content)
+            else:
+                existing_lang_data[book_name] = book_content
+        status_callback(f"Deep merging new data for existing language '{lang_key}'.")
+        return existing_lang_data
+
+    def record_source(self, lang_key, source_path, source_hash):
+        self.state["sources"].setdefault(lang_key, {})[os.path.abspath(source_path)] = source_hash
+
+    def all_sections(self):
+        return {lang_key: self.load_section(lang_key) for lang_key in self.state["languages"]}
+
+    def write(self):
+        """Assembles the combined JSON and word index from the cached sections, then saves the state."""
+        sections, indexes = [], []
+        for lang_key in self.state["languages"]:
+            key = json.dumps(lang_key, ensure_ascii=False)
+            with open(self._section_path(lang_key), 'r', encoding='utf-8') as f:
+                sections.append(f"  {key}: " + f.read().replace("\n", "\n  "))
+            with open(self._section_path(lang_key, ".index.json"), 'r', encoding='utf-8') as f:
+                indexes.append(f"{key}:" + f.read())
+        atomic_write_text(self.output_path, "{\n" + ",\n".join(sections) + "\n}" if sections else "{}")
+        atomic_write_text(self.index_path, "{" + ",".join(indexes) + "}")
+        atomic_write_text(self.state_path, json.dumps(self.state, ensure_ascii=False, indent=2))
+
+def update_bible_json(filepath, lang_key, output_path, status_callback, shard_granularity=None,
+                      progress_callback=None, cancel_event=None, versification=None,
+                      write_report=True, trace_memory=False):
+    """
+    Parses one Bible text file and merges it into the combined JSON at output_path
+    (plus its word index and, optionally, the game shards in a 'bible' folder next to it).
+
+    A source whose content hash matches the last merge for this language is
+    skipped without parsing. Otherwise only this language's section is
+    re-encoded and, for shards, only its changed shard files are rewritten.
+
+    Args:
+        filepath (str): The Bible text file to parse.
+        lang_key (str): The language key the text belongs to.
+        output_path (str): The combined JSON file to create or update.
+        status_callback (function): Receives human-readable status messages.
+        shard_granularity (str): None, 'book' or 'chapter'.
+        progress_callback (function): Passed on to parse_bible_text.
+        cancel_event (threading.Event): Passed on to parse_bible_text; also checked
+                                        once more before anything is written.
+        versification (str): None for formatted text ('Chapter N' headings, numbered
+                             verses). A table name means filepath is raw verse-per-line
+                             text, parsed in one pass by parse_raw_bible_text.
+        write_report (bool): Write the timings and parse counters of a successful update
+                             next to output_path (see build_report.py).
+        trace_memory (bool): Include the peak traced memory in the report.
+
+    Returns:
+        bool: True on success, False if parsing failed or was cancelled.
+    """
+    report = BuildReport("create_bible_json", output_path, {
+        "source": filepath, "language": lang_key, "shards": shard_granularity, "versification": versification,
+    }, trace_memory)
+    with report.phase("load"):
+        store = BibleStore(output_path, status_callback)
+    shard_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)), "bible")
+    with report.phase("hash"):
+        source_hash = source_fingerprint(filepath, versification)
+
+    if store.is_current(lang_key, filepath, source_hash):
+        status_callback(f"'{os.path.basename(filepath)}' is unchanged since '{lang_key}' was last updated. Skipping parse.")
+        report.counters["files_unchanged"] += 1
+        if shard_granularity and not _shards_match(shard_dir, shard_granularity):
+            with report.phase("shards"):
+                shard_count = write_bible_shards(store.all_sections(), shard_dir, shard_granularity)
+            status_callback(f"Wrote {shard_count} shard files and manifest.json to {shard_dir}.")
+        if write_report:
+            report.write()
+        report.close()
+        return True
+
+    parsed_data = {}
+    with report.phase("parse"):
+        parsed = parse_source(filepath, lang_key, parsed_data, status_callback, versification, progress_callback,
+                              cancel_event, report.counters)
+    if not parsed or (cancel_event is not None and cancel_event.is_set()):
+        if parsed:
+            status_callback("Cancelled before writing; existing files were left unchanged.")
+        report.close()
+        return False
+    report.counters["files_parsed"] += 1
+
+    with report.phase("merge"):
+        merged_lang_data = store.merge_language(lang_key, parsed_data.get(lang_key, {}), status_callback)
+        store.save_section(lang_key, merged_lang_data)
+        store.record_source(lang_key, filepath, source_hash)
+    status_callback(f"Writing all combined data to {output_path}...")
+    if shard_granularity:
+        with report.phase("shards"):
+            _update_shards(store, shard_dir, shard_granularity, {lang_key: merged_lang_data}, status_callback)
+    with report.phase("write"):
+        store.write()
+    status_callback(f"Word index written to {store.index_path}.")
+    if write_report:
+        status_callback(f"Build report written to {report.write()}.")
+    report.close()
+    return True
+
+def _update_shards(store, shard_dir, granularity, changed_data, status_callback):
+    # Only the changed languages are re-sharded, unless the shard layout itself changed.
+    if _shards_match(shard_dir, granularity):
+        shard_count = write_bible_shards(changed_data, shard_dir, granularity, list(changed_data))
+    else:
+        shard_count = write_bible_shards(store.all_sections(), shard_dir, granularity)
+    status_callback(f"Wrote {shard_count} changed shard files and manifest.json to {shard_dir}.")
+
+def _shards_match(shard_dir, granularity):
+    manifest_path = os.path.join(shard_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        return False
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        return json.load(f).get("granularity") == granularity
+
+def find_translation_files(source_dir, language_map=None):
+    """
+    Lists the translation text files of a directory with their language keys.
+
+    Every '*.txt' file is included. Its language key is language_map[file name]
+    (or language_map[file stem]) when given, otherwise the file stem, so
+    'english.txt' becomes 'english'. Several files may share a language key;
+    they are merged in file name order.
+
+    Returns:
+        list: (filepath, lang_key) tuples sorted by file name.
+    """
+    language_map = language_map or {}
+    files = []
+    for name in sorted(os.listdir(source_dir)):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() != ".txt" or not os.path.isfile(os.path.join(source_dir, name)):
+            continue
+        files.append((os.path.join(source_dir, name), language_map.get(name, language_map.get(stem, stem))))
+    return files
+
+def _parse_translation(filepath, lang_key, versification=None):
+    # Runs in a worker process: the log is collected and returned with the data.
+    log_lines = []
+    counters = Counter()
+    started = time.perf_counter()
+    parsed_data = {}
+    success = parse_source(filepath, lang_key, parsed_data, log_lines.append, versification, counters=counters)
+    return success, parsed_data.get(lang_key, {}), log_lines, time.perf_counter() - started, counters
+
+def build_bible_batch(source_dir, output_path, language_map=None, workers=None, shard_granularity=None,
+                      force=False, verbose=False, versification=None, write_report=True, trace_memory=False,
+                      log=print):
+    """
+    Parses every translation in source_dir in parallel worker processes,
+    merges the results once and writes the combined JSON (and its index and
+    shards) a single time at the end.
+
+    Sources already merged with the same content hash are skipped unless force is set.
+
+    Args:
+        source_dir (str): Folder of translation '*.txt' files (see find_translation_files).
+        output_path (str): The combined JSON file to create or update.
+        language_map (dict): File name or stem -> language key overrides.
+        workers (int): Worker processes (default: one per CPU).
+        shard_granularity (str): None, 'book' or 'chapter'.
+        force (bool): Re-parse sources even if unchanged.
+        verbose (bool): Print every file's full parse log, not only its summary.
+        versification (str): Parse the files as raw verse-per-line text with this table
+                             (see parse_raw_bible_text) instead of as formatted text.
+        write_report (bool): Write the timings, the summed parse counters and the per-file
+                             table next to output_path (see build_report.py).
+        trace_memory (bool): Include the peak traced memory of this process in the report.
+        log (function): Receives the summary lines.
+
+    Returns:
+        list: One dict per file with file, language, status, books, chapters, verses and seconds.
+    """
+    batch_started = time.perf_counter()
+    files = find_translation_files(source_dir, language_map)
+    if not files:
+        raise ValueError(f"No .txt translation files found in {source_dir}.")
+
+    report = BuildReport("create_bible_json", output_path, {
+        "source_dir": source_dir, "workers": workers, "shards": shard_granularity, "force": force,
+        "versification": versification,
+    }, trace_memory)
+    with report.phase("load"):
+        store = BibleStore(output_path, log)
+    with report.phase("hash"):
+        hashes = {filepath: source_fingerprint(filepath, versification) for filepath, _ in files}
+    pending = [(filepath, lang_key) for filepath, lang_key in files
+               if force or not store.is_current(lang_key, filepath, hashes[filepath])]
+
+    results = {}
+    with report.phase("parse"):
+        if pending:
+            with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(pending))) as executor:
+                futures = {(filepath, lang_key): executor.submit(_parse_translation, filepath, lang_key, versification)
+                           for filepath, lang_key in pending}
+                for key, future in futures.items():
+                    results[key] = future.result()
+    parse_seconds = time.perf_counter() - batch_started
+
+    summary = []
+    changed_data = {}
+    with report.phase("merge"):
+        for filepath, lang_key in files:
+            row = {"file": os.path.basename(filepath), "language": lang_key,
+                   "status": "unchanged", "books": 0, "chapters": 0, "verses": 0, "seconds": 0.0}
+            summary.append(row)
+            if (filepath, lang_key) not in results:
+                continue
+            success, lang_data, log_lines, row["seconds"], counters = results[(filepath, lang_key)]
+            report.counters.update(counters)
+            if verbose or not success:
+                for line in log_lines:
+                    log(f"  [{row['file']}] {line}")
+            if not success:
+                row["status"] = "failed"
+                continue
+            row["status"] = "parsed"
+            row["books"] = len(lang_data)
+            row["chapters"] = sum(len(book) for book in lang_data.values())
+            row["verses"] = sum(len(chapter) for book in lang_data.values() for chapter in book.values())
+            # Files are merged in file name order, so later files of a language win.
+            quiet = lambda message: None
+            if lang_key not in changed_data:
+                changed_data[lang_key] = store.merge_language(lang_key, lang_data, quiet)
+            else:
+                for book_name, book_content in lang_data.items():
+                    changed_data[lang_key].setdefault(book_name, {}).update(book_content)
+            store.record_source(lang_key, filepath, hashes[filepath])
+
+    write_started = time.perf_counter()
+    if changed_data:
+        with report.phase("write"):
+            for lang_key, lang_data in changed_data.items():
+                store.save_section(lang_key, lang_data)
+            store.write()
+    shard_dir = os.path.join(os.path.dirname(os.path.abspath(output_path)), "bible")
+    if shard_granularity and (changed_data or not _shards_match(shard_dir, shard_granularity)):
+        with report.phase("shards"):
+            _update_shards(store, shard_dir, shard_granularity, changed_data, log)
+    write_seconds = time.perf_counter() - write_started
+
+    width = max(len(row["file"]) for row in summary)
+    log(f"{'File':<{width}}  {'Language':<12} {'Status':<9} {'Books':>5} {'Chapters':>8} {'Verses':>7} {'Seconds':>8}")
+    for row in summary:
+        log(f"{row['file']:<{width}}  {row['language']:<12} {row['status']:<9} {row['books']:>5} "
+            f"{row['chapters']:>8} {row['verses']:>7} {row['seconds']:>8.2f}")
+    written = f"wrote {output_path} in {write_seconds:.2f}s" if changed_data else "nothing to write"
+    log(f"Parsed {len(results)} of {len(files)} files in {parse_seconds:.2f}s; "
+        f"{written}; total {time.perf_counter() - batch_started:.2f}s.")
+    report.counters.update(f"files_{row['status']}" for row in summary)
+    report.details["files"] = summary
+    if write_report:
+        log(f"Build report written to {report.write()}.")
+    report.close()
+    return summary
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the combined Bible JSON from a folder of translations. "
+                                                 "Run without arguments to open the GUI.")
+    parser.add_argument("source_dir", help="Folder of translation .txt files (the file name is the language key)")
+    parser.add_argument("output", help="Combined JSON file to create or update")
+    parser.add_argument("--lang", action="append", default=[], metavar="FILE=KEY",
+                        help="Language key for a file name or stem, e.g. kjv.txt=english (repeatable)")
+    parser.add_argument("--workers", type=int, default=0, help="Worker processes (0 = one per CPU)")
+    parser.add_argument("--shards", choices=SHARD_GRANULARITIES,
+                        help="Also write game shards to a 'bible' folder next to the output")
+    parser.add_argument("--force", action="store_true", help="Re-parse files even if unchanged since the last build")
+    parser.add_argument("--verbose", action="store_true", help="Print each file's full parse log")
+    parser.add_argument("--raw", metavar="VERSIFICATION",
+                        help="Files are raw verse-per-line text; number the verses with this table (e.g. niv)")
+    parser.add_argument("--no-report", action="store_true", help="Don't write the JSON build report next to the output")
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak memory in the build report (slower)")
+    args = parser.parse_args(argv)
+
+    language_map = {}
+    for mapping in args.lang:
+        name, sep, lang_key = mapping.partition("=")
+        if not sep or not name or not lang_key:
+            parser.error(f"--lang expects FILE=KEY, got '{mapping}'")
+        language_map[name] = lang_key
+    if args.raw:
+        try:
+            load_versification(args.raw)
+        except (OSError, ValueError, KeyError) as e:
+            parser.error(f"cannot load versification '{args.raw}': {e}")
+
+    try:
+        summary = build_bible_batch(args.source_dir, args.output, language_map, args.workers or None,
+                                    args.shards, args.force, args.verbose, args.raw,
+                                    not args.no_report, args.trace_memory)
+    except ValueError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    return 1 if any(row["status"] == "failed" for row in summary) else 0
+
+# Interval (ms) at which the GUI drains the background worker's queue
+STATUS_POLL_MS = 100
+
 class BibleParserApp:
     def __init__(self, master):
         """
@@ -175,7 +903,7 @@ class BibleParserApp:
         """
         self.master = master
         master.title("Bible Text to JSON Converter")
-        master.geometry("600x700") # Set initial window size
+        master.geometry("600x870") # Set initial window size
         master.resizable(False, False) # Prevent resizing for simplicity
 
         # Variables to store file paths and data
@@ -183,10 +911,11 @@ class BibleParserApp:
         self.output_dir = ""
         self.output_filename = "bible_data.json" # Default output filename
 
-        # The main dictionary that will hold all parsed Bible data (can accumulate multiple files)
-        # This will be populated with data for the *current* parsing operation.
-        # The merge logic handles combining it with existing file data.
-        self.current_parsed_data = {} 
+        # Background parsing: the worker thread only puts messages on this queue,
+        # the Tk thread drains it every STATUS_POLL_MS (see poll_worker_queue)
+        self.worker_queue = queue.Queue()
+        self.worker_thread = None
+        self.cancel_event = threading.Event()
 
         # --- GUI Elements ---
 
@@ -200,6 +929,15 @@ class BibleParserApp:
                                              bg="#4CAF50", fg="white", font=('Arial', 10, 'bold'), relief="raised")
         self.select_file_button.pack(pady=5)
 
+        tk.Label(master, text="Source Text Format:", font=('Arial', 10)).pack(pady=5)
+        self.source_format_options = {"Formatted ('Chapter N' headings, numbered verses)": None}
+        for name in available_versifications():
+            self.source_format_options[f"Raw verse-per-line, numbered with {name.upper()} versification"] = name
+        self.source_format_combobox = ttk.Combobox(master, values=list(self.source_format_options), width=58,
+                                                   state="readonly", font=('Arial', 10))
+        self.source_format_combobox.current(0)
+        self.source_format_combobox.pack(pady=5)
+
         # 2. Language Key Input (now a Combobox)
         tk.Label(master, text="2. Select Language Key:", font=('Arial', 10, 'bold')).pack(pady=10)
         
@@ -223,10 +961,24 @@ class BibleParserApp:
         self.output_filename_entry.insert(0, self.output_filename)
         self.output_filename_entry.pack(pady=5)
 
+        tk.Label(master, text="Game Shards (written to a 'bible' folder next to the JSON):", font=('Arial', 10)).pack(pady=5)
+        self.shard_options = {"No shards": None, "One file per book": "book", "One file per chapter": "chapter"}
+        self.shard_combobox = ttk.Combobox(master, values=list(self.shard_options), width=58, state="readonly", font=('Arial', 10))
+        self.shard_combobox.set("No shards")
+        self.shard_combobox.pack(pady=5)
+
         # 4. Process Button
         self.process_button = tk.Button(master, text="Parse and Convert to JSON", command=self.process_files,
                                         bg="#FF9800", fg="white", font=('Arial', 12, 'bold'), relief="raised", padx=10, pady=5)
-        self.process_button.pack(pady=20)
+        self.process_button.pack(pady=(20, 5))
+
+        progress_frame = tk.Frame(master)
+        progress_frame.pack(pady=5)
+        self.progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", length=420, mode="determinate", maximum=100)
+        self.progress_bar.pack(side="left", padx=5)
+        self.cancel_button = tk.Button(progress_frame, text="Cancel", command=self.cancel_processing,
+                                       state="disabled", font=('Arial', 10), relief="raised")
+        self.cancel_button.pack(side="left", padx=5)
 
         # 5. Status Display Area
         tk.Label(master, text="Status / Log:", font=('Arial', 10, 'bold')).pack(pady=5)
@@ -236,10 +988,11 @@ class BibleParserApp:
 
     def update_status(self, message):
         """
-        Updates the status text area in the GUI.
+        Updates the status text area in the GUI. Must be called on the Tk thread;
+        the worker thread reports through self.worker_queue instead.
 
         Args:
-            message (str): The message to display.
+            message (str): The message to display (may span several lines).
         """
         self.status_text.config(state='normal') # Enable editing
         self.status_text.insert(tk.END, message + "\n") # Insert message at the end
@@ -273,12 +1026,9 @@ class BibleParserApp:
     def process_files(self):
         """
         Initiates the parsing and JSON conversion process based on user selections.
-        Handles loading/updating existing JSON files.
+        Merging into the existing JSON file is done by update_bible_json.
         """
         self.update_status("--- Starting Processing ---")
-        
-        # Clear previous parsing data to ensure only current file's data is processed
-        self.current_parsed_data = {} 
 
         # Validate inputs
         if not self.filepath:
@@ -310,62 +1060,95 @@ class BibleParserApp:
             self.update_status(f"Appended .json extension to filename: {self.output_filename}")
 
         output_full_path = os.path.join(self.output_dir, self.output_filename)
+        granularity = self.shard_options[self.shard_combobox.get()]
+        versification = self.source_format_options[self.source_format_combobox.get()]
 
-        # Call the parsing function to populate self.current_parsed_data with the new language's data
-        success = parse_bible_text(self.filepath, lang_key, self.current_parsed_data, self.update_status)
-
-        if success:
-            combined_data = {}
-            # Check if the output file already exists and load its content
-            if os.path.exists(output_full_path):
-                self.update_status(f"Loading existing JSON data from {output_full_path}...")
-                try:
-                    with open(output_full_path, 'r', encoding='utf-8') as f:
-                        combined_data = json.load(f)
-                    self.update_status("Existing JSON data loaded.")
-                except json.JSONDecodeError:
-                    self.update_status(f"WARNING: Existing file '{self.output_filename}' is not valid JSON. Overwriting.")
-                    combined_data = {} # Start fresh if file is corrupt
-                except Exception as e:
-                    self.update_status(f"WARNING: Could not read existing JSON file: {e}. Starting with new data.")
-
-            # --- START OF MODIFIED MERGE LOGIC ---
-            # self.current_parsed_data will only contain data for the single lang_key just parsed.
-            newly_parsed_lang_data = self.current_parsed_data.get(lang_key, {})
-
-            if lang_key in combined_data:
-                # If the language already exists in combined_data, we need to merge its books.
-                # This is a deep merge for the books and their content.
-                existing_lang_data = combined_data[lang_key]
-                for book_name, book_content in newly_parsed_lang_data.items():
-                    if book_name in existing_lang_data:
-                        # If book exists, merge chapters (assuming chapters are unique per book)
-                        existing_lang_data[book_name].update(book_content)
-                    else:
-                        # If book is new, just add it
-                        existing_lang_data[book_name] = book_content
-                self.update_status(f"Deep merging new data for existing language '{lang_key}'.")
-            else:
-                # If the language does not exist, simply add it.
-                combined_data[lang_key] = newly_parsed_lang_data
-                self.update_status(f"Adding new language '{lang_key}' to combined data.")
-            # --- END OF MODIFIED MERGE LOGIC ---
-            
-            self.update_status(f"Writing all combined data to {output_full_path}...")
+        self.cancel_event.clear()
+        self.progress_bar['value'] = 0
+        self.process_button.config(state="disabled")
+        self.cancel_button.config(state="normal")
+        self.worker_thread = threading.Thread(target=self.run_worker, daemon=True,
+                                              args=(self.filepath, lang_key, output_full_path, granularity, versification))
+        self.worker_thread.start()
+        self.master.after(STATUS_POLL_MS, self.poll_worker_queue)
+
+    def run_worker(self, filepath, lang_key, output_full_path, granularity, versification):
+        """
+        Runs update_bible_json off the Tk thread. Never touches widgets: log lines,
+        progress and the final result are all sent through self.worker_queue.
+        """
+        def report_progress(done, total):
+            self.worker_queue.put(("progress", done / total if total else 1.0))
+
+        try:
+            success = update_bible_json(filepath, lang_key, output_full_path,
+                                        lambda message: self.worker_queue.put(("log", message)),
+                                        granularity, report_progress, self.cancel_event, versification)
+            self.worker_queue.put(("done", success, None, output_full_path))
+        except Exception as e:
+            self.worker_queue.put(("done", False, e, output_full_path))
+
+    def poll_worker_queue(self):
+        """
+        Drains everything the worker queued since the last poll. Log lines are
+        joined into a single insert and only the latest progress value is drawn,
+        so the parse never waits on Tk redraws.
+        """
+        log_lines = []
+        progress = None
+        result = None
+        while True:
             try:
-                # Write the combined dictionary to the JSON file
-                with open(output_full_path, 'w', encoding='utf-8') as f:
-                    json.dump(combined_data, f, ensure_ascii=False, indent=2)
-                self.update_status(f"SUCCESS! Your '{self.output_filename}' has been created/updated at:\n{self.output_dir}.")
-                messagebox.showinfo("Success", f"JSON file created/updated successfully at:\n{output_full_path}")
-            except Exception as e:
-                self.update_status(f"An error occurred while writing the JSON file: {e}")
-                messagebox.showerror("Error", f"An error occurred while writing the JSON file: {e}")
+                item = self.worker_queue.get_nowait()
+            except queue.Empty:
+                break
+            if item[0] == "log":
+                log_lines.append(item[1])
+            elif item[0] == "progress":
+                progress = item[1]
+            else:
+                result = item
+
+        if log_lines:
+            self.update_status("\n".join(log_lines))
+        if progress is not None:
+            self.progress_bar['value'] = progress * 100
+
+        if result is None:
+            self.master.after(STATUS_POLL_MS, self.poll_worker_queue)
+            return
+        self.finish_processing(*result[1:])
+
+    def finish_processing(self, success, error, output_full_path):
+        """Re-enables the controls and reports the worker's outcome."""
+        self.worker_thread = None
+        self.process_button.config(state="normal")
+        self.cancel_button.config(state="disabled")
+
+        if error is not None:
+            self.update_status(f"An error occurred while writing the JSON file: {error}")
+            messagebox.showerror("Error", f"An error occurred while writing the JSON file: {error}")
+        elif success:
+            self.progress_bar['value'] = 100
+            self.update_status(f"SUCCESS! Your '{self.output_filename}' has been created/updated at:\n{self.output_dir}.")
+            messagebox.showinfo("Success", f"JSON file created/updated successfully at:\n{output_full_path}")
+        elif self.cancel_event.is_set():
+            self.progress_bar['value'] = 0
+            self.update_status("--- Processing Cancelled ---")
         else:
             messagebox.showerror("Parsing Failed", "Failed to parse the text file. Check the 'Status / Log' for details.")
 
+    def cancel_processing(self):
+        """Asks the worker to stop at its next progress check."""
+        if self.worker_thread is not None:
+            self.cancel_event.set()
+            self.cancel_button.config(state="disabled")
+            self.update_status("Cancelling...")
+
 # Main entry point for the application
 if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        sys.exit(main())
     root = tk.Tk() # Create the main Tkinter window
     app = BibleParserApp(root) # Create an instance of the application
     root.mainloop() # Start the Tkinter event loop
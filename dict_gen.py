@@ -1,14 +1,22 @@
-import json
+import os
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import re
-import random
+from dict_pipeline import build_dictionary, EmptyDictionaryError, REDUCTION_MODES, DEFAULT_CACHE_DIR, DEFAULT_CACHE_MAX_MB
+
+# Leave a core for the UI and don't take over big machines unless asked to
+DEFAULT_WORKERS = max(1, min(4, (os.cpu_count() or 1) - 1))
+
+def cache_usage_mb(cache_dir=DEFAULT_CACHE_DIR):
+    """Megabytes currently held by the Phase 1 cache folder (0 if it doesn't exist)."""
+    if not os.path.isdir(cache_dir):
+        return 0.0
+    return sum(entry.stat().st_size for entry in os.scandir(cache_dir) if entry.is_file()) / (1 << 20)
 
 class DictionaryProcessor:
     def __init__(self, root):
         self.root = root
         self.root.title("Dictionary Processor Tool v2.0")
-        self.root.geometry("650x500")
+        self.root.geometry("650x580")
 
         # --- UI Elements ---
         style = ttk.Style(self.root)
@@ -30,9 +38,16 @@ class DictionaryProcessor:
         self.max_len_var = tk.IntVar(value=9)
         self.reduction_var = tk.DoubleVar(value=80.0)
         self.minify_var = tk.BooleanVar(value=True)
+        self.workers_var = tk.IntVar(value=DEFAULT_WORKERS)
+        self.reduction_mode_var = tk.StringVar(value="shuffle")
+        self.stratify_var = tk.BooleanVar(value=False)
+        self.seed_var = tk.StringVar()
+        self.cache_var = tk.BooleanVar(value=False)
+        self.cache_info_var = tk.StringVar()
+        self.update_cache_info()
 
         # --- UI Layout ---
-        ttk.Label(main_frame, text="1. Select Source Dictionary File (.json or .jsonl):").pack(anchor=tk.W)
+        ttk.Label(main_frame, text="1. Select Source Dictionary File (.json or .jsonl, may be .gz/.bz2/.xz):").pack(anchor=tk.W)
         source_frame = ttk.Frame(main_frame); source_frame.pack(fill=tk.X, pady=5)
         ttk.Entry(source_frame, textvariable=self.source_path, state="readonly").pack(side=tk.LEFT, fill=tk.X, expand=True)
         ttk.Button(source_frame, text="Browse...", command=self.browse_source).pack(side=tk.RIGHT)
@@ -55,7 +70,18 @@ class DictionaryProcessor:
         reduction_slider.grid(row=1, column=1, columnspan=3, sticky=tk.EW)
         ttk.Label(options_frame, textvariable=self.reduction_var).grid(row=1, column=4, padx=5)
 
+        ttk.Label(options_frame, text="Reduction Mode:").grid(row=4, column=0, sticky=tk.W, padx=5)
+        ttk.Combobox(options_frame, values=[mode for mode in REDUCTION_MODES if mode != "reservoir"], textvariable=self.reduction_mode_var, state="readonly", width=10).grid(row=4, column=1, columnspan=2, sticky=tk.W, padx=5)
+        ttk.Checkbutton(options_frame, text="Stratify by Length", variable=self.stratify_var).grid(row=4, column=3, columnspan=2, sticky=tk.W, padx=5)
+        ttk.Label(options_frame, text="Seed (optional):").grid(row=5, column=0, sticky=tk.W, padx=5, pady=5)
+        ttk.Entry(options_frame, textvariable=self.seed_var, width=12).grid(row=5, column=1, columnspan=2, sticky=tk.W, padx=5)
+
         ttk.Checkbutton(options_frame, text="Generate Minified (Smaller File)", variable=self.minify_var).grid(row=2, column=0, columnspan=4, sticky=tk.W, padx=5, pady=5)
+
+        ttk.Label(options_frame, text="Worker Processes (.jsonl):").grid(row=3, column=0, sticky=tk.W, padx=5)
+        ttk.Spinbox(options_frame, from_=1, to=os.cpu_count() or 1, textvariable=self.workers_var, width=5).grid(row=3, column=1, padx=5)
+        ttk.Checkbutton(options_frame, text="Reuse Cached Scans", variable=self.cache_var).grid(row=3, column=2, columnspan=3, sticky=tk.W, padx=5)
+        ttk.Label(options_frame, textvariable=self.cache_info_var, wraplength=560, foreground="gray").grid(row=6, column=0, columnspan=5, sticky=tk.W, padx=5)
         
         ttk.Label(main_frame, text="4. Select Output Location and Name:").pack(anchor=tk.W)
         output_frame = ttk.Frame(main_frame); output_frame.pack(fill=tk.X, pady=5)
@@ -65,80 +91,28 @@ class DictionaryProcessor:
         generate_button = ttk.Button(main_frame, text="Generate JSON File", command=self.process_files)
         generate_button.pack(pady=20, ipady=10)
 
-    def browse_source(self): path = filedialog.askopenfilename(title="Select Source File", filetypes=(("JSON files", "*.json*"), ("All files", "*.*"))); self.source_path.set(path) if path else None
+    def update_cache_info(self): self.cache_info_var.set(f"Cached scans are kept in {DEFAULT_CACHE_DIR} (now {cache_usage_mb():.0f} MB, at most {DEFAULT_CACHE_MAX_MB} MB).")
+    def browse_source(self): path = filedialog.askopenfilename(title="Select Source File", filetypes=(("JSON files", "*.json*"), ("Compressed JSON files", "*.gz *.bz2 *.xz"), ("All files", "*.*"))); self.source_path.set(path) if path else None
     def browse_profanity(self): path = filedialog.askopenfilename(title="Select Profanity TXT", filetypes=(("Text Files", "*.txt"),)); self.profanity_path.set(path) if path else None
     def browse_output(self): path = filedialog.asksaveasfilename(title="Save JSON As", defaultextension=".json", filetypes=(("JSON Files", "*.json"),)); self.output_path.set(path) if path else None
-    def clean_romanian_html(self, raw_html):
-        clean_text = re.sub(r'<[^>]+>', '', raw_html)
-        clean_text = re.sub(r'^[A-ZĂÂÎȘȚ,\s]+,', '', clean_text, count=1)
-        clean_text = re.split(r'-\s+Din\s+', clean_text)[0]
-        clean_text = clean_text.strip()
-        return clean_text[0].upper() + clean_text[1:] if clean_text else ""
-
     def process_files(self):
         source_file, profanity_file, output_file = self.source_path.get(), self.profanity_path.get(), self.output_path.get()
         min_len, max_len, reduction_percent = self.min_len_var.get(), self.max_len_var.get(), self.reduction_var.get()
         if not source_file or not output_file: messagebox.showerror("Error", "Source file and Output location are required."); return
+        seed_text = self.seed_var.get().strip()
+        if seed_text and not seed_text.lstrip('-').isdigit(): messagebox.showerror("Error", "Seed must be a whole number."); return
+        seed = int(seed_text) if seed_text else None
 
-        profanity_set = set()
-        if profanity_file:
-            with open(profanity_file, 'r', encoding='utf-8') as f: profanity_set = {line.strip().lower() for line in f}
-        
-        print(f"Starting to process '{source_file}'...")
-        initial_dictionary = {}
-        
         try:
-            with open(source_file, 'r', encoding='utf-8') as f:
-                if source_file.endswith('.jsonl'):
-                    print(f"Phase 1: Reading English Wiktionary (.jsonl)... Settings: Length {min_len}-{max_len}")
-                    for i, line in enumerate(f):
-                        if i % 200000 == 0 and i > 0: print(f"  ...scanned {i} lines...")
-                        try:
-                            entry = json.loads(line)
-                            if entry.get("lang_code") != "en": continue
-                            word = entry.get("word", "").upper()
-                            if not (min_len <= len(word) <= max_len and word.isalpha() and word.lower() not in profanity_set and word not in initial_dictionary): continue
-                            senses = entry.get("senses", [])
-                            if senses and senses[0].get("glosses"):
-                                definition = senses[0]["glosses"][0]
-                                definition = re.sub(r'\(.+?\)', '', definition).strip()
-                                if definition: initial_dictionary[word] = definition[0].upper() + definition[1:]
-                        except (json.JSONDecodeError, AttributeError): continue
-                else:
-                    print(f"Phase 1: Reading Romanian DEX (.json)... Settings: Length {min_len}-{max_len}")
-                    data = json.load(f)
-                    for word_raw, def_raw in data.items():
-                        word = word_raw.upper()
-                        if not (min_len <= len(word) <= max_len and all('A' <= char <= 'Z' or char in 'ĂÂÎȘȚ' for char in word) and word.lower() not in profanity_set and word not in initial_dictionary): continue
-                        definition = self.clean_romanian_html(def_raw)
-                        if definition: initial_dictionary[word] = definition
-            
-            print(f"\nPhase 1 Complete. Found {len(initial_dictionary)} total valid words matching criteria.")
-
-            # --- NEW: Check if any words were found before proceeding ---
-            if not initial_dictionary:
-                messagebox.showwarning("Processing Warning", f"Found 0 words matching your criteria (Length: {min_len}-{max_len}).\n\nPlease check your source file or relax the filtering options.\nNo output file was generated.")
-                return
-
-            print(f"Phase 2: Reducing dictionary by {reduction_percent:.0f}%...")
-            all_words = list(initial_dictionary.keys())
-            random.shuffle(all_words)
-            keep_percentage = 1.0 - (reduction_percent / 100.0)
-            num_to_keep = int(len(all_words) * keep_percentage)
-            final_words = all_words[:num_to_keep]
-            final_dictionary = {word: initial_dictionary[word] for word in final_words}
-            
-            print(f"Phase 2 Complete. Final dictionary size: {len(final_dictionary)} words.")
-
-            with open(output_file, 'w', encoding='utf-8') as f:
-                if self.minify_var.get():
-                    json.dump(final_dictionary, f, ensure_ascii=False, separators=(',', ':'))
-                else:
-                    json.dump(final_dictionary, f, ensure_ascii=False, indent=2)
-            
-            messagebox.showinfo("Success", f"Successfully generated '{output_file}' with {len(final_dictionary)} words.")
+            result = build_dictionary(source_file, output_file, profanity_file or None, min_len, max_len, reduction_percent, self.minify_var.get(), seed,
+                                      workers=self.workers_var.get(), reduction_mode=self.reduction_mode_var.get(), stratify=self.stratify_var.get(),
+                                      cache_dir=DEFAULT_CACHE_DIR if self.cache_var.get() else None)
+            messagebox.showinfo("Success", f"Successfully generated '{output_file}' with {result['written']} words.")
+        except EmptyDictionaryError:
+            messagebox.showwarning("Processing Warning", f"Found 0 words matching your criteria (Length: {min_len}-{max_len}).\n\nPlease check your source file or relax the filtering options.\nNo output file was generated.")
         except Exception as e:
             messagebox.showerror("Error", f"An error occurred: {e}")
+        self.update_cache_info()
 
 if __name__ == "__main__":
     root = tk.Tk()
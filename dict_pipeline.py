@@ -0,0 +1,2062 @@
+"""
+Headless dictionary build pipeline used by dict_gen.py.
+
+The source dictionary is streamed through four generator stages:
+
+    read  ->  filter  ->  reduce  ->  write
+
+Only the words that survive filtering are ever held in memory; the source
+file itself (the multi-GB Wiktionary dump or a DEX export) is read line by
+line. The module has no Tkinter dependency so it can run on build machines:
+
+    python dict_pipeline.py wiktionary.jsonl english_dictionary.json --exclude profanity.txt
+
+With --targets, one scan of a Wiktionary dump builds the dictionaries of
+several languages at once, each with its own alphabet, length bounds,
+exclusion list, output and report (see build_dictionaries). The letters of
+each language and the normalization of its words and definitions (e.g. the
+cedilla forms of Romanian Ș and Ț) come from language_profiles.json.
+
+Wiktionary dumps can also be scanned by a pool of worker processes
+(--workers), each one handling a line-aligned byte range of the file.
+Before any JSON decoding, a byte-level pre-filter drops the lines that
+cannot possibly produce a word (wrong language, or no acceptable "word").
+
+The reduce stage either shuffles the whole filtered list (the original
+behaviour) or samples while Phase 1 is still scanning ('bernoulli' and
+'reservoir'), so only the kept definitions are ever stored. What is held
+(the shuffled entries, the words already seen for first-wins deduplication)
+lives in CompactEntries: UTF-8 buffers with offset arrays rather than one
+Python string per word and definition (see compact_store.py).
+
+A Wiktionary scan is checkpointed next to the output (see ScanCheckpoint),
+so a build that crashes or is interrupted picks up, when rerun with the same
+source and settings, from the last checkpoint instead of the first line.
+
+With a cache directory (--cache-dir), Phase 1 results are kept in a
+content-addressed cache (see Phase1Cache), so rebuilding with other length,
+exclusion or reduction settings reads the cached words instead of rescanning.
+
+Sources may be gzip, bz2 or xz compressed; compression and format (JSONL dump
+or DEX object) are recognised from the content, and the dump is decompressed
+as it streams (see open_source). The report gives every stage's throughput,
+so a slow 'read' (decompression) can be told from a slow 'scan' (parsing).
+
+The write stage produces either one {word: definition} JSON file, or with
+--format shards, one file per word length plus a manifest.json that lets the
+game fetch only the lengths that fit the current grid, or with --format packed
+a compact file of two text blocks addressed by offset tables (see PackedWriter).
+
+Every build also writes a JSON report next to its output with the time spent
+in each stage and counters such as lines read, JSON errors and rejections by
+reason (see build_report.py).
+"""
+import argparse
+import bz2
+import gzip
+import hashlib
+import io
+import json
+import lzma
+import os
+import random
+import re
+import sys
+import tracemalloc
+from array import array
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack
+from functools import partial
+
+from aho_corasick import AhoCorasick
+from build_report import BuildReport
+from compact_store import CompactEntries
+from language_profiles import LANGUAGE_PROFILES
+
+DEFAULT_MIN_LEN = 4
+DEFAULT_MAX_LEN = 9
+DEFAULT_REDUCTION = 80.0
+READ_BUFFER_SIZE = 1 << 20
+PROGRESS_EVERY = 200000
+PARALLEL_CHUNK_SIZE = 32 << 20
+REDUCTION_MODES = ('shuffle', 'bernoulli', 'reservoir')
+OUTPUT_FORMATS = ('json', 'shards', 'packed')
+PACKED_FORMAT = 'wordsearch-packed'
+# The game's folder of sharded and packed dictionaries (DICTIONARY_DIR in script.js)
+GAME_DICTIONARY_DIR = 'dictionary'
+PHASE1_CACHE_FORMAT = 'wordsearch-phase1'
+PHASE1_CACHE_VERSION = 1
+# Cached scans keep every word up to this length, so any grid-sized range can reuse them
+PHASE1_CACHE_MAX_LEN = 32
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'word_search', 'phase1')
+DEFAULT_CACHE_MAX_MB = 2048
+CACHE_COMPRESS_LEVEL = 1
+CHECKPOINT_VERSION = 1
+# A serial scan checkpoints every CHECKPOINT_EVERY source bytes, a parallel one after every chunk
+CHECKPOINT_EVERY = 64 << 20
+# Compressed sources are recognised by their leading bytes, whatever their name
+COMPRESSION_MAGIC = ((b'\x1f\x8b', 'gzip'), (b'BZh', 'bz2'), (b'\xfd7zXZ\x00', 'xz'))
+COMPRESSION_OPENERS = {'gzip': gzip.open, 'bz2': bz2.open, 'xz': lzma.open}
+SNIFF_SIZE = 1 << 20
+
+# Raw-byte patterns used by the Wiktionary pre-filter. Nested objects
+# (translations, forms, ...) carry their own "word" and "lang_code" keys,
+# so these only ever prove that a line can be rejected, never that it is kept.
+EN_LANG_CODE_PATTERN = re.compile(rb'"lang_code"\s*:\s*"en"')
+LANG_CODE_FIELD_PATTERN = re.compile(rb'"lang_code"\s*:\s*"')
+WORD_FIELD_PATTERN = re.compile(rb'"word"\s*:\s*"((?:[^"\\]|\\.)*)"')
+
+
+class EmptyDictionaryError(ValueError):
+    """Raised when no source entry survives the filtering stage."""
+
+
+class ExclusionRules:
+    """
+    A profanity/exclusion list compiled into one Aho–Corasick automaton.
+
+    Rules are lowercase and come in five kinds:
+
+        word        exact     the word itself
+        word*       prefix    words starting with 'word'
+        *word       suffix    words ending with 'word'
+        *word*      substring words containing 'word'
+        w?rd, w*rd  wildcard  '?' is one letter, '*' any run of letters
+
+    Every rule contributes its longest literal part to the automaton, so a
+    word is checked in a single pass over its letters however long the list
+    is; only wildcard rules whose literal part was found are then confirmed
+    with a regular expression. Wildcard rules without any letters ('???',
+    '*?*') are tried on every word. A rule of stars alone would exclude every
+    word and empty the dictionary, so it is left out and listed in
+    self.skipped instead.
+
+    normalize, if given, is applied to every rule before it is lowercased, so
+    rules are spelled the way the words they are matched against are.
+    """
+    def __init__(self, rules=(), normalize=None):
+        self.rules, self.skipped = [], []
+        seen, literals, self._rules_by_literal, self._unanchored = set(), {}, [], []
+        for rule in rules:
+            rule = rule.strip()
+            rule = (normalize(rule) if normalize else rule).lower()
+            if not rule or rule in seen:
+                continue
+            seen.add(rule)
+            core = rule.strip('*')
+            if not core:
+                self.skipped.append(rule)
+                continue
+            order = len(self.rules)
+            self.rules.append(rule)
+            if not re.search(r'[*?]', core):
+                kind = ('substring' if rule.startswith('*') and rule.endswith('*') else 'suffix' if rule.startswith('*')
+                        else 'prefix' if rule.endswith('*') else 'exact')
+                literal, pattern = core, None
+            else:
+                kind = 'wildcard'
+                literal = max(re.split(r'[*?]', rule), key=len)
+                pattern = re.compile(''.join('.*' if ch == '*' else '.' if ch == '?' else re.escape(ch) for ch in rule),
+                                     re.DOTALL)
+            compiled = (order, rule, kind, pattern)
+            if not literal:
+                self._unanchored.append(compiled)
+                continue
+            if literal not in literals:
+                literals[literal] = len(literals)
+                self._rules_by_literal.append([])
+            self._rules_by_literal[literals[literal]].append(compiled)
+        self._matcher = AhoCorasick(literals) if literals else None
+
+    def __len__(self):
+        return len(self.rules)
+
+    def match(self, word):
+        """Returns the first rule (in file order) that excludes a lowercase word, or None."""
+        found = None
+        if self._matcher is not None:
+            for end, index in self._matcher.iter_matches(word):
+                start = end + 1 - len(self._matcher.patterns[index])
+                for compiled in self._rules_by_literal[index]:
+                    order, _, kind, pattern = compiled
+                    if found is not None and order >= found[0]:
+                        continue
+                    if (kind == 'substring'
+                            or (kind == 'exact' and start == 0 and end == len(word) - 1)
+                            or (kind == 'prefix' and start == 0)
+                            or (kind == 'suffix' and end == len(word) - 1)
+                            or (kind == 'wildcard' and pattern.fullmatch(word))):
+                        found = compiled
+        for compiled in self._unanchored:
+            if (found is None or compiled[0] < found[0]) and compiled[3].fullmatch(word):
+                found = compiled
+        return found[1] if found else None
+
+
+class WordFilter:
+    """
+    Word-level acceptance rules shared by every source format.
+
+    Args:
+        min_len (int): Shortest accepted word.
+        max_len (int): Longest accepted word.
+        profile (LanguageProfile): The language's letters and normalization
+                                   (see language_profiles.py).
+        excluded (ExclusionRules): Rules for words that must never be emitted; any other
+                                   iterable is read as a list of rules.
+
+    Source words go through normalize() before rejection() or accepts(); the
+    rules go through the profile's normalize_text(), so a rule written with
+    cedillas still matches the comma-below letters the words are stored with.
+    """
+    def __init__(self, min_len, max_len, profile, excluded=()):
+        self.min_len = min_len
+        self.max_len = max_len
+        self.profile = profile
+        self.normalize = profile.normalize_word
+        self.alphabet_check = profile.matches
+        if not isinstance(excluded, ExclusionRules) or \
+                any(profile.normalize_text(rule).lower() != rule for rule in excluded.rules):
+            excluded = ExclusionRules(getattr(excluded, 'rules', excluded), profile.normalize_text)
+        self.excluded = excluded
+        self.removed = {}
+
+    def rejection(self, word):
+        """
+        Returns why a word is rejected ('length', 'alphabet' or 'excluded'), or None
+        if it is accepted. The rule behind every exclusion is kept in self.removed.
+        """
+        if not self.min_len <= len(word) <= self.max_len:
+            return 'length'
+        if not self.alphabet_check(word):
+            return 'alphabet'
+        if self.excluded:
+            rule = self.excluded.match(word.lower())
+            if rule is not None:
+                self.removed.setdefault(word, rule)
+                return 'excluded'
+        return None
+
+    def accepts(self, word):
+        """Like rejection() is None, without recording anything."""
+        return self.may_accept(word) and not (self.excluded and self.excluded.match(word.lower()) is not None)
+
+    def may_accept(self, word):
+        """The length and alphabet checks only; excluded words pass, so rejection() can record their rule."""
+        return self.min_len <= len(word) <= self.max_len and self.alphabet_check(word)
+
+
+def load_exclusions(path, log=print):
+    """
+    Reads a profanity/exclusion file with one rule per line (see ExclusionRules);
+    blank lines and lines starting with '#' are ignored. Rules of stars alone
+    are skipped with a warning.
+    """
+    if not path:
+        return ExclusionRules()
+    with open(path, 'r', encoding='utf-8') as f:
+        rules = ExclusionRules(line for line in f if not line.lstrip().startswith('#'))
+    for rule in rules.skipped:
+        log(f"WARNING: Ignoring the exclusion rule '{rule}' in '{path}': it would exclude every word.")
+    return rules
+
+
+def clean_gloss(gloss):
+    """Removes parenthesised notes from a Wiktionary gloss and capitalises it."""
+    definition = re.sub(r'\(.+?\)', '', gloss).strip()
+    return definition[0].upper() + definition[1:] if definition else ""
+
+
+def clean_romanian_html(raw_html):
+    """Strips the markup, headword and source attribution from a DEX definition."""
+    clean_text = re.sub(r'<[^>]+>', '', raw_html)
+    clean_text = re.sub(r'^[A-ZĂÂÎȘȚ,\s]+,', '', clean_text, count=1)
+    clean_text = re.split(r'-\s+Din\s+', clean_text)[0]
+    clean_text = clean_text.strip()
+    return clean_text[0].upper() + clean_text[1:] if clean_text else ""
+
+
+# --- Read stage ---
+
+def source_compression(path):
+    """'gzip', 'bz2' or 'xz' if the file's leading bytes say it is compressed, else None."""
+    with open(path, 'rb') as f:
+        head = f.read(8)
+    for magic, compression in COMPRESSION_MAGIC:
+        if head.startswith(magic):
+            return compression
+    return None
+
+
+class _TimedStream(io.RawIOBase):
+    # A raw stream whose reads go through a BuildReport.timed_calls() wrapper
+    def __init__(self, stream, wrap):
+        super().__init__()
+        self._stream = stream
+        self.readinto = wrap(stream.readinto)
+
+    def readable(self):
+        return True
+
+    def tell(self):
+        return self._stream.tell()
+
+    def close(self):
+        if not self.closed:
+            self._stream.close()
+        super().close()
+
+
+def open_source(path, read_timer=None, start=0):
+    """
+    Opens a source file as a binary stream with a READ_BUFFER_SIZE buffer,
+    decompressing gzip, bz2 and xz files on the fly (see source_compression).
+
+    Args:
+        read_timer (function): Optional BuildReport.timed_calls() wrapper; every block
+                               read (and decompressed) from the file is timed with it.
+        start (int): Offset in the decompressed content to start reading at.
+    """
+    compression = source_compression(path)
+    if compression is None:
+        stream = open(path, 'rb', buffering=0)
+    else:
+        stream = COMPRESSION_OPENERS[compression](path, 'rb')
+    if start:
+        stream.seek(start)
+    if read_timer:
+        stream = _TimedStream(stream, read_timer)
+    return io.BufferedReader(stream, READ_BUFFER_SIZE)
+
+
+def detect_source_format(path):
+    """
+    Tells a Wiktionary JSONL dump ('wiktionary') from a DEX export ('dex')
+    by their first line, after decompression: a dump starts with an entry
+    object that has a "lang_code", a DEX export is one object mapping words
+    to definitions.
+    """
+    with open_source(path) as f:
+        head = f.readline(SNIFF_SIZE)
+        while head and not head.strip():
+            head = f.readline(SNIFF_SIZE)
+    try:
+        first = json.loads(head)
+    except ValueError:
+        # Longer than SNIFF_SIZE, or the opening line of an indented object
+        return 'wiktionary' if LANG_CODE_FIELD_PATTERN.search(head) else 'dex'
+    return 'wiktionary' if isinstance(first, dict) and isinstance(first.get('lang_code'), str) else 'dex'
+
+
+def read_lines(path, log=print, counters=None, read_timer=None, start=0):
+    """
+    Yields the raw byte lines of a JSONL source (compressed or not), reporting
+    progress as it goes. counters, if given, receives 'source_bytes' (the
+    file's size) and 'bytes_read' (the decompressed bytes read) once it is
+    read; read_timer and start (a line-aligned offset) are passed to open_source().
+    """
+    with open_source(path, read_timer, start) as f:
+        for i, line in enumerate(f):
+            if i % PROGRESS_EVERY == 0 and i > 0:
+                log(f"  ...scanned {i} lines...")
+            yield line
+        if counters is not None:
+            counters['source_bytes'] += os.path.getsize(path)
+            counters['bytes_read'] += f.tell() - start
+
+
+def line_aligned_chunks(path, chunk_size=PARALLEL_CHUNK_SIZE, start=0):
+    """
+    Splits a file, from the line-aligned offset start on, into (start, end)
+    byte ranges that never cut a line in two.
+
+    Every range except the first starts right after a newline, and together
+    they cover the rest of the file in order.
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while start < size:
+            end = start + chunk_size
+            if end >= size:
+                end = size
+            else:
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            yield start, end
+            start = end
+
+
+def iter_json_object(f, chunk_size=READ_BUFFER_SIZE):
+    """
+    Incrementally parses a top-level JSON object from a text stream.
+
+    Only a read buffer and the current member are held in memory, whatever
+    the size of the file. Keys and values are decoded with the stdlib
+    decoder, so escaping rules are the same as for json.load. Unlike
+    json.load, a repeated key is yielded each time it appears.
+
+    Yields:
+        tuple: (key, value) for every member, in file order.
+
+    Raises:
+        json.JSONDecodeError: If the stream is not a single JSON object (trailing
+                              data after it included).
+    """
+    decoder = json.JSONDecoder()
+    buf, pos, eof = '', 0, False
+
+    def fill():
+        nonlocal buf, pos, eof
+        chunk = f.read(chunk_size)
+        if not chunk:
+            eof = True
+        buf, pos = buf[pos:] + chunk, 0
+
+    def next_char():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in ' \t\n\r':
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos] if pos < len(buf) else ''
+            fill()
+
+    def decode_next():
+        nonlocal pos
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # A number cut at the buffer edge ("1" of "1.5") decodes cleanly,
+                # so only trust a value once the character after it is visible
+                if eof or (end < len(buf) and buf[end] in ' \t\n\r,:}'):
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+
+    def expect(char):
+        nonlocal pos
+        if next_char() != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", buf, pos)
+        pos += 1
+
+    def expect_end():
+        # Only whitespace may follow the closing brace, as for json.load
+        expect('}')
+        if next_char():
+            raise json.JSONDecodeError("Extra data", buf, pos)
+
+    expect('{')
+    if next_char() == '}':
+        expect_end()
+        return
+    while True:
+        if next_char() != '"':
+            raise json.JSONDecodeError("Expecting property name enclosed in double quotes", buf, pos)
+        key = decode_next()
+        expect(':')
+        next_char()
+        yield key, decode_next()
+        if next_char() == '}':
+            expect_end()
+            return
+        expect(',')
+
+
+def read_dex(path, counters=None, read_timer=None):
+    """
+    Streams (word, raw_html) pairs from a Romanian DEX JSON object; arguments as for read_lines().
+
+    The pairs are those json.load would give: a key that appears more than
+    once is yielded once, at its first position, with its last value. To
+    know which keys repeat without loading the definitions, the file is read
+    twice; the first pass keeps every key (without its value) and the last
+    value of the repeated ones.
+    """
+    seen, repeated = CompactEntries(definitions=False), {}
+    for word, raw_html in _read_dex_members(path, counters, read_timer):
+        if not seen.add(word):
+            repeated[word] = raw_html
+    del seen
+    yielded = set()
+    for word, raw_html in _read_dex_members(path, counters, read_timer):
+        if word in repeated:
+            if word in yielded:
+                continue
+            yielded.add(word)
+            raw_html = repeated[word]
+        yield word, raw_html
+    if counters is not None:
+        counters['source_bytes'] += os.path.getsize(path)
+
+
+def _read_dex_members(path, counters, read_timer):
+    """One pass of iter_json_object() over a DEX file, counting its decompressed bytes as 'bytes_read'."""
+    with open_source(path, read_timer) as f:
+        text = io.TextIOWrapper(f, encoding='utf-8')
+        yield from iter_json_object(text)
+        if counters is not None:
+            counters['bytes_read'] += f.tell()
+
+
+# --- Filter stage ---
+
+def parse_wiktionary_entry(line, filters, counters=None, language_counters=None):
+    """
+    Decodes one Wiktionary JSONL line and applies the word filter of its language.
+
+    Args:
+        line (bytes): One JSONL line.
+        filters (dict): lang_code -> WordFilter for every wanted language.
+        counters (Counter): Optional; receives 'json_errors' and 'rejected_language'.
+        language_counters (dict): Optional lang_code -> Counter receiving one 'rejected_<reason>'
+                                  count per rejected entry of that language ('length', 'alphabet',
+                                  'excluded' or 'empty_gloss'); by default they go to counters.
+
+    Returns:
+        tuple: (lang_code, word, definition), or None if the line is rejected.
+    """
+    if counters is None:
+        counters = Counter()
+    try:
+        entry = json.loads(line)
+        lang_code = entry.get("lang_code")
+        word_filter = filters.get(lang_code) if isinstance(lang_code, str) else None
+        if word_filter is None:
+            counters['rejected_language'] += 1
+            return None
+        target = language_counters[lang_code] if language_counters is not None else counters
+        word = word_filter.normalize(entry.get("word", ""))
+        reason = word_filter.rejection(word)
+        if reason:
+            target['rejected_' + reason] += 1
+            return None
+        senses = entry.get("senses", [])
+        if senses and senses[0].get("glosses"):
+            definition = clean_gloss(word_filter.profile.normalize_text(senses[0]["glosses"][0]))
+            if definition:
+                return lang_code, word, definition
+        target['rejected_empty_gloss'] += 1
+    except (json.JSONDecodeError, AttributeError):
+        counters['json_errors'] += 1
+    return None
+
+
+def parse_wiktionary_line(line, word_filter, counters=None):
+    """
+    Decodes one English Wiktionary JSONL line and applies the word filter.
+
+    Args:
+        counters (Counter): Optional; receives 'json_errors' and one 'rejected_<reason>'
+                            count per rejected line ('language', 'length', 'alphabet',
+                            'excluded' or 'empty_gloss').
+
+    Returns:
+        tuple: (word, definition), or None if the line is rejected.
+    """
+    result = parse_wiktionary_entry(line, {'en': word_filter}, counters)
+    return result[1:] if result else None
+
+
+def lang_code_pattern(lang_codes):
+    """Raw-byte pattern of a '"lang_code": "<code>"' pair for any of lang_codes."""
+    codes = b'|'.join(re.escape(code.encode('utf-8')) for code in sorted(lang_codes))
+    return re.compile(rb'"lang_code"\s*:\s*"(?:' + codes + rb')"')
+
+
+def prefilter_rejects(line, word_filters, lang_pattern=EN_LANG_CODE_PATTERN):
+    """
+    Decides from the raw bytes whether a Wiktionary line can be dropped
+    without decoding it, and why: 'language' or 'word' (None keeps the line).
+
+    A line is rejected only if lang_pattern (by default '"lang_code": "en"')
+    matches nowhere in it, or if none of its "word" values passes the length
+    and alphabet checks of any of word_filters (a WordFilter or a list of
+    them). Exclusions are left to the full parse, which records the rule
+    behind each one. The top-level fields are always among the candidates,
+    so a rejected line would also have been rejected by
+    parse_wiktionary_entry(). Lines with \\u escapes (which could hide a key)
+    are always passed through.
+    """
+    if isinstance(word_filters, WordFilter):
+        word_filters = (word_filters,)
+    if b'\\u' in line:
+        return None
+    if not lang_pattern.search(line):
+        return 'language'
+    for match in WORD_FIELD_PATTERN.finditer(line):
+        raw_word = match.group(1)
+        try:
+            word = json.loads(b'"' + raw_word + b'"') if b'\\' in raw_word else raw_word.decode('utf-8')
+        except ValueError:
+            return None
+        if any(word_filter.may_accept(word_filter.normalize(word)) for word_filter in word_filters):
+            return None
+    return 'word'
+
+
+def filter_wiktionary_languages(lines, filters, prefilter=True, counters=None, language_counters=None):
+    """
+    Yields (lang_code, word, definition) for every Wiktionary line that passes
+    the filter of its language.
+
+    Args:
+        lines (iterable): Raw byte lines.
+        filters (dict): lang_code -> WordFilter for every wanted language.
+        prefilter (bool): Reject lines from their raw bytes before json.loads.
+        counters (Counter): Optional; receives 'lines', 'prefiltered' (also split by
+                            reason) and the shared counts of parse_wiktionary_entry().
+        language_counters (dict): Optional; see parse_wiktionary_entry().
+    """
+    if counters is None:
+        counters = Counter()
+    lang_pattern = lang_code_pattern(filters)
+    word_filters = list(filters.values())
+    for line in lines:
+        counters['lines'] += 1
+        if prefilter:
+            reason = prefilter_rejects(line, word_filters, lang_pattern)
+            if reason:
+                counters['prefiltered'] += 1
+                counters['prefiltered_' + reason] += 1
+                continue
+        result = parse_wiktionary_entry(line, filters, counters, language_counters)
+        if result:
+            yield result
+
+
+def filter_wiktionary(lines, word_filter, prefilter=True, counters=None):
+    """
+    Yields (word, definition) for every English Wiktionary line that passes the filter.
+
+    Args:
+        lines (iterable): Raw byte lines.
+        word_filter (WordFilter): Word-level acceptance rules.
+        prefilter (bool): Reject lines from their raw bytes before json.loads.
+        counters (Counter): Optional; receives 'lines', 'prefiltered' (also split by
+                            reason) and the counts of parse_wiktionary_line().
+    """
+    for _, word, definition in filter_wiktionary_languages(lines, {'en': word_filter}, prefilter, counters):
+        yield word, definition
+
+
+def scan_wiktionary_chunk(path, filters, prefilter, byte_range):
+    """
+    Worker task: filters one byte range of a Wiktionary dump for every language of filters.
+
+    Returns:
+        tuple: (Counter of the shared scan statistics,
+                {lang_code: Counter of that language's rejections and duplicates},
+                {lang_code: CompactEntries of (word, definition) in file order, first occurrences only},
+                {lang_code: {excluded word: the rule that removed it}}).
+    """
+    start, end = byte_range
+    with open(path, 'rb') as f:
+        f.seek(start)
+        data = f.read(end - start)
+    lines = data.split(b'\n')
+    if lines and not lines[-1]:
+        lines.pop()
+    counters = Counter(bytes_read=end - start)
+    language_counters = {lang_code: Counter() for lang_code in filters}
+    entries = {lang_code: CompactEntries(indexed=False) for lang_code in filters}
+    scanned = filter_wiktionary_languages(lines, filters, prefilter, counters, language_counters)
+    for lang_code, word, definition in first_occurrence_by_language(scanned, language_counters):
+        entries[lang_code].add(word, definition)
+    removed = {lang_code: word_filter.removed for lang_code, word_filter in filters.items()}
+    return counters, language_counters, entries, removed
+
+
+def scan_languages_parallel(path, filters, workers, prefilter=True, counters=None, language_counters=None,
+                            chunk_size=PARALLEL_CHUNK_SIZE, log=print, start=0, on_chunk=None):
+    """
+    Runs the Wiktionary filter stage for every language of filters across a
+    process pool, yielding (lang_code, word, definition).
+
+    Chunk results are consumed in file order, so each language's entries
+    come out in the same order as in the serial scan and first occurrences
+    are preserved. The workers split the file by byte offsets, so it must
+    not be compressed. Exclusions recorded by the workers are merged into the
+    WordFilters' removed maps.
+
+    The scan starts at the line-aligned offset start. on_chunk(offset), if
+    given, is called once all the entries before offset have been consumed,
+    i.e. after each chunk but the last.
+    """
+    if counters is None:
+        counters = Counter()
+    chunks = list(line_aligned_chunks(path, chunk_size, start))
+    log(f"  ...scanning {len(chunks)} chunks with {workers} worker processes...")
+    task = partial(scan_wiktionary_chunk, path, filters, prefilter)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for i, (chunk_counters, chunk_language_counters, entries, removed) in enumerate(executor.map(task, chunks), 1):
+            if on_chunk and i > 1:
+                on_chunk(chunks[i - 1][0])
+            counters.update(chunk_counters)
+            for lang_code, word_filter in filters.items():
+                target = language_counters[lang_code] if language_counters is not None else counters
+                target.update(chunk_language_counters[lang_code])
+                for word, rule in removed[lang_code].items():
+                    word_filter.removed.setdefault(word, rule)
+            log(f"  ...scanned {counters['lines']} lines (chunk {i}/{len(chunks)})...")
+            for lang_code, language_entries in entries.items():
+                for word, definition in language_entries:
+                    yield lang_code, word, definition
+    counters['source_bytes'] += os.path.getsize(path)
+
+
+def scan_wiktionary_parallel(path, word_filter, workers, prefilter=True, counters=None,
+                             chunk_size=PARALLEL_CHUNK_SIZE, log=print, start=0, on_chunk=None):
+    """
+    Runs the English Wiktionary filter stage across a process pool.
+
+    Passing the result through first_occurrence() gives exactly the same
+    words and definitions as the serial scan.
+    """
+    for _, word, definition in scan_languages_parallel(path, {'en': word_filter}, workers, prefilter, counters,
+                                                       chunk_size=chunk_size, log=log, start=start,
+                                                       on_chunk=on_chunk):
+        yield word, definition
+
+
+def filter_dex(items, word_filter, counters=None):
+    """Yields (word, definition) for every DEX entry that passes the filter, counting 'entries' and rejections."""
+    if counters is None:
+        counters = Counter()
+    for word_raw, def_raw in items:
+        counters['entries'] += 1
+        word = word_filter.normalize(word_raw)
+        reason = word_filter.rejection(word)
+        if reason:
+            counters['rejected_' + reason] += 1
+            continue
+        definition = clean_romanian_html(word_filter.profile.normalize_text(def_raw))
+        if definition:
+            yield word, definition
+        else:
+            counters['rejected_empty_gloss'] += 1
+
+
+def first_occurrence(entries, counters=None, seen=None):
+    """
+    Drops every repeat of a word so that its first valid entry wins (counted as 'duplicates').
+    seen (a word-only CompactEntries) holds the words already emitted, e.g. by
+    an earlier part of the same scan.
+    """
+    if counters is None:
+        counters = Counter()
+    if seen is None:
+        seen = CompactEntries(definitions=False)
+    for word, definition in entries:
+        if seen.add(word):
+            yield word, definition
+        else:
+            counters['duplicates'] += 1
+
+
+def first_occurrence_by_language(entries, language_counters):
+    """first_occurrence() for (lang_code, word, definition) triples, with one store of seen words per language."""
+    seen = {}
+    for lang_code, word, definition in entries:
+        language_seen = seen.get(lang_code)
+        if language_seen is None:
+            language_seen = seen[lang_code] = CompactEntries(definitions=False)
+        if language_seen.add(word):
+            yield lang_code, word, definition
+        else:
+            language_counters[lang_code]['duplicates'] += 1
+
+
+def refilter_entries(entries, word_filter, counters=None):
+    """Applies a stricter word filter to already filtered (word, definition) pairs, counting rejections by reason."""
+    if counters is None:
+        counters = Counter()
+    for word, definition in entries:
+        reason = word_filter.rejection(word)
+        if reason:
+            counters['rejected_' + reason] += 1
+        else:
+            yield word, definition
+
+
+# --- Phase 1 cache ---
+
+_CACHE_ESCAPES = {'t': '\t', 'n': '\n', 'r': '\r'}
+CACHE_ESCAPE_PATTERN = re.compile(r'\\(.)')
+
+
+def _escape_cache_field(text):
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+        return text.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
+    return text
+
+
+def _unescape_cache_field(text):
+    if '\\' not in text:
+        return text
+    return CACHE_ESCAPE_PATTERN.sub(lambda match: _CACHE_ESCAPES.get(match.group(1), match.group(1)), text)
+
+
+class Phase1Cache:
+    """
+    Content-addressed store of Phase 1 results, so a build with other length,
+    exclusion or reduction settings can skip scanning the source:
+
+        <cache_dir>/<key>.tsv.gz
+        <cache_dir>/index.json
+
+    An entry's key is derived from the source file's SHA-256 and the settings
+    of the permissive scan that filled it (source kind and length cap). It
+    holds every word that passed that scan with its definition, in source
+    order, so filtering it again with the real settings gives exactly the
+    words a direct scan would have produced. Entries are gzip files of a JSON
+    header line followed by one 'WORD<TAB>definition' line per word.
+
+    The index records every entry's size, plus the hashes of the sources
+    keyed on their size and mtime so an unchanged dump is hashed only once.
+    An entry's last use is its file's mtime, which read() touches, so a cache
+    hit never rewrites the index. When the entries outgrow max_bytes, the
+    least recently used ones are removed.
+    """
+    def __init__(self, cache_dir, max_bytes=DEFAULT_CACHE_MAX_MB << 20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.index = {'version': PHASE1_CACHE_VERSION, 'entries': {}, 'hashes': {}}
+        os.makedirs(cache_dir, exist_ok=True)
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, 'r', encoding='utf-8') as f:
+                    index = json.load(f)
+                if index.get('version') == PHASE1_CACHE_VERSION:
+                    self.index = index
+            except ValueError:
+                pass  # A damaged index only costs a rescan
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.tsv.gz")
+
+    def _save_index(self):
+        with open(self.index_path + '.part', 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=2)
+        os.replace(self.index_path + '.part', self.index_path)
+
+    def source_hash(self, path):
+        """SHA-256 of a source file, reused while its size and mtime are unchanged."""
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        known = self.index['hashes'].get(path)
+        if known and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for block in iter(partial(f.read, READ_BUFFER_SIZE), b''):
+                digest.update(block)
+        self.index['hashes'][path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        self._save_index()
+        return digest.hexdigest()
+
+    def key_for(self, source_path, settings):
+        """The cache key of a source scanned with the given (JSON-serialisable) filter settings."""
+        identity = json.dumps({'version': PHASE1_CACHE_VERSION, 'sha256': self.source_hash(source_path),
+                               'settings': settings}, sort_keys=True)
+        return hashlib.sha256(identity.encode('utf-8')).hexdigest()[:32]
+
+    def __contains__(self, key):
+        return key in self.index['entries'] and os.path.exists(self._entry_path(key))
+
+    def read(self, key):
+        """Yields the cached (word, definition) pairs of key in source order."""
+        os.utime(self._entry_path(key))
+        with gzip.open(self._entry_path(key), 'rt', encoding='utf-8', newline='\n') as f:
+            header = json.loads(f.readline())
+            if header.get('format') != PHASE1_CACHE_FORMAT:
+                raise ValueError(f"'{self._entry_path(key)}' is not a Phase 1 cache entry.")
+            for line in f:
+                word, _, definition = line[:-1].partition('\t')
+                yield word, _unescape_cache_field(definition)
+
+    def record(self, key, entries, source_path):
+        """
+        Passes (word, definition) pairs through while writing them to the cache.
+        The entry is only stored, and older entries evicted, once entries is
+        exhausted; an interrupted scan leaves the cache unchanged.
+        """
+        path = self._entry_path(key)
+        count = 0
+        try:
+            with gzip.open(path + '.part', 'wt', encoding='utf-8', newline='\n',
+                           compresslevel=CACHE_COMPRESS_LEVEL) as f:
+                f.write(json.dumps({'format': PHASE1_CACHE_FORMAT, 'version': PHASE1_CACHE_VERSION,
+                                    'source': os.path.basename(source_path)}) + '\n')
+                for word, definition in entries:
+                    f.write(f"{word}\t{_escape_cache_field(definition)}\n")
+                    count += 1
+                    yield word, definition
+        except BaseException:
+            os.remove(path + '.part')
+            raise
+        os.replace(path + '.part', path)
+        self.index['entries'][key] = {'source': os.path.abspath(source_path), 'count': count,
+                                      'bytes': os.path.getsize(path)}
+        self.evict()
+
+    def evict(self):
+        """Removes the least recently used entries until the cache fits in max_bytes; returns how many went."""
+        entries = self.index['entries']
+        for key in [key for key in entries if not os.path.exists(self._entry_path(key))]:
+            del entries[key]
+        total = sum(entry['bytes'] for entry in entries.values())
+        evicted = 0
+        for key in sorted(entries, key=lambda k: os.stat(self._entry_path(k)).st_mtime_ns):
+            if total <= self.max_bytes:
+                break
+            total -= entries.pop(key)['bytes']
+            os.remove(self._entry_path(key))
+            evicted += 1
+        self._save_index()
+        return evicted
+
+
+# --- Scan checkpoints ---
+
+class ScanCheckpoint:
+    """
+    Periodic checkpoints of a Phase 1 scan, so a build that crashed or was
+    interrupted resumes where it stopped instead of at line 0.
+
+    Checkpoints live next to the output, in <output>.checkpoint/:
+
+        entries.tsv      the accepted (word, definition) pairs, appended in
+                         scan order as 'WORD<TAB>definition' lines
+        checkpoint.json  the source offset reached, the size and SHA-256 of
+                         entries.tsv at that point, and the counters and
+                         exclusions so far
+
+    A checkpoint is only used by a build with the same source (path, size
+    and mtime) and scan settings. Whatever entries.tsv holds past the
+    checkpointed size is cut off, and the rest must match the recorded
+    SHA-256, so a resumed scan yields exactly the entries, in the same order,
+    of one that was never interrupted.
+
+    Args:
+        output_path (str): The build's output.
+        source_path (str): The source being scanned.
+        settings (dict): JSON-serialisable settings that decide the scan's results.
+    """
+    def __init__(self, output_path, source_path, settings):
+        self.directory = output_path.rstrip('/\\') + '.checkpoint'
+        self.state_path = os.path.join(self.directory, 'checkpoint.json')
+        self.entries_path = os.path.join(self.directory, 'entries.tsv')
+        stat = os.stat(source_path)
+        # Round-tripped so it compares equal to the copy read back from checkpoint.json
+        self.identity = json.loads(json.dumps({
+            'version': CHECKPOINT_VERSION, 'source': os.path.abspath(source_path), 'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns, 'settings': settings}))
+        self.state = None
+        self._digest = hashlib.sha256()
+        self._file = None
+        self._size = 0
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+            if state.get('identity') == self.identity and self._verify(state):
+                self.state = state
+        except (OSError, ValueError, KeyError):
+            pass  # No usable checkpoint: the scan starts over
+
+    def _verify(self, state):
+        digest = hashlib.sha256()
+        remaining = state['entries_size']
+        with open(self.entries_path, 'rb') as f:
+            while remaining:
+                block = f.read(min(remaining, READ_BUFFER_SIZE))
+                if not block:
+                    return False
+                digest.update(block)
+                remaining -= len(block)
+        if digest.hexdigest() != state['entries_sha256']:
+            return False
+        self._digest = digest
+        return True
+
+    @property
+    def offset(self):
+        """The source offset the scan resumes at (0 without a checkpoint)."""
+        return self.state['offset'] if self.state else 0
+
+    @property
+    def complete(self):
+        return bool(self.state and self.state['complete'])
+
+    def restore(self, counters, word_filter):
+        """Adds the checkpointed counters and exclusions to a resumed scan's."""
+        counters.update(self.state['counters'])
+        for word, rule in self.state['removed'].items():
+            word_filter.removed.setdefault(word, rule)
+
+    def replay(self, seen):
+        """Yields the checkpointed entries in scan order, adding their words to seen."""
+        if not self.state:
+            return
+        remaining = self.state['entries_size']
+        with open(self.entries_path, 'rb') as f:
+            for line in f:
+                if remaining <= 0:
+                    break
+                remaining -= len(line)
+                word, _, definition = line.decode('utf-8')[:-1].partition('\t')
+                seen.add(word)
+                yield word, _unescape_cache_field(definition)
+
+    def record(self, entries):
+        """Passes (word, definition) pairs through while appending them to entries.tsv."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._size = self.state['entries_size'] if self.state else 0
+        self._file = open(self.entries_path, 'r+b' if self.state else 'wb')
+        try:
+            self._file.truncate(self._size)
+            self._file.seek(self._size)
+            for word, definition in entries:
+                line = f"{word}\t{_escape_cache_field(definition)}\n".encode('utf-8')
+                self._file.write(line)
+                self._digest.update(line)
+                self._size += len(line)
+                yield word, definition
+        finally:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+
+    def save(self, offset, counters, removed, complete=False):
+        """
+        Records that every line before offset has been scanned and its entry
+        appended; counters and removed are the scan's totals so far.
+        """
+        if not self._file.closed:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        state = {'identity': self.identity, 'offset': offset, 'complete': complete,
+                 'entries_size': self._size, 'entries_sha256': self._digest.hexdigest(),
+                 'counters': dict(counters), 'removed': removed}
+        with open(self.state_path + '.part', 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False)
+        os.replace(self.state_path + '.part', self.state_path)
+        self.state = state
+
+    def discard(self):
+        """Removes the checkpoint once the build it belongs to is done."""
+        for path in (self.state_path, self.entries_path):
+            if os.path.exists(path):
+                os.remove(path)
+        if os.path.isdir(self.directory) and not os.listdir(self.directory):
+            os.rmdir(self.directory)
+
+
+# --- Reduce stage ---
+
+def reduce_entries(entries, reduction_percent, rng=random):
+    """
+    Randomly keeps (100 - reduction_percent)% of the entries.
+
+    The entries are held in a CompactEntries and only their positions are
+    shuffled, which draws the same permutation as shuffling a list of pairs.
+
+    Yields:
+        tuple: The kept (word, definition) pairs in shuffled order.
+    """
+    store = CompactEntries(indexed=False)
+    for word, definition in entries:
+        store.add(word, definition)
+    order = array('q', range(len(store)))
+    rng.shuffle(order)
+    keep_percentage = 1.0 - (reduction_percent / 100.0)
+    for i in order[:int(len(store) * keep_percentage)]:
+        yield store.entry(i)
+
+
+def _stratum_rng(seed, length):
+    # One independent, reproducible stream per word length: the sample of
+    # 5-letter words doesn't change when the 9-letter words do.
+    return random.Random(f"{seed}:{length}") if seed is not None else random.Random()
+
+
+def bernoulli_sample(entries, keep_fraction, seed=None, stratify=False):
+    """
+    Streams the entries, keeping each one independently with probability keep_fraction.
+
+    Args:
+        entries (iterable): (word, definition) pairs.
+        keep_fraction (float): Probability of keeping an entry (0.0 - 1.0).
+        seed (int): Optional seed for a reproducible sample.
+        stratify (bool): Sample every word length with its own seeded stream.
+    """
+    rng = random.Random(seed)
+    strata = {}
+    for word, definition in entries:
+        if stratify:
+            stratum_rng = strata.get(len(word))
+            if stratum_rng is None:
+                stratum_rng = strata[len(word)] = _stratum_rng(seed, len(word))
+        else:
+            stratum_rng = rng
+        if stratum_rng.random() < keep_fraction:
+            yield word, definition
+
+
+def _allocate(total, counts):
+    """Splits total across the strata in proportion to counts (largest remainder)."""
+    population = sum(counts.values())
+    if not population:
+        return {}
+    quotas = {key: total * count / population for key, count in counts.items()}
+    allocation = {key: int(quota) for key, quota in quotas.items()}
+    leftover = total - sum(allocation.values())
+    for key in sorted(quotas, key=lambda k: (allocation[k] - quotas[k], k))[:leftover]:
+        allocation[key] += 1
+    return allocation
+
+
+def reservoir_sample(entries, sample_size, seed=None, stratify=False):
+    """
+    Keeps a uniform random sample of exactly sample_size entries (Algorithm R),
+    or every entry if there are fewer.
+
+    With stratify, one reservoir is kept per word length and the final sample
+    is split across lengths in proportion to how many valid words each length
+    had, so the length mix of the source is preserved.
+
+    Memory: the plain sample holds at most sample_size entries. The stratified
+    one holds up to sample_size entries for every word length, so up to
+    sample_size * (max_len - min_len + 1) entries before the split. The
+    lengths' shares depend on counts that are only known once the scan is
+    over, and any length could still need the whole sample until then, so no
+    reservoir can be cut down earlier in a single pass.
+
+    Returns:
+        list: The sampled (word, definition) pairs.
+    """
+    if not stratify:
+        rng = random.Random(seed)
+        reservoir = []
+        for i, entry in enumerate(entries):
+            if i < sample_size:
+                reservoir.append(entry)
+            else:
+                j = rng.randrange(i + 1)
+                if j < sample_size:
+                    reservoir[j] = entry
+        return reservoir
+
+    reservoirs, seen, rngs = {}, Counter(), {}
+    for entry in entries:
+        length = len(entry[0])
+        reservoir = reservoirs.setdefault(length, [])
+        if length not in rngs:
+            rngs[length] = _stratum_rng(seed, length)
+        i = seen[length]
+        seen[length] += 1
+        if i < sample_size:
+            reservoir.append(entry)
+        else:
+            j = rngs[length].randrange(i + 1)
+            if j < sample_size:
+                reservoir[j] = entry
+    sample = []
+    for length, quota in sorted(_allocate(min(sample_size, sum(seen.values())), seen).items()):
+        sample.extend(rngs[length].sample(reservoirs[length], quota))
+    return sample
+
+
+# --- Write stage ---
+
+class JsonObjectWriter:
+    """
+    Streams key/value pairs into a JSON object file, one member at a time.
+    The bytes written match json.dump with the same formatting options.
+
+    The data goes to '<path>.part' and only replaces the target on commit(),
+    so a failed or empty build never clobbers the previous file.
+    """
+    def __init__(self, path, minify=True):
+        self.path = path
+        self.temp_path = path + '.part'
+        if minify:
+            self.opening, self.separator, self.closing, self.key_sep = '{', ',', '}', ':'
+        else:
+            self.opening, self.separator, self.closing, self.key_sep = '{\n  ', ',\n  ', '\n}', ': '
+        self.count = 0
+        self.file = open(self.temp_path, 'w', encoding='utf-8')
+
+    def add(self, key, value):
+        self.file.write(self.separator if self.count else self.opening)
+        self.file.write(json.dumps(key, ensure_ascii=False) + self.key_sep + json.dumps(value, ensure_ascii=False))
+        self.count += 1
+
+    def commit(self):
+        self.file.write(self.closing if self.count else '{}')
+        self.file.close()
+        os.replace(self.temp_path, self.path)
+
+    def discard(self):
+        self.file.close()
+        os.remove(self.temp_path)
+
+
+class ShardWriter:
+    """
+    Writes a dictionary as one JSON object per word length for lazy loading
+    by the game:
+
+        <shard_dir>/<language>/<length>.json
+        <shard_dir>/manifest.json
+
+    The manifest lists, for every language, each shard's file, word count and
+    size in bytes. Other languages already in the manifest are left untouched;
+    this language's files that the new entry no longer lists (shards of other
+    lengths, or its packed file) are removed.
+    """
+    def __init__(self, shard_dir, language, minify=True):
+        self.shard_dir = shard_dir
+        self.language = language
+        self.minify = minify
+        self.writers = {}
+        self.count = 0
+        os.makedirs(os.path.join(shard_dir, language), exist_ok=True)
+
+    def add(self, word, definition):
+        writer = self.writers.get(len(word))
+        if writer is None:
+            path = os.path.join(self.shard_dir, self.language, f"{len(word)}.json")
+            writer = self.writers[len(word)] = JsonObjectWriter(path, self.minify)
+        writer.add(word, definition)
+        self.count += 1
+
+    def commit(self):
+        shards = {}
+        for length, writer in sorted(self.writers.items()):
+            writer.commit()
+            shards[str(length)] = {
+                'file': f"{self.language}/{length}.json",
+                'count': writer.count,
+                'bytes': os.path.getsize(writer.path),
+            }
+        _update_manifest(os.path.join(self.shard_dir, 'manifest.json'), self.language,
+                         {'count': self.count, 'shards': shards})
+
+    def discard(self):
+        for writer in self.writers.values():
+            writer.discard()
+
+
+def _utf16_len(text):
+    # Offsets in packed files count UTF-16 code units, like JavaScript string indices
+    return len(text.encode('utf-16-le')) // 2
+
+
+def _utf16_key(text):
+    # JavaScript compares strings by UTF-16 code units, which puts characters
+    # outside the BMP (surrogate pairs) before U+E000-U+FFFF; big-endian bytes sort the same way
+    return text.encode('utf-16-be')
+
+
+def _manifest_files(entry):
+    # The files of a manifest entry, relative to the manifest: a packed file or the shards
+    if not entry:
+        return set()
+    if 'file' in entry:
+        return {entry['file']}
+    return {shard['file'] for shard in entry.get('shards', {}).values()}
+
+
+def _update_manifest(manifest_path, language, entry):
+    """
+    Sets a language's entry in a dictionary manifest.json, or removes it when
+    entry is None. Files the previous entry listed and the new one doesn't
+    (stale shards, or the language's output in the other format) are deleted
+    once the manifest no longer points at them.
+    """
+    manifest = {'version': 1, 'languages': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    if entry is None and language not in manifest['languages']:
+        return
+    previous = manifest['languages'].pop(language, None)
+    if entry is not None:
+        manifest['languages'][language] = entry
+    with open(manifest_path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.part', manifest_path)
+
+    base = os.path.dirname(os.path.abspath(manifest_path))
+    for stale in sorted(_manifest_files(previous) - _manifest_files(entry)):
+        stale_path = os.path.join(base, stale)
+        if os.path.exists(stale_path):
+            os.remove(stale_path)
+        folder = os.path.dirname(stale_path)
+        if folder != base and os.path.isdir(folder) and not os.listdir(folder):
+            os.rmdir(folder)
+
+
+def unlist_game_dictionary(output_path, language):
+    """
+    The game reads '<language>_dictionary.json' only while the manifest in
+    its GAME_DICTIONARY_DIR has no shards or packed file for the language.
+    Writing that full file therefore removes the language's manifest entry
+    and its files next to it, so they can't shadow the new dictionary.
+    """
+    if os.path.basename(output_path) != f"{language}_dictionary.json":
+        return
+    manifest_path = os.path.join(os.path.dirname(os.path.abspath(output_path)), GAME_DICTIONARY_DIR, 'manifest.json')
+    if os.path.exists(manifest_path):
+        _update_manifest(manifest_path, language, None)
+
+
+class PackedWriter:
+    """
+    Writes a dictionary as a packed JSON document instead of one giant object:
+
+        {
+          "format": "wordsearch-packed", "version": 1, "count": N,
+          "lengths": {"4": {"offset": 0, "count": 812, "index": 0}, ...},
+          "words": "ABLE\nACID\n...",
+          "definitions": "...",
+          "definitionOffsets": [0, 31, 77, ...]
+        }
+
+    Words are sorted by length, then by UTF-16 code units (the order of
+    JavaScript's string comparison), and each one is followed
+    by a newline. Word i of length L is therefore words[offset + i * (L + 1):][:L]
+    and random picks need no key enumeration. Its definition is
+    definitions[definitionOffsets[k]:definitionOffsets[k + 1]] with
+    k = index + i. All offsets count UTF-16 code units so they can be used
+    directly as JavaScript string indices.
+
+    The file is registered as this language's dictionary in the manifest.json
+    next to it, and commit() verifies the round trip before replacing the
+    previous file.
+    """
+    def __init__(self, path, language):
+        self.path = path
+        self.language = language
+        self.entries = []
+        self.count = 0
+
+    def add(self, word, definition):
+        self.entries.append((word, definition))
+        self.count += 1
+
+    def commit(self):
+        self.entries.sort(key=lambda entry: (_utf16_len(entry[0]), _utf16_key(entry[0])))
+        lengths, words, definitions, definition_offsets = {}, [], [], [0]
+        word_offset = definition_offset = 0
+        for index, (word, definition) in enumerate(self.entries):
+            length = _utf16_len(word)
+            if str(length) not in lengths:
+                lengths[str(length)] = {'offset': word_offset, 'count': 0, 'index': index}
+            lengths[str(length)]['count'] += 1
+            words.append(word + '\n')
+            word_offset += length + 1
+            definitions.append(definition)
+            definition_offset += _utf16_len(definition)
+            definition_offsets.append(definition_offset)
+        packed = {
+            'format': PACKED_FORMAT,
+            'version': 1,
+            'count': len(self.entries),
+            'lengths': lengths,
+            'words': ''.join(words),
+            'definitions': ''.join(definitions),
+            'definitionOffsets': definition_offsets,
+        }
+        temp_path = self.path + '.part'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(packed, f, ensure_ascii=False, separators=(',', ':'))
+        problems = verify_packed(temp_path, dict(self.entries))
+        if problems:
+            os.remove(temp_path)
+            raise ValueError(f"Packed dictionary failed verification: {problems[0]}")
+        os.replace(temp_path, self.path)
+        _update_manifest(os.path.join(os.path.dirname(os.path.abspath(self.path)), 'manifest.json'), self.language, {
+            'format': 'packed',
+            'file': os.path.basename(self.path),
+            'count': self.count,
+            'bytes': os.path.getsize(self.path),
+        })
+
+    def discard(self):
+        self.entries = []
+
+
+class PackedDictionary:
+    """Read access to a packed dictionary file (see PackedWriter)."""
+    def __init__(self, packed):
+        if packed.get('format') != PACKED_FORMAT:
+            raise ValueError("Not a packed word search dictionary.")
+        self.lengths = {int(length): info for length, info in packed['lengths'].items()}
+        self._words = packed['words'].encode('utf-16-le')
+        self._definitions = packed['definitions'].encode('utf-16-le')
+        self._definition_offsets = packed['definitionOffsets']
+        self.count = packed['count']
+
+    def __len__(self):
+        return self.count
+
+    def word(self, length, i):
+        """Returns the i-th word of the given length."""
+        start = self.lengths[length]['offset'] + i * (length + 1)
+        return self._words[2 * start:2 * (start + length)].decode('utf-16-le')
+
+    def definition(self, index):
+        """Returns the definition stored at a global word index."""
+        start, end = self._definition_offsets[index], self._definition_offsets[index + 1]
+        return self._definitions[2 * start:2 * end].decode('utf-16-le')
+
+    def lookup(self, word):
+        """Binary-searches a word's bucket; returns its definition or None."""
+        length = _utf16_len(word)
+        info = self.lengths.get(length)
+        if info is None:
+            return None
+        lo, hi = 0, info['count']
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _utf16_key(self.word(length, mid)) < _utf16_key(word):
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < info['count'] and self.word(length, lo) == word:
+            return self.definition(info['index'] + lo)
+        return None
+
+    def items(self):
+        for length, info in sorted(self.lengths.items()):
+            for i in range(info['count']):
+                yield self.word(length, i), self.definition(info['index'] + i)
+
+
+def load_packed(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return PackedDictionary(json.load(f))
+
+
+def verify_packed(path, reference):
+    """
+    Checks that a packed file holds exactly the (word, definition) pairs of
+    reference, a dict or a path to a plain dictionary JSON file.
+
+    Returns:
+        list: Human-readable problems; empty if the round trip is exact.
+    """
+    if isinstance(reference, str):
+        with open(reference, 'r', encoding='utf-8') as f:
+            reference = json.load(f)
+    packed = load_packed(path)
+    problems = []
+    if len(packed) != len(reference):
+        problems.append(f"expected {len(reference)} words, found {len(packed)}")
+    previous = None
+    for word, definition in packed.items():
+        key = (_utf16_len(word), _utf16_key(word))
+        if previous is not None and key <= previous:
+            problems.append(f"'{word}' is out of order")
+        previous = key
+        if reference.get(word) != definition:
+            problems.append(f"'{word}' does not match the reference definition")
+    for word, definition in reference.items():
+        if packed.lookup(word) != definition:
+            problems.append(f"lookup of '{word}' failed")
+    return problems
+
+
+def write_entries(entries, writer):
+    """Feeds (word, definition) pairs to a writer and returns how many were written."""
+    for word, definition in entries:
+        writer.add(word, definition)
+    return writer.count
+
+
+def write_dictionary(entries, output_path, minify=True):
+    """
+    Streams (word, definition) pairs into a single JSON object file.
+
+    Returns:
+        int: The number of entries written.
+    """
+    writer = JsonObjectWriter(output_path, minify)
+    count = write_entries(entries, writer)
+    writer.commit()
+    return count
+
+
+# --- Pipeline ---
+
+def _parallel_workers(workers, compression, log):
+    # Byte-range workers need an uncompressed file; compressed dumps are streamed serially
+    if workers > 1 and compression:
+        log(f"  ...{compression} input is decompressed as one stream, so it is scanned without worker processes.")
+        return 1
+    return workers
+
+
+def _read_timer(report, items):
+    if report is None:
+        return None
+    report.measure('read', items=items, nbytes='bytes_read')
+    return report.timed_calls('read')
+
+
+def _checkpoint_lines(lines, offset, save):
+    # Checkpoints every CHECKPOINT_EVERY bytes; when the next line is asked for,
+    # everything before it has gone through the whole Phase 1 chain
+    next_save = offset + CHECKPOINT_EVERY
+    for line in lines:
+        if offset >= next_save:
+            save(offset)
+            next_save = offset + CHECKPOINT_EVERY
+        offset += len(line)
+        yield line
+
+
+def checkpointed_scan(source_path, word_filter, checkpoint, workers=1, prefilter=True, counters=None, log=print,
+                      read_timer=None):
+    """
+    Phase 1 of a Wiktionary dump with checkpoints (see ScanCheckpoint): yields
+    the checkpointed entries first, then scans on from the checkpointed
+    offset, appending every new entry and checkpointing as it goes. The
+    result is the same as first_occurrence() over an uninterrupted scan.
+
+    The scan's counts are kept apart from whatever else counters receives
+    downstream, and added to counters once the scan is over.
+    """
+    scan_counters = Counter()
+    seen = CompactEntries(definitions=False)
+    if checkpoint.complete:
+        log(f"  ...reusing the completed scan checkpointed in '{checkpoint.directory}'...")
+    elif checkpoint.state:
+        log(f"  ...resuming from the checkpoint in '{checkpoint.directory}' at byte {checkpoint.offset}...")
+    if checkpoint.state:
+        checkpoint.restore(scan_counters, word_filter)
+    yield from checkpoint.replay(seen)
+    if checkpoint.complete:
+        log(f"  ...reused {len(seen)} entries from the completed scan.")
+    else:
+        def save(offset, complete=False):
+            # Byte counts describe this run's reading, so they are not carried over
+            totals = Counter(scan_counters)
+            for key in ('source_bytes', 'bytes_read'):
+                totals.pop(key, None)
+            checkpoint.save(offset, totals, word_filter.removed, complete)
+
+        start = checkpoint.offset
+        if workers > 1:
+            scanned = scan_wiktionary_parallel(source_path, word_filter, workers, prefilter, scan_counters, log=log,
+                                               start=start, on_chunk=save)
+        else:
+            lines = _checkpoint_lines(read_lines(source_path, log, scan_counters, read_timer, start), start, save)
+            scanned = filter_wiktionary(lines, word_filter, prefilter, scan_counters)
+        yield from checkpoint.record(first_occurrence(scanned, scan_counters, seen))
+        save(None, complete=True)
+    if counters is not None:
+        counters.update(scan_counters)
+
+
+def iter_source(source_path, word_filter, workers=1, prefilter=True, counters=None, log=print, source_format=None,
+                report=None, checkpoint=None):
+    """
+    Chains the read and filter stages for the given source file, which may
+    be compressed (see open_source).
+
+    Args:
+        source_format (str): 'wiktionary' or 'dex'; detected from the content if not given.
+        report (BuildReport): Optional; the serial read stage (the block reads and
+                              their decompression) is timed in it as 'read'.
+        checkpoint (ScanCheckpoint): Optional; a Wiktionary scan resumes from it and
+                                     keeps it up to date (see checkpointed_scan).
+    """
+    if counters is None:
+        counters = Counter()
+    source_format = source_format or detect_source_format(source_path)
+    compression = source_compression(source_path)
+    described = f", {compression}" if compression else ""
+    settings = f"Settings: Length {word_filter.min_len}-{word_filter.max_len}"
+    if source_format == 'wiktionary':
+        log(f"Phase 1: Reading English Wiktionary (JSONL{described})... {settings}")
+        workers = _parallel_workers(workers, compression, log)
+        if checkpoint:
+            return checkpointed_scan(source_path, word_filter, checkpoint, workers, prefilter, counters, log,
+                                     _read_timer(report, 'lines') if workers == 1 else None)
+        if workers > 1:
+            return first_occurrence(scan_wiktionary_parallel(source_path, word_filter, workers, prefilter, counters, log=log),
+                                    counters)
+        lines = read_lines(source_path, log, counters, _read_timer(report, 'lines'))
+        return first_occurrence(filter_wiktionary(lines, word_filter, prefilter, counters), counters)
+    log(f"Phase 1: Reading Romanian DEX (JSON{described})... {settings}")
+    items = read_dex(source_path, counters, _read_timer(report, 'entries'))
+    return first_occurrence(filter_dex(items, word_filter, counters), counters)
+
+
+def scan_languages(source_path, filters, workers=1, prefilter=True, counters=None, language_counters=None, log=print):
+    """
+    Phase 1 for several languages in one pass over a Wiktionary dump.
+
+    Args:
+        filters (dict): lang_code -> WordFilter for every wanted language.
+        counters (Counter): Optional; receives the shared scan statistics.
+        language_counters (dict): Optional lang_code -> Counter for each language's
+                                  rejections and duplicates.
+
+    Returns:
+        dict: lang_code -> CompactEntries of (word, definition), first occurrences in file order.
+    """
+    if counters is None:
+        counters = Counter()
+    if language_counters is None:
+        language_counters = {lang_code: Counter() for lang_code in filters}
+    compression = source_compression(source_path)
+    described = f", {compression}" if compression else ""
+    log(f"Phase 1: Reading Wiktionary (JSONL{described}) for {len(filters)} languages in one pass...")
+    workers = _parallel_workers(workers, compression, log)
+    if workers > 1:
+        scanned = scan_languages_parallel(source_path, filters, workers, prefilter, counters, language_counters, log=log)
+    else:
+        scanned = filter_wiktionary_languages(read_lines(source_path, log, counters), filters, prefilter, counters,
+                                              language_counters)
+    entries = {lang_code: CompactEntries(indexed=False) for lang_code in filters}
+    for lang_code, word, definition in first_occurrence_by_language(scanned, language_counters):
+        entries[lang_code].add(word, definition)
+    return entries
+
+
+def _check_build_options(reduction_mode, sample_size, output_format):
+    if reduction_mode not in REDUCTION_MODES:
+        raise ValueError(f"Unknown reduction mode '{reduction_mode}'.")
+    if reduction_mode == 'reservoir' and sample_size is None:
+        raise ValueError("Reservoir reduction needs a sample size.")
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}'.")
+
+
+def _reduce_and_write(source_entries, word_filter, report, output_path, language, reduction_percent, minify, seed,
+                      reduction_mode, sample_size, stratify, output_format, write_report, log):
+    # Phase 2 and the write stage of one dictionary, shared by build_dictionary and build_dictionaries
+    counters = report.counters
+    phase1_count = 0
+
+    def counted(entries):
+        nonlocal phase1_count
+        for entry in entries:
+            phase1_count += 1
+            yield entry
+
+    def reduced(entries):
+        # Lazy even for the list-returning reductions, so their time lands in the 'reduce' stage
+        keep_fraction = 1.0 - (reduction_percent / 100.0)
+        if reduction_mode == 'shuffle':
+            yield from reduce_entries(entries, reduction_percent, random.Random(seed))
+        elif reduction_mode == 'bernoulli':
+            log(f"Phase 2: Sampling {keep_fraction:.0%} of the words while scanning (seed {seed}, stratified: {stratify})...")
+            yield from bernoulli_sample(entries, keep_fraction, seed, stratify)
+        else:
+            log(f"Phase 2: Reservoir sampling {sample_size} words while scanning (seed {seed}, stratified: {stratify})...")
+            yield from reservoir_sample(entries, sample_size, seed, stratify)
+
+    try:
+        entries = report.stage('scan', counted(source_entries))
+        final_entries = report.stage('reduce', reduced(entries))
+        report.measure('scan', nbytes='bytes_read')
+        report.measure('write', items='written')
+
+        # Streaming samples are written while Phase 1 is still running, so the
+        # writers only replace the previous output once we know it isn't empty.
+        if output_format == 'shards':
+            writer = ShardWriter(output_path, language, minify)
+        elif output_format == 'packed':
+            writer = PackedWriter(output_path, language)
+        else:
+            writer = JsonObjectWriter(output_path, minify)
+        try:
+            with report.phase('write', upstream='reduce'):
+                written = write_entries(final_entries, writer)
+        except BaseException:
+            writer.discard()
+            raise
+        if word_filter.removed:
+            log(f"Exclusion rules removed {len(word_filter.removed)} words (listed with their rules in the build report).")
+        if counters['lines']:
+            log(f"Pre-filter skipped {counters['prefiltered']} of {counters['lines']} lines without JSON decoding.")
+        log(f"\nPhase 1 Complete. Found {phase1_count} total valid words matching criteria.")
+        if not phase1_count:
+            writer.discard()
+            if write_report:
+                report.write()
+            raise EmptyDictionaryError(f"Found 0 words matching your criteria (Length: {word_filter.min_len}-{word_filter.max_len}).")
+
+        if reduction_mode == 'shuffle':
+            log(f"Phase 2: Reducing dictionary by {reduction_percent:.0f}%...")
+        log(f"Phase 2 Complete. Final dictionary size: {written} words.")
+        with report.phase('commit'):
+            writer.commit()
+            if output_format == 'json':
+                unlist_game_dictionary(output_path, language)
+        log(f"Wrote {written} words to '{output_path}'.")
+        counters.update(phase1=phase1_count, written=written)
+        if write_report:
+            log(f"Build report written to '{report.write()}'.")
+        return dict(counters)
+    finally:
+        report.close()
+
+
+def build_dictionary(source_path, output_path, exclusion_path=None, min_len=DEFAULT_MIN_LEN, max_len=DEFAULT_MAX_LEN,
+                     reduction_percent=DEFAULT_REDUCTION, minify=True, seed=None, workers=1, prefilter=True,
+                     reduction_mode='shuffle', sample_size=None, stratify=False, output_format='json', language=None,
+                     write_report=True, trace_memory=False, cache_dir=None, cache_max_mb=DEFAULT_CACHE_MAX_MB,
+                     checkpoint=True, log=print):
+    """
+    Runs the full pipeline from a source dictionary to the game's JSON file.
+
+    Args:
+        source_path (str): Wiktionary JSONL dump or Romanian DEX JSON export, optionally
+                           gzip, bz2 or xz compressed; the format is read from the content.
+        output_path (str): Where the final dictionary JSON is written (a directory for 'shards').
+        exclusion_path (str): Optional profanity/exclusion list.
+        min_len (int): Shortest word to keep.
+        max_len (int): Longest word to keep.
+        reduction_percent (float): Percentage of the valid words to drop at random
+                                   ('shuffle' and 'bernoulli' modes).
+        minify (bool): Write compact JSON instead of indented JSON.
+        seed (int): Optional seed for a reproducible reduction.
+        workers (int): Worker processes for scanning a Wiktionary dump (1 scans serially).
+        prefilter (bool): Reject Wiktionary lines from their raw bytes before JSON decoding.
+        reduction_mode (str): 'shuffle' (in memory, exact percentage), 'bernoulli'
+                              (streaming, approximate percentage) or 'reservoir'
+                              (streaming, exactly sample_size words).
+        sample_size (int): Number of words to keep in 'reservoir' mode.
+        stratify (bool): Sample each word length separately to preserve the length mix; in
+                         'reservoir' mode this holds up to sample_size words per length
+                         while scanning (see reservoir_sample).
+        output_format (str): 'json' for one dictionary file, 'shards' for per-length
+                             files plus a manifest (see ShardWriter), 'packed' for
+                             the offset-table format (see PackedWriter). Writing
+                             one format removes the language's files of the
+                             others from the game's manifest (see _update_manifest
+                             and unlist_game_dictionary).
+        language (str): Language name used in the manifest; defaults to 'english' for
+                        Wiktionary dumps and 'romanian' for DEX exports.
+        write_report (bool): Write the build's timings and counters next to the output
+                             (see build_report.py).
+        trace_memory (bool): Include the peak traced memory in the report.
+        cache_dir (str): Optional Phase 1 cache directory (see Phase1Cache); the first
+                         build of a source scans it once for every length up to
+                         PHASE1_CACHE_MAX_LEN, later builds only read the cache.
+        cache_max_mb (int): Size limit of the cache directory.
+        checkpoint (bool): Checkpoint the scan of a Wiktionary dump next to the output
+                           (see ScanCheckpoint), and resume from the checkpoint an
+                           interrupted build with the same source and settings left.
+        log (function): Receives human-readable progress messages.
+
+    Returns:
+        dict: Counts for the build ('phase1', 'written' and the scan statistics).
+
+    Raises:
+        EmptyDictionaryError: If no word matches the filtering criteria.
+    """
+    _check_build_options(reduction_mode, sample_size, output_format)
+    source_format = detect_source_format(source_path)
+    profile = LANGUAGE_PROFILES['english' if source_format == 'wiktionary' else 'romanian']
+    language = language or profile.name
+    report = BuildReport('dict_pipeline', output_path, {
+        'source': source_path, 'exclusions': exclusion_path, 'min_len': min_len, 'max_len': max_len,
+        'reduction_percent': reduction_percent, 'reduction_mode': reduction_mode, 'sample_size': sample_size,
+        'stratify': stratify, 'seed': seed, 'workers': workers, 'prefilter': prefilter,
+        'output_format': output_format, 'language': language, 'cache_dir': cache_dir, 'source_format': source_format,
+        'compression': source_compression(source_path),
+    }, trace_memory)
+    with report.phase('load_exclusions'):
+        word_filter = WordFilter(min_len, max_len, profile, load_exclusions(exclusion_path, log))
+    report.details['excluded'] = word_filter.removed
+    log(f"Starting to process '{source_path}'...")
+
+    counters = report.counters
+
+    def scan_checkpoint(scan_filter):
+        if not checkpoint or source_format != 'wiktionary':
+            return None
+        saved = ScanCheckpoint(output_path, source_path, {
+            'format': source_format, 'min_len': scan_filter.min_len, 'max_len': scan_filter.max_len,
+            'profile': profile.spec(), 'excluded': scan_filter.excluded.rules, 'prefilter': prefilter})
+        if saved.state:
+            report.details['resumed'] = {'offset': saved.offset, 'complete': saved.complete}
+        return saved
+
+    if cache_dir:
+        cache = Phase1Cache(cache_dir, cache_max_mb << 20)
+        cache_filter = WordFilter(1, max(max_len, PHASE1_CACHE_MAX_LEN), profile)
+        with report.phase('hash'):
+            cache_key = cache.key_for(source_path, {'source': source_format, 'max_len': cache_filter.max_len,
+                                                    'profile': profile.spec()})
+        scan_saved = None
+        if cache_key in cache:
+            log(f"Phase 1: Reading cached scan of '{source_path}'... Settings: Length {min_len}-{max_len}")
+            counters['cache_hits'] += 1
+            source_entries = cache.read(cache_key)
+        else:
+            log("Phase 1 cache miss: scanning every word length once so later builds can reuse it.")
+            counters['cache_misses'] += 1
+            scan_saved = scan_checkpoint(cache_filter)
+            source_entries = cache.record(cache_key, iter_source(source_path, cache_filter, workers, prefilter, counters,
+                                                                 log, source_format, report, scan_saved), source_path)
+        source_entries = refilter_entries(source_entries, word_filter, counters)
+    else:
+        scan_saved = scan_checkpoint(word_filter)
+        source_entries = iter_source(source_path, word_filter, workers, prefilter, counters, log, source_format, report,
+                                     scan_saved)
+
+    # Any other failure keeps the checkpoint, so the rerun resumes from it
+    try:
+        counts = _reduce_and_write(source_entries, word_filter, report, output_path, language, reduction_percent,
+                                   minify, seed, reduction_mode, sample_size, stratify, output_format, write_report,
+                                   log)
+    except EmptyDictionaryError:
+        if scan_saved:
+            scan_saved.discard()
+        raise
+    if scan_saved:
+        scan_saved.discard()
+    return counts
+
+
+def build_dictionaries(source_path, targets, reduction_percent=DEFAULT_REDUCTION, minify=True, seed=None, workers=1,
+                       prefilter=True, reduction_mode='shuffle', sample_size=None, stratify=False, output_format='json',
+                       write_report=True, trace_memory=False, cache_dir=None, cache_max_mb=DEFAULT_CACHE_MAX_MB,
+                       log=print):
+    """
+    Builds the dictionaries of several languages from a single scan of a
+    Wiktionary dump, instead of one full scan per language.
+
+    Every entry is routed by its lang_code to that language's filter; each
+    language then gets its own Phase 2, output and build report (with shards,
+    which share a folder, '<language>_build_report.json'). The reports of the
+    scanned languages share the scan's statistics ('lines', 'prefiltered',
+    'json_errors', ...) and its time, as the 'shared_scan' phase.
+
+    With a cache_dir, each language has its own Phase 1 cache entry, the same
+    one build_dictionary uses for English: languages found in the cache are
+    read from it, and only the others are scanned (each for every length up
+    to PHASE1_CACHE_MAX_LEN) and recorded. When every language is cached, the
+    dump is not read at all.
+
+    The scan finishes before any language is reduced, so every scanned
+    language's Phase 1 entries are held at once (in CompactEntries, each
+    released once its language is written): peak memory is about the sum of
+    what separate builds would hold one after the other, whatever the
+    reduction mode. The scan is not checkpointed; an interrupted build starts
+    over, except for the languages whose scan a completed run has cached.
+
+    Args:
+        source_path (str): Wiktionary JSONL dump, optionally compressed.
+        targets (dict): Language name (a key of LANGUAGE_PROFILES) -> {'output': path}
+                        plus optional 'min_len', 'max_len' and 'exclude' (exclusion file).
+        Other arguments: as for build_dictionary; they apply to every language.
+
+    Returns:
+        dict: Language name -> the counts build_dictionary would return, plus a
+              'status' of 'written' or 'empty' (nothing matched; no file written).
+    """
+    _check_build_options(reduction_mode, sample_size, output_format)
+    unknown = sorted(set(targets) - set(LANGUAGE_PROFILES))
+    if unknown:
+        raise ValueError(f"Unknown language(s) {', '.join(unknown)}; expected some of {', '.join(LANGUAGE_PROFILES)}.")
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+
+    try:
+        compression = source_compression(source_path)
+        filters, reports, language_counters = {}, {}, {}
+        for language, target in targets.items():
+            profile = LANGUAGE_PROFILES[language]
+            lang_code = profile.lang_code
+            min_len, max_len = target.get('min_len', DEFAULT_MIN_LEN), target.get('max_len', DEFAULT_MAX_LEN)
+            # Shard folders are shared by the languages, so each report is named after its language
+            report_path = (os.path.join(target['output'], f"{language}_build_report.json") if output_format == 'shards'
+                           else None)
+            reports[language] = report = BuildReport('dict_pipeline', target['output'], {
+                'source': source_path, 'exclusions': target.get('exclude'), 'min_len': min_len, 'max_len': max_len,
+                'reduction_percent': reduction_percent, 'reduction_mode': reduction_mode, 'sample_size': sample_size,
+                'stratify': stratify, 'seed': seed, 'workers': workers, 'prefilter': prefilter,
+                'output_format': output_format, 'language': language, 'languages': sorted(targets),
+                'compression': compression,
+            }, trace_memory, report_path)
+            with report.phase('load_exclusions'):
+                filters[lang_code] = WordFilter(min_len, max_len, profile, load_exclusions(target.get('exclude'), log))
+            report.details['excluded'] = filters[lang_code].removed
+            language_counters[lang_code] = Counter()
+
+        log(f"Starting to process '{source_path}' for {', '.join(targets)}...")
+        # lang_code -> the filter it is scanned with, and the cache keys of the languages found in / added to the cache
+        scan_filters, cached, recorded = dict(filters), {}, {}
+        if cache_dir:
+            cache = Phase1Cache(cache_dir, cache_max_mb << 20)
+            for language, report in reports.items():
+                profile = LANGUAGE_PROFILES[language]
+                cache_filter = WordFilter(1, max(filters[profile.lang_code].max_len, PHASE1_CACHE_MAX_LEN), profile)
+                with report.phase('hash'):
+                    cache_key = cache.key_for(source_path, {'source': 'wiktionary', 'max_len': cache_filter.max_len,
+                                                            'profile': profile.spec()})
+                if cache_key in cache:
+                    report.counters['cache_hits'] += 1
+                    cached[profile.lang_code] = cache_key
+                    del scan_filters[profile.lang_code]
+                else:
+                    report.counters['cache_misses'] += 1
+                    recorded[profile.lang_code] = cache_key
+                    scan_filters[profile.lang_code] = cache_filter
+        scan_counters, phase1 = Counter(), {}
+        if scan_filters:
+            if cache_dir:
+                log(f"Phase 1 cache miss for {', '.join(scan_filters)}: scanning every word length once so later "
+                    f"builds can reuse it.")
+            scanned_reports = [report for language, report in reports.items()
+                               if LANGUAGE_PROFILES[language].lang_code in scan_filters]
+            with ExitStack() as timed:
+                for report in scanned_reports:
+                    timed.enter_context(report.phase('shared_scan'))
+                    report.measure('shared_scan', items='lines', nbytes='bytes_read')
+                phase1 = scan_languages(source_path, scan_filters, workers, prefilter, scan_counters,
+                                        {lang_code: language_counters[lang_code] for lang_code in scan_filters}, log)
+
+        results = {}
+        for language, target in targets.items():
+            lang_code = LANGUAGE_PROFILES[language].lang_code
+            report = reports[language]
+            if lang_code in scan_filters:
+                report.counters.update(scan_counters)
+            report.counters.update(language_counters[lang_code])
+            log(f"\n--- {language} ({lang_code}) ---")
+            if lang_code in cached:
+                log(f"Phase 1: Reading cached scan of '{source_path}'...")
+                source_entries = refilter_entries(cache.read(cached[lang_code]), filters[lang_code], report.counters)
+            elif lang_code in recorded:
+                source_entries = refilter_entries(cache.record(recorded[lang_code], phase1.pop(lang_code), source_path),
+                                                  filters[lang_code], report.counters)
+            else:
+                source_entries = phase1.pop(lang_code)
+            try:
+                counts = _reduce_and_write(source_entries, filters[lang_code], report, target['output'], language,
+                                           reduction_percent, minify, seed, reduction_mode, sample_size, stratify,
+                                           output_format, write_report, log)
+                results[language] = dict(counts, status='written')
+            except EmptyDictionaryError as e:
+                log(f"WARNING: {e} No file was written for {language}.")
+                results[language] = dict(report.counters, status='empty')
+        return results
+    finally:
+        if started_tracing:
+            tracemalloc.stop()
+
+
+def load_targets(path, output_dir, output_format='json', min_len=DEFAULT_MIN_LEN, max_len=DEFAULT_MAX_LEN,
+                 exclusion_path=None):
+    """
+    Reads a JSON file of per-language settings for build_dictionaries:
+
+        {"english": {"min_len": 4, "max_len": 9, "exclude": "profanity_en.txt"},
+         "romanian": {"output": "ro.json"}}
+
+    Missing settings fall back to the given defaults. Outputs are resolved
+    against output_dir and default to '<language>_dictionary.json' (or
+    output_dir itself for shards, which keep one folder per language and
+    one '<language>_build_report.json' each).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    targets = {}
+    for language, settings in config.items():
+        if 'output' in settings:
+            output = os.path.join(output_dir, settings['output'])
+        elif output_format == 'shards':
+            output = output_dir
+        else:
+            output = os.path.join(output_dir, f"{language}_dictionary.json")
+        targets[language] = {
+            'output': output,
+            'min_len': settings.get('min_len', min_len),
+            'max_len': settings.get('max_len', max_len),
+            'exclude': settings.get('exclude', exclusion_path),
+        }
+    return targets
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build a word search dictionary JSON from Wiktionary or DEX data.")
+    parser.add_argument("source", help="Source dictionary (Wiktionary JSONL dump or DEX JSON export, "
+                                       "optionally .gz/.bz2/.xz compressed)")
+    parser.add_argument("output", help="Output JSON file, or directory with --format shards or --targets")
+    parser.add_argument("--exclude", help="Profanity/exclusion list (.txt, one word per line)")
+    parser.add_argument("--min-len", type=int, default=DEFAULT_MIN_LEN)
+    parser.add_argument("--max-len", type=int, default=DEFAULT_MAX_LEN)
+    parser.add_argument("--reduction", type=float, default=DEFAULT_REDUCTION, help="Random reduction percentage (0-95)")
+    parser.add_argument("--pretty", action="store_true", help="Write indented JSON instead of minified")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default='json',
+                        help="json: one dictionary file; shards: one file per word length plus manifest.json; "
+                             "packed: length-sorted word block with offset tables, registered in manifest.json")
+    parser.add_argument("--language", help="Language name for the manifest (default: english for Wiktionary, romanian for DEX)")
+    parser.add_argument("--seed", type=int, help="Seed for a reproducible reduction")
+    parser.add_argument("--reduction-mode", choices=REDUCTION_MODES, default='shuffle',
+                        help="shuffle: exact, in memory; bernoulli/reservoir: sampled while scanning")
+    parser.add_argument("--sample-size", type=int, help="Words to keep in reservoir mode")
+    parser.add_argument("--stratify", action="store_true", help="Sample each word length separately")
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes for scanning an uncompressed Wiktionary dump (0 = one per CPU)")
+    parser.add_argument("--no-prefilter", action="store_true", help="JSON-decode every Wiktionary line instead of pre-filtering raw bytes")
+    parser.add_argument("--no-report", action="store_true", help="Don't write the JSON build report next to the output")
+    parser.add_argument("--trace-memory", action="store_true", help="Record peak memory in the build report (slower)")
+    parser.add_argument("--no-checkpoint", action="store_true",
+                        help="Don't checkpoint the Wiktionary scan (an interrupted build then starts over)")
+    parser.add_argument("--cache-dir", nargs="?", const=DEFAULT_CACHE_DIR,
+                        help=f"Reuse Phase 1 scans across builds (default folder: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--cache-max-mb", type=int, default=DEFAULT_CACHE_MAX_MB,
+                        help="Evict the least recently used cached scans beyond this size")
+    parser.add_argument("--targets", help="JSON file of per-language settings: build every listed language "
+                                          f"({', '.join(LANGUAGE_PROFILES)}) from one scan of a Wiktionary dump")
+    args = parser.parse_args(argv)
+    workers = args.workers or os.cpu_count() or 1
+
+    if args.reduction_mode == 'reservoir' and args.sample_size is None:
+        parser.error("--reduction-mode reservoir requires --sample-size")
+
+    if args.targets:
+        if detect_source_format(args.source) != 'wiktionary':
+            parser.error("--targets needs a Wiktionary JSONL dump")
+        os.makedirs(args.output, exist_ok=True)
+        try:
+            targets = load_targets(args.targets, args.output, args.format, args.min_len, args.max_len, args.exclude)
+            results = build_dictionaries(args.source, targets, args.reduction, not args.pretty, args.seed, workers,
+                                         not args.no_prefilter, args.reduction_mode, args.sample_size, args.stratify,
+                                         args.format, not args.no_report, args.trace_memory, args.cache_dir,
+                                         args.cache_max_mb)
+        except ValueError as e:
+            print(f"ERROR: {e}", file=sys.stderr)
+            return 1
+        return 1 if any(result['status'] == 'empty' for result in results.values()) else 0
+
+    try:
+        build_dictionary(args.source, args.output, args.exclude, args.min_len, args.max_len,
+                         args.reduction, not args.pretty, args.seed, workers, not args.no_prefilter,
+                         args.reduction_mode, args.sample_size, args.stratify, args.format, args.language,
+                         not args.no_report, args.trace_memory, args.cache_dir, args.cache_max_mb,
+                         not args.no_checkpoint)
+    except EmptyDictionaryError as e:
+        print(f"ERROR: {e} No output file was generated.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
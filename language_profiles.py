@@ -0,0 +1,83 @@
+"""
+Language profiles shared by the build tools and the game.
+
+language_profiles.json declares, for every language a dictionary can be
+built in:
+
+    "romanian": {
+        "lang_code": "ro",
+        "letters": "ABCDEFGHIJKLMNOPQRSTUVWXYZĂÂÎȘȚ",
+        "fill_letters": "AĂÂBCDEFGHIÎJKLMNOPRSȘTȚUVWXYZ",
+        "normalize": {"Ş": "Ș", "Ţ": "Ț"}
+    }
+
+lang_code is the Wiktionary language code, letters are those a word may
+use, fill_letters (default: letters) those the game fills empty grid cells
+with, and normalize maps uppercase letters to their replacements; the
+lowercase forms of the map are added automatically. Words and definitions
+are brought to NFC, then normalized (so the cedilla and comma-below
+spellings of a Romanian word are one word), and words are uppercased.
+
+Each profile is compiled once: normalization is a single str.translate
+table and the alphabet check a single compiled fullmatch, so checking a word
+costs a few C-level calls however long it is. script.js reads the same file
+for the letters it fills empty grid cells with.
+"""
+import json
+import os
+import re
+import unicodedata
+
+PROFILES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'language_profiles.json')
+PROFILES_VERSION = 1
+
+
+class LanguageProfile:
+    """
+    One compiled entry of language_profiles.json (see the module docstring).
+
+    profile.matches(word) is the alphabet check: the compiled fullmatch of
+    the profile's letters, truthy if an uppercase word only uses them.
+    """
+    def __init__(self, name, lang_code, letters, fill_letters=None, normalize=None):
+        self.name = name
+        self.lang_code = lang_code
+        self.letters = letters
+        self.fill_letters = fill_letters or letters
+        self.normalize = dict(normalize or {})
+        table = dict(self.normalize)
+        table.update((source.lower(), target.lower()) for source, target in self.normalize.items())
+        self._table = str.maketrans(table)
+        self.matches = re.compile('[' + re.escape(letters) + ']+').fullmatch
+
+    def spec(self):
+        """The profile as declared, e.g. to key cached scans by it."""
+        return {'lang_code': self.lang_code, 'letters': self.letters, 'fill_letters': self.fill_letters,
+                'normalize': self.normalize}
+
+    def normalize_text(self, text):
+        """NFC plus the profile's replacements; case is kept (used for definitions)."""
+        text = unicodedata.normalize('NFC', text)
+        return text.translate(self._table) if self._table else text
+
+    def normalize_word(self, word):
+        """The form in which a word is checked, deduplicated and written."""
+        return self.normalize_text(word).upper()
+
+
+def load_profiles(path=PROFILES_PATH):
+    """Reads and compiles a language profiles file into {name: LanguageProfile}."""
+    with open(path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    if data.get('version') != PROFILES_VERSION:
+        raise ValueError(f"'{path}' is not a version {PROFILES_VERSION} language profiles file.")
+    profiles = {}
+    for name, entry in data['languages'].items():
+        if not entry.get('letters'):
+            raise ValueError(f"Language profile '{name}' in '{path}' has no letters.")
+        profiles[name] = LanguageProfile(name, entry['lang_code'], entry['letters'], entry.get('fill_letters'),
+                                         entry.get('normalize'))
+    return profiles
+
+
+LANGUAGE_PROFILES = load_profiles()
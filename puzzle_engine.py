@@ -0,0 +1,535 @@
+"""
+Offline puzzle engine: builds word search grids ahead of time and writes them
+as puzzle packs the game can load instead of generating grids in the browser.
+
+The placement rules are the ones of generatePuzzle in script.js: the words
+are placed longest first, two of them horizontally, two vertically and two
+diagonally, the rest in any of the 8 directions, and the empty cells are then
+filled with random letters of the language's alphabet.
+
+What makes it fast is that every valid start cell of a word is known up front.
+For each grid size, word length and direction, PlacementTable holds the cell
+indices of every in-bounds path into a flat (row-major) grid, so a placement
+attempt is a random pick from that list followed by a letter check. There are
+no out-of-bounds retries. When the random probes fail, every remaining path is
+tried in shuffled order before the word is declared unplaceable, so a grid
+attempt only fails when the word truly does not fit.
+
+Every finished grid is checked by GridVerifier: each word must appear exactly
+once in the 8 directions, or the filler letters (or an overlap) could spell a
+second copy that the game would accept instead of the stored location. Grids
+that fail are regenerated, and word selections where one word contains
+another (which can never pass) are re-picked.
+
+Every puzzle has its own seeded random stream ("<seed>:<language>:<mode>:<size>:<n>"),
+so a pack is reproducible and any single puzzle can be regenerated on its own:
+
+    python puzzle_engine.py puzzles --language english --mode standard --dictionary dictionary --count 2000 --seed 7
+    python puzzle_engine.py puzzles --language romanian --mode bible --bible-index bible_data_index.json --sizes 12-14
+
+Packs are written to <output>/<language>/<mode>/<size>.json and listed in
+<output>/manifest.json.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from aho_corasick import AhoCorasick
+from dict_pipeline import load_packed
+from language_profiles import LANGUAGE_PROFILES
+
+MIN_GRID_SIZE = 10
+MAX_GRID_SIZE = 16
+WORDS_PER_PUZZLE = 10
+GRID_ATTEMPTS = 50
+RANDOM_PROBES = 100
+WORD_PICK_ATTEMPTS = 20
+GRID_VERIFY_ATTEMPTS = 20
+MODES = ('standard', 'bible')
+PACK_VERSION = 1
+
+# Filler letters per language; script.js reads the same language_profiles.json.
+ALPHABETS = {name: profile.fill_letters for name, profile in LANGUAGE_PROFILES.items()}
+
+# (x, y) steps as in script.js: x moves along a row, y down the rows.
+DIRECTIONS = {
+    'horizontal': ((1, 0), (-1, 0)),
+    'vertical': ((0, 1), (0, -1)),
+    'diagonal': ((1, 1), (-1, -1), (1, -1), (-1, 1)),
+}
+ALL_DIRECTIONS = DIRECTIONS['horizontal'] + DIRECTIONS['vertical'] + DIRECTIONS['diagonal']
+REQUIRED_PLACEMENTS = (('horizontal', 2), ('vertical', 2), ('diagonal', 2))
+
+
+class PuzzleGenerationError(RuntimeError):
+    """Raised when no valid puzzle can be built from the available words."""
+
+
+class PlacementTable:
+    """
+    Every in-bounds path of a grid, grouped by word length and direction.
+
+    paths(length, direction) returns a list of (row, col, cells) tuples, where
+    cells are the flat indices (row * size + col) the word's letters occupy.
+    Paths are built on first use and cached, since a pack only ever asks for
+    a handful of lengths.
+    """
+    def __init__(self, size):
+        self.size = size
+        self._paths = {}
+
+    def paths(self, length, direction):
+        key = (length, direction)
+        if key not in self._paths:
+            dx, dy = direction
+            size = self.size
+            # A start cell is valid when the last letter still lands inside the grid.
+            rows = range(max(0, -dy * (length - 1)), min(size, size - dy * (length - 1)))
+            cols = range(max(0, -dx * (length - 1)), min(size, size - dx * (length - 1)))
+            step = dy * size + dx
+            self._paths[key] = [
+                (r, c, tuple(range(r * size + c, r * size + c + step * length, step)))
+                for r in rows for c in cols
+            ]
+        return self._paths[key]
+
+
+def _fits(cells, word, path):
+    for index, letter in zip(path, word):
+        current = cells[index]
+        if current is not None and current != letter:
+            return False
+    return True
+
+
+def place_word(cells, word, directions, table, rng, locations):
+    """
+    Places word along one of directions if any path fits, like placeWordInGrid.
+
+    First up to RANDOM_PROBES random (direction, start) picks are tried, then
+    all remaining paths in shuffled order.
+
+    Returns:
+        bool: True if the word was placed (cells and locations are updated).
+    """
+    candidates = [(direction, table.paths(len(word), direction)) for direction in directions]
+    candidates = [(direction, paths) for direction, paths in candidates if paths]
+    if not candidates:
+        return False
+
+    chosen = None
+    for _ in range(RANDOM_PROBES):
+        direction, paths = rng.choice(candidates)
+        path = rng.choice(paths)
+        if _fits(cells, word, path[2]):
+            chosen = direction, path
+            break
+    if chosen is None:
+        remaining = [(direction, path) for direction, paths in candidates for path in paths]
+        rng.shuffle(remaining)
+        chosen = next(((direction, path) for direction, path in remaining if _fits(cells, word, path[2])), None)
+        if chosen is None:
+            return False
+
+    (dx, dy), (r, c, path) = chosen
+    for index, letter in zip(path, word):
+        cells[index] = letter
+    locations[word] = {'r': r, 'c': c, 'dir': {'x': dx, 'y': dy}}
+    return True
+
+
+def generate_grid(words, size, alphabet, rng, table=None):
+    """
+    Builds one grid for words, following generatePuzzle in script.js.
+
+    Returns:
+        tuple: (rows, locations), where rows is a list of size strings of
+               size letters and locations maps every word to
+               {"r", "c", "dir": {"x", "y"}}; or None if the words could not
+               all be placed in GRID_ATTEMPTS attempts.
+    """
+    table = table or PlacementTable(size)
+    words_to_place = sorted(words, key=len, reverse=True)
+    remaining_words = WORDS_PER_PUZZLE - sum(count for _, count in REQUIRED_PLACEMENTS)
+
+    for _ in range(GRID_ATTEMPTS):
+        cells = [None] * (size * size)
+        locations = {}
+        available_words = list(words_to_place)
+        placements = [DIRECTIONS[kind] for kind, count in REQUIRED_PLACEMENTS for _ in range(count)]
+        placements += [ALL_DIRECTIONS] * remaining_words
+        success = True
+        for directions in placements:
+            if not available_words:
+                break
+            if not place_word(cells, available_words.pop(0), directions, table, rng, locations):
+                success = False
+                break
+        if not success:
+            continue
+        for index, letter in enumerate(cells):
+            if letter is None:
+                cells[index] = rng.choice(alphabet)
+        return [''.join(cells[row * size:(row + 1) * size]) for row in range(size)], locations
+    return None
+
+
+class GridVerifier:
+    """
+    Counts how often each target word can be selected in a grid, in all 8 directions.
+
+    The rows, columns and both kinds of diagonals of a size x size grid are
+    joined into one text, with a newline (which no word contains) after every
+    line, and the words plus their reversals are matched in a single
+    Aho–Corasick pass. Reading a line backwards is the same as matching the
+    reversed word forwards, so four line directions cover all eight. An
+    occurrence is identified by its two end cells, so a palindrome matched
+    both ways still counts once, just as the game accepts a selection in
+    either direction.
+    """
+    def __init__(self, size):
+        self.size = size
+        lines = [[r * size + c for c in range(size)] for r in range(size)]
+        lines += [[r * size + c for r in range(size)] for c in range(size)]
+        lines += [[r * size + r + k for r in range(size) if 0 <= r + k < size] for k in range(1 - size, size)]
+        lines += [[r * size + k - r for r in range(size) if 0 <= k - r < size] for k in range(2 * size - 1)]
+        # Text position -> flat cell index (-1 for the separators)
+        self.cells = [cell for line in lines for cell in line + [-1]]
+
+    def text(self, rows):
+        flat = ''.join(rows)
+        return ''.join(flat[cell] if cell >= 0 else '\n' for cell in self.cells)
+
+    def count_occurrences(self, rows, words):
+        """Returns {word: number of distinct occurrences in the grid}."""
+        words = list(words)
+        matcher = AhoCorasick(words + [word[::-1] for word in words])
+        found = {word: set() for word in words}
+        for end, index in matcher.iter_matches(self.text(rows)):
+            word = words[index % len(words)]
+            first, last = self.cells[end - len(word) + 1], self.cells[end]
+            found[word].add((min(first, last), max(first, last)))
+        return {word: len(ends) for word, ends in found.items()}
+
+    def problems(self, rows, words):
+        """Returns {word: count} for every word that does not appear exactly once."""
+        return {word: count for word, count in self.count_occurrences(rows, words).items() if count != 1}
+
+
+def _contains_another(words):
+    # A word inside another one (either way round) always shows up twice.
+    return any(a != b and (a in b or a[::-1] in b) for a in words for b in words)
+
+
+def _is_bmp(word):
+    # The game stores one UTF-16 code unit per cell, so astral letters cannot be placed.
+    return all(ord(ch) < 0x10000 for ch in word)
+
+
+def load_dictionary_words(path, language):
+    """
+    Loads the words of a dictionary built by dict_pipeline.py, grouped by length.
+
+    Args:
+        path (str): A plain {word: definition} JSON file, or a dictionary folder
+                    whose manifest.json lists language as shards or a packed file.
+        language (str): The language to read from a manifest.
+
+    Returns:
+        dict: {length: [words]}, each list in a stable (sorted) order.
+    """
+    words = []
+    if os.path.isdir(path):
+        with open(os.path.join(path, 'manifest.json'), 'r', encoding='utf-8') as f:
+            entry = json.load(f)['languages'][language]
+        if entry.get('format') == 'packed':
+            packed = load_packed(os.path.join(path, entry['file']))
+            words = [word for length, info in packed.lengths.items() for word in
+                     (packed.word(length, i) for i in range(info['count']))]
+        else:
+            for shard in entry['shards'].values():
+                with open(os.path.join(path, shard['file']), 'r', encoding='utf-8') as f:
+                    words.extend(json.load(f))
+    else:
+        with open(path, 'r', encoding='utf-8') as f:
+            words = list(json.load(f))
+
+    by_length = {}
+    for word in words:
+        if _is_bmp(word):
+            by_length.setdefault(len(word), []).append(word)
+    return {length: sorted(bucket) for length, bucket in by_length.items()}
+
+
+def load_bible_chapters(index_path, language):
+    """
+    Loads the per-chapter candidate words written by create_bible_json.py.
+
+    Returns:
+        list: (book, chapter, {word: verse}) for every chapter, in file order.
+    """
+    with open(index_path, 'r', encoding='utf-8') as f:
+        books = json.load(f)[language]
+    return [(book, chapter, {word: verse for word, verse in words.items() if _is_bmp(word)})
+            for book, chapters in books.items() for chapter, words in chapters.items()]
+
+
+class WordSource:
+    """Picks the words of one puzzle for a language, mode and grid size."""
+    def __init__(self, mode, size, dictionary_words=None, bible_chapters=None):
+        self.mode = mode
+        if mode == 'standard':
+            self.buckets = [bucket for length, bucket in sorted(dictionary_words.items()) if length <= size]
+            self.total = sum(len(bucket) for bucket in self.buckets)
+            if self.total < WORDS_PER_PUZZLE:
+                raise PuzzleGenerationError(f"Only {self.total} dictionary words fit a {size}x{size} grid.")
+        else:
+            self.chapters = []
+            for book, chapter, words in bible_chapters:
+                eligible = sorted(word for word in words if len(word) <= size)
+                if len(eligible) >= WORDS_PER_PUZZLE:
+                    self.chapters.append((book, chapter, words, eligible))
+            if not self.chapters:
+                raise PuzzleGenerationError(f"No Bible chapter has {WORDS_PER_PUZZLE} words that fit a {size}x{size} grid.")
+
+    def pick(self, rng):
+        """
+        Returns (words, extra): ten distinct words and the puzzle fields that go
+        with them ({"book", "chapter", "verses"} in Bible mode, {} otherwise).
+        """
+        if self.mode == 'standard':
+            words = []
+            for index in rng.sample(range(self.total), WORDS_PER_PUZZLE):
+                for bucket in self.buckets:
+                    if index < len(bucket):
+                        words.append(bucket[index])
+                        break
+                    index -= len(bucket)
+            return words, {}
+        book, chapter, verses, eligible = rng.choice(self.chapters)
+        words = rng.sample(eligible, WORDS_PER_PUZZLE)
+        return words, {'book': book, 'chapter': chapter, 'verses': {word: verses[word] for word in words}}
+
+
+def puzzle_rng(seed, language, mode, size, number):
+    return random.Random(f"{seed}:{language}:{mode}:{size}:{number}")
+
+
+def generate_puzzle(source, size, alphabet, rng, table=None, verifier=None, stats=None):
+    """
+    Picks words and builds a verified grid for them. Grids where a word does
+    not appear exactly once are regenerated; word selections that cannot be
+    placed, or where one word contains another, are re-picked.
+
+    Args:
+        stats (Counter): Optional; counts 'rejected_grids' and 'overlapping_selections'.
+
+    Returns:
+        dict: {"words", "grid", "locations"} plus the word source's extra fields.
+    """
+    table = table or PlacementTable(size)
+    verifier = verifier or GridVerifier(size)
+    stats = stats if stats is not None else Counter()
+    for _ in range(WORD_PICK_ATTEMPTS):
+        words, extra = source.pick(rng)
+        if _contains_another(words):
+            stats['overlapping_selections'] += 1
+            continue
+        for _ in range(GRID_VERIFY_ATTEMPTS):
+            result = generate_grid(words, size, alphabet, rng, table)
+            if result is None:
+                break
+            rows, locations = result
+            if not verifier.problems(rows, words):
+                return dict(words=words, grid=rows, locations=locations, **extra)
+            stats['rejected_grids'] += 1
+    raise PuzzleGenerationError(f"Could not build a verified {size}x{size} grid for any word selection.")
+
+
+def generate_pack(source, language, mode, size, count, seed, alphabet=None, stats=None):
+    """Yields count puzzles; puzzle n always comes from the stream puzzle_rng(seed, ..., n)."""
+    alphabet = alphabet or ALPHABETS[language]
+    table = PlacementTable(size)
+    verifier = GridVerifier(size)
+    for number in range(count):
+        yield generate_puzzle(source, size, alphabet, puzzle_rng(seed, language, mode, size, number),
+                              table, verifier, stats)
+
+
+def verify_pack(path):
+    """
+    Re-checks every puzzle of a pack file: each word must appear exactly once
+    and read correctly from its stored location.
+
+    Returns:
+        tuple: (puzzles checked, [(puzzle number, {word: problem}), ...]).
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        pack = json.load(f)
+    verifier = GridVerifier(pack['gridSize'])
+    failures = []
+    for number, puzzle in enumerate(pack['puzzles']):
+        rows = puzzle['grid']
+        problems = {word: f"{count} occurrences" for word, count in verifier.problems(rows, puzzle['words']).items()}
+        for word in puzzle['words']:
+            location = puzzle['locations'].get(word)
+            if location is None:
+                problems[word] = "no location"
+                continue
+            r, c, dx, dy = location['r'], location['c'], location['dir']['x'], location['dir']['y']
+            if ''.join(rows[r + i * dy][c + i * dx] for i in range(len(word))) != word:
+                problems[word] = "not at its location"
+        if problems:
+            failures.append((number, problems))
+    return len(pack['puzzles']), failures
+
+
+def write_pack(puzzles, output_dir, language, mode, size, seed):
+    """
+    Writes a pack to <output_dir>/<language>/<mode>/<size>.json (minified, via a
+    .part file) and returns its manifest entry {"file", "count", "bytes", "seed"}.
+    """
+    relative = f"{language}/{mode}/{size}.json"
+    path = os.path.join(output_dir, *relative.split('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pack = {'version': PACK_VERSION, 'language': language, 'mode': mode,
+            'gridSize': size, 'seed': seed, 'puzzles': puzzles}
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(pack, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(path + '.part', path)
+    return {'file': relative, 'count': len(puzzles), 'bytes': os.path.getsize(path), 'seed': seed}
+
+
+def update_pack_manifest(output_dir, language, mode, entries):
+    """Records {size: entry} for language/mode in <output_dir>/manifest.json, keeping everything else."""
+    manifest_path = os.path.join(output_dir, 'manifest.json')
+    manifest = {'version': PACK_VERSION, 'languages': {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    modes = manifest['languages'].setdefault(language, {})
+    sizes = modes.setdefault(mode, {})
+    for size, entry in entries.items():
+        sizes[str(size)] = entry
+    modes[mode] = dict(sorted(sizes.items(), key=lambda item: int(item[0])))
+    with open(manifest_path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(manifest_path + '.part', manifest_path)
+
+
+def build_pack(language, mode, size, count, seed, dictionary_words=None, bible_chapters=None, output_dir=None):
+    """Generates (and, with output_dir, writes) one pack. Returns (size, entry or puzzles, seconds, stats)."""
+    started = time.perf_counter()
+    stats = Counter()
+    source = WordSource(mode, size, dictionary_words, bible_chapters)
+    puzzles = list(generate_pack(source, language, mode, size, count, seed, stats=stats))
+    if output_dir is None:
+        return size, puzzles, time.perf_counter() - started, stats
+    return size, write_pack(puzzles, output_dir, language, mode, size, seed), time.perf_counter() - started, stats
+
+
+def build_packs(output_dir, language, mode, sizes, count, seed, dictionary=None, bible_index=None,
+                workers=1, log=print):
+    """
+    Generates one pack per grid size and registers them in the manifest.
+    Sizes are spread over worker processes when workers > 1.
+
+    Returns:
+        dict: {size: manifest entry}.
+    """
+    if mode == 'standard':
+        dictionary_words, bible_chapters = load_dictionary_words(dictionary, language), None
+    else:
+        dictionary_words, bible_chapters = None, load_bible_chapters(bible_index, language)
+
+    entries = {}
+    jobs = [(language, mode, size, count, seed, dictionary_words, bible_chapters, output_dir) for size in sizes]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            results = list(executor.map(build_pack, *zip(*jobs)))
+    else:
+        results = [build_pack(*job) for job in jobs]
+    for size, entry, seconds, stats in results:
+        entries[size] = entry
+        log(f"{language}/{mode} {size}x{size}: {entry['count']} puzzles, {entry['bytes']:,} bytes "
+            f"in {seconds:.2f}s ({entry['count'] / max(seconds, 1e-9):,.0f} puzzles/s); "
+            f"{stats['rejected_grids']} grids regenerated after verification, "
+            f"{stats['overlapping_selections']} overlapping word selections re-picked")
+    update_pack_manifest(output_dir, language, mode, entries)
+    return entries
+
+
+def check_packs(output_dir, language, mode, sizes, log=print):
+    """
+    Runs verify_pack over the packs in the manifest for language, mode and sizes.
+
+    Returns:
+        int: The number of puzzles that failed.
+    """
+    with open(os.path.join(output_dir, 'manifest.json'), 'r', encoding='utf-8') as f:
+        packs = json.load(f)['languages'].get(language, {}).get(mode, {})
+    failed = 0
+    for size in sizes:
+        entry = packs.get(str(size))
+        if entry is None:
+            log(f"{language}/{mode} {size}x{size}: no pack")
+            continue
+        started = time.perf_counter()
+        checked, failures = verify_pack(os.path.join(output_dir, *entry['file'].split('/')))
+        seconds = time.perf_counter() - started
+        log(f"{language}/{mode} {size}x{size}: {checked} puzzles checked in {seconds:.2f}s "
+            f"({checked / max(seconds, 1e-9):,.0f} puzzles/s), {len(failures)} failed")
+        for number, problems in failures:
+            log(f"  puzzle {number}: " + ", ".join(f"{word} ({problem})" for word, problem in problems.items()))
+        failed += len(failures)
+    return failed
+
+
+def _parse_sizes(text):
+    low, _, high = text.partition('-')
+    sizes = range(int(low), int(high or low) + 1)
+    if not sizes or sizes[0] < MIN_GRID_SIZE or sizes[-1] > MAX_GRID_SIZE:
+        raise argparse.ArgumentTypeError(f"grid sizes must be within {MIN_GRID_SIZE}-{MAX_GRID_SIZE}")
+    return list(sizes)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate seeded word search puzzle packs for the game.")
+    parser.add_argument("output", help="Puzzle pack folder (the game reads puzzles/ next to index.html)")
+    parser.add_argument("--language", required=True, choices=sorted(ALPHABETS))
+    parser.add_argument("--mode", choices=MODES, default='standard')
+    parser.add_argument("--dictionary", help="Dictionary JSON file or folder with manifest.json (standard mode)")
+    parser.add_argument("--bible-index", help="bible_data_index.json written by create_bible_json.py (bible mode)")
+    parser.add_argument("--sizes", type=_parse_sizes, default=_parse_sizes(f"{MIN_GRID_SIZE}-{MAX_GRID_SIZE}"),
+                        help=f"Grid size or range, e.g. 13 or 10-16 (default {MIN_GRID_SIZE}-{MAX_GRID_SIZE})")
+    parser.add_argument("--count", type=int, default=1000, help="Puzzles per grid size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="Worker processes, one grid size each (0 = one per CPU)")
+    parser.add_argument("--check", action="store_true",
+                        help="Only verify the existing packs (one occurrence per word, stored locations)")
+    args = parser.parse_args(argv)
+
+    if args.check:
+        return 1 if check_packs(args.output, args.language, args.mode, args.sizes) else 0
+
+    if args.mode == 'standard' and not args.dictionary:
+        parser.error("--mode standard requires --dictionary")
+    if args.mode == 'bible' and not args.bible_index:
+        parser.error("--mode bible requires --bible-index")
+
+    try:
+        build_packs(args.output, args.language, args.mode, args.sizes, args.count, args.seed,
+                    args.dictionary, args.bible_index, args.workers or os.cpu_count() or 1)
+    except PuzzleGenerationError as e:
+        print(f"ERROR: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -35,10 +35,15 @@ document.addEventListener('DOMContentLoaded', () => {
         versionInfoEl = document.getElementById('version-info');
 
     // --- 2. GAME STATE & OTHER VARIABLES ---
-    let gameState = {}, puzzleTimer, bibleData = {}, standardDictionaries = {};
+    let gameState = {}, puzzleTimer, bibleData = {}, bibleIndex = {}, bibleManifest = null, standardDictionaries = {}, dictionaryManifest = null, puzzleManifest = null;
     const colorPalette = ['--found-color-1', '--found-color-2', '--found-color-3', '--found-color-4', '--found-color-5', '--found-color-6', '--found-color-7', '--found-color-8', '--found-color-9', '--found-color-10'];
     let wordColorMap = {};
+    // Filler letters per language; replaced by language_profiles.json (shared with the build tools) when it loads.
     const alphabet = { english: "ABCDEFGHIJKLMNOPQRSTUVWXYZ", romanian: "AĂÂBCDEFGHIÎJKLMNOPRSȘTȚUVWXYZ" };
+    const DICTIONARY_DIR = 'dictionary/';
+    const BIBLE_DIR = 'bible/';
+    const PUZZLE_DIR = 'puzzles/';
+    const legacyDictionaryFiles = { english: 'english_dictionary.json', romanian: 'romanian_dictionary.json' };
 
     // --- SOUND ENGINE (Unchanged) ---
 // --- SOUND ENGINE (UPDATED) ---
@@ -134,16 +139,191 @@ document.addEventListener('DOMContentLoaded', () => {
     }
     async function initializeData() {
         try {
-            const [bibleRes, dictEngRes, dictRomRes] = await Promise.all([ fetch('bible_data.json'), fetch('english_dictionary.json'), fetch('romanian_dictionary.json'), ]);
-            if (!bibleRes.ok) throw new Error(`Bible data fetch failed`); if (!dictEngRes.ok) throw new Error(`English dictionary fetch failed`); if (!dictRomRes.ok) throw new Error(`Romanian dictionary fetch failed`);
-            bibleData = await bibleRes.json(); standardDictionaries.english = await dictEngRes.json(); standardDictionaries.romanian = await dictRomRes.json();
-            console.log("All 3 required game data files successfully loaded.");
+            const [bibleManifestRes, manifestRes, puzzleManifestRes, profilesRes] = await Promise.all([ fetch(BIBLE_DIR + 'manifest.json'), fetch(DICTIONARY_DIR + 'manifest.json'), fetch(PUZZLE_DIR + 'manifest.json'), fetch('language_profiles.json') ]);
+            if (profilesRes.ok) {
+                const profiles = await profilesRes.json();
+                for (const [language, profile] of Object.entries(profiles.languages)) alphabet[language] = profile.fill_letters || profile.letters;
+            }
+            if (bibleManifestRes.ok) {
+                // Sharded Bible (create_bible_json.py): chapters are fetched as they are played.
+                bibleManifest = await bibleManifestRes.json();
+            } else {
+                const [bibleRes, bibleIndexRes] = await Promise.all([ fetch('bible_data.json'), fetch('bible_data_index.json') ]);
+                if (!bibleRes.ok) throw new Error(`Bible data fetch failed`);
+                bibleData = await bibleRes.json();
+                // Optional: per-chapter candidate words precomputed by create_bible_json.py.
+                if (bibleIndexRes.ok) bibleIndex = await bibleIndexRes.json();
+            }
+            // Sharded dictionaries (dict_pipeline.py --format shards) are loaded per word length on demand.
+            // Any language missing from the manifest falls back to its full dictionary file.
+            dictionaryManifest = manifestRes.ok ? await manifestRes.json() : { languages: {} };
+            const legacyLanguages = Object.keys(legacyDictionaryFiles).filter(language => !dictionaryManifest.languages[language]);
+            await Promise.all(legacyLanguages.map(async language => {
+                const res = await fetch(legacyDictionaryFiles[language]);
+                if (!res.ok) throw new Error(`${language} dictionary fetch failed`);
+                bucketDictionary(language, await res.json());
+            }));
+            // Optional: ready-made grids from puzzle_engine.py, fetched per language, mode and grid size.
+            if (puzzleManifestRes.ok) puzzleManifest = await puzzleManifestRes.json();
+            console.log(`Game data loaded. Sharded dictionaries: ${Object.keys(dictionaryManifest.languages).join(', ') || 'none'}.`);
             initGameSession();
         } catch (error) { console.error("CRITICAL ERROR: Could not load game data files.", error); const unlockOverlay = document.getElementById('sound-unlock-overlay'); unlockOverlay.innerHTML = `<div id="sound-unlock-content"><h1>Error</h1><p>Could not load game data. Please ensure JSON files are correct and refresh the page.</p></div>`; }
     }
 
+    // --- BIBLE LOADING ---
+    const pendingBibleShards = {};
+    function setChapter(target, language, book, chapterNum, value) {
+        if (!target[language]) target[language] = {};
+        if (!target[language][book]) target[language][book] = {};
+        target[language][book][chapterNum] = value;
+    }
+    function getBibleChapters(language) {
+        const chapters = [];
+        const books = bibleManifest ? bibleManifest.languages[language] : bibleData[language];
+        for (const book in books || {}) {
+            for (const chapterNum in (bibleManifest ? books[book].chapters : books[book])) chapters.push({ book, chapterNum });
+        }
+        return chapters;
+    }
+    async function ensureBibleChapterLoaded(language, book, chapterNum) {
+        if (!bibleManifest || (bibleData[language] && bibleData[language][book] && bibleData[language][book][chapterNum])) return;
+        const file = bibleManifest.languages[language][book].chapters[chapterNum];
+        if (!pendingBibleShards[file]) {
+            pendingBibleShards[file] = fetch(BIBLE_DIR + file)
+                .then(res => { if (!res.ok) throw new Error(`Bible shard ${file} fetch failed`); return res.json(); })
+                .then(shard => {
+                    for (const chapter in shard) {
+                        setChapter(bibleData, language, book, chapter, shard[chapter].verses);
+                        setChapter(bibleIndex, language, book, chapter, shard[chapter].words);
+                    }
+                })
+                .catch(error => { delete pendingBibleShards[file]; throw error; });
+        }
+        await pendingBibleShards[file];
+    }
+    function preloadSavedLevelData() {
+        // A resumed level still needs its chapter (verse display) or dictionary shards (definitions).
+        const logError = error => console.error("Failed to load data for the saved level.", error);
+        if (!gameState.bibleMode) { ensureDictionaryLoaded(gameState.currentLanguage, gameState.gridSize).catch(logError); return; }
+        const verseInfo = gameState.currentLevelData && Object.values(gameState.currentLevelData.verseMap || {})[0];
+        if (verseInfo) ensureBibleChapterLoaded(gameState.currentLanguage, verseInfo.book, verseInfo.chapter).catch(logError);
+    }
+
+    // --- DICTIONARY LOADING ---
+    // Each language holds one bucket per word length: { count, wordAt(i), definitionOf(word) }.
+    const pendingShards = {};
+    function addDictionaryBucket(language, length, definitions) {
+        if (!standardDictionaries[language]) standardDictionaries[language] = {};
+        const words = Object.keys(definitions);
+        standardDictionaries[language][length] = { count: words.length, wordAt: i => words[i], definitionOf: word => definitions[word] };
+    }
+    // Packed files (dict_pipeline.py --format packed) are read in place: words of one length sit
+    // back to back in a sorted block, so both picking and lookup are index arithmetic.
+    function addPackedBuckets(language, packed) {
+        if (!standardDictionaries[language]) standardDictionaries[language] = {};
+        for (const length in packed.lengths) {
+            const { offset, count, index } = packed.lengths[length];
+            const width = parseInt(length) + 1;
+            const wordAt = i => packed.words.substr(offset + i * width, width - 1);
+            const definitionOf = word => {
+                let lo = 0, hi = count;
+                while (lo < hi) { const mid = (lo + hi) >> 1; if (wordAt(mid) < word) lo = mid + 1; else hi = mid; }
+                if (lo === count || wordAt(lo) !== word) return undefined;
+                return packed.definitions.slice(packed.definitionOffsets[index + lo], packed.definitionOffsets[index + lo + 1]);
+            };
+            standardDictionaries[language][length] = { count, wordAt, definitionOf };
+        }
+    }
+    function bucketDictionary(language, dictionary) {
+        const byLength = {};
+        for (const word in dictionary) {
+            if (!byLength[word.length]) byLength[word.length] = {};
+            byLength[word.length][word] = dictionary[word];
+        }
+        for (const length in byLength) addDictionaryBucket(language, length, byLength[length]);
+    }
+    async function ensureDictionaryLoaded(language, gridSize) {
+        const languageManifest = dictionaryManifest && dictionaryManifest.languages[language];
+        if (!languageManifest) return;
+        if (languageManifest.format === 'packed') {
+            if (!pendingShards[language]) {
+                pendingShards[language] = fetch(DICTIONARY_DIR + languageManifest.file)
+                    .then(res => { if (!res.ok) throw new Error(`Packed dictionary ${language} fetch failed`); return res.json(); })
+                    .then(packed => addPackedBuckets(language, packed))
+                    .catch(error => { delete pendingShards[language]; throw error; });
+            }
+            return pendingShards[language];
+        }
+        const loads = [];
+        for (const length in languageManifest.shards) {
+            if (parseInt(length) > gridSize) continue;
+            const key = `${language}/${length}`;
+            if (standardDictionaries[language] && standardDictionaries[language][length]) continue;
+            if (!pendingShards[key]) {
+                pendingShards[key] = fetch(DICTIONARY_DIR + languageManifest.shards[length].file)
+                    .then(res => { if (!res.ok) throw new Error(`Dictionary shard ${key} fetch failed`); return res.json(); })
+                    .then(definitions => addDictionaryBucket(language, length, definitions))
+                    .catch(error => { delete pendingShards[key]; throw error; });
+            }
+            loads.push(pendingShards[key]);
+        }
+        await Promise.all(loads);
+    }
+    function lookupDefinition(language, word) {
+        const bucket = standardDictionaries[language] && standardDictionaries[language][word.length];
+        return bucket ? bucket.definitionOf(word) : undefined;
+    }
+
+    // --- PUZZLE PACKS ---
+    // A level takes a precomputed puzzle when puzzles/manifest.json has a pack for its
+    // language, mode and grid size; otherwise the grid is generated here as before.
+    const pendingPacks = {};
+    function getPuzzlePackEntry(language, mode, gridSize) {
+        const modes = puzzleManifest && puzzleManifest.languages[language];
+        return modes && modes[mode] && modes[mode][gridSize];
+    }
+    async function takePackedPuzzle() {
+        const entry = getPuzzlePackEntry(gameState.currentLanguage, gameState.bibleMode ? 'bible' : 'standard', gameState.gridSize);
+        if (!entry) return null;
+        if (!pendingPacks[entry.file]) {
+            pendingPacks[entry.file] = fetch(PUZZLE_DIR + entry.file)
+                .then(res => { if (!res.ok) throw new Error(`Puzzle pack ${entry.file} fetch failed`); return res.json(); })
+                .catch(error => { delete pendingPacks[entry.file]; throw error; });
+        }
+        try {
+            const pack = await pendingPacks[entry.file];
+            return pack.puzzles[Math.floor(Math.random() * pack.puzzles.length)];
+        } catch (error) {
+            console.error("Failed to load the puzzle pack, generating the grid instead.", error);
+            return null;
+        }
+    }
+    async function startPackedLevel(puzzle) {
+        gameTitleEl.textContent = "Bible Word Search";
+        try {
+            // The verse display and the definitions still come from the regular data files.
+            if (gameState.bibleMode) await ensureBibleChapterLoaded(gameState.currentLanguage, puzzle.book, puzzle.chapter);
+            else await ensureDictionaryLoaded(gameState.currentLanguage, gameState.gridSize);
+        } catch (error) {
+            console.error("Failed to load data for the packed puzzle.", error);
+            alert("Could not load the game data. Please check your connection and try again.");
+            return;
+        }
+        gameState.words = [...puzzle.words];
+        gameState.wordLocations = { ...puzzle.locations };
+        gameState.grid = puzzle.grid.map(row => row.split(''));
+        if (gameState.bibleMode) {
+            puzzle.words.forEach(word => {
+                gameState.currentLevelData.verseMap[word] = { book: puzzle.book, chapter: puzzle.chapter, verse: puzzle.verses[word] };
+            });
+        }
+        renderGame();
+        startTimer();
+        saveState();
+    }
+
     // --- 4. GAME SESSION & STATE LOGIC (Unchanged) ---
-    function initGameSession() { const savedGridSize = localStorage.getItem('wordSearchGridSize') || 13; gridSizeSlider.value = savedGridSize; gridSizeValue.textContent = `${savedGridSize} x ${savedGridSize}`; const savedState = loadState(); if (savedState) { console.log("Found saved state. Resuming game."); gameState = savedState; bibleModeCheckbox.checked = gameState.bibleMode; langEnBtn.classList.toggle('active', gameState.currentLanguage === 'english'); langRoBtn.classList.toggle('active', gameState.currentLanguage === 'romanian'); renderGame(); if (gameState.foundWords.length === gameState.words.length) { completionMessageEl.classList.remove('hidden'); newGameBtnText.textContent = "Next Level"; } else { startTimer(); } } else { console.log("No saved state found. Starting new game with defaults."); createNewGame('romanian', true, 0); } }
+    function initGameSession() { const savedGridSize = localStorage.getItem('wordSearchGridSize') || 13; gridSizeSlider.value = savedGridSize; gridSizeValue.textContent = `${savedGridSize} x ${savedGridSize}`; const savedState = loadState(); if (savedState) { console.log("Found saved state. Resuming game."); gameState = savedState; bibleModeCheckbox.checked = gameState.bibleMode; langEnBtn.classList.toggle('active', gameState.currentLanguage === 'english'); langRoBtn.classList.toggle('active', gameState.currentLanguage === 'romanian'); renderGame(); preloadSavedLevelData(); if (gameState.foundWords.length === gameState.words.length) { completionMessageEl.classList.remove('hidden'); newGameBtnText.textContent = "Next Level"; } else { startTimer(); } } else { console.log("No saved state found. Starting new game with defaults."); createNewGame('romanian', true, 0); } }
     function saveState() { if (gameState) { localStorage.setItem('wordSearchGameState', JSON.stringify(gameState)); } }
     function loadState() { const savedStateJSON = localStorage.getItem('wordSearchGameState'); if (savedStateJSON) { try { return JSON.parse(savedStateJSON); } catch (e) { console.error("Failed to parse saved state, starting fresh.", e); localStorage.removeItem('wordSearchGameState'); return null; } } return null; }
     function saveHistory(levelData) { if (!levelData) return; let history = JSON.parse(localStorage.getItem('wordSearchHistory')) || []; history.push(levelData); localStorage.setItem('wordSearchHistory', JSON.stringify(history)); }
@@ -156,7 +336,22 @@ document.addEventListener('DOMContentLoaded', () => {
     function placeWordInGrid(grid, word, directionSet) { const shuffledDirections = directionSet.sort(() => 0.5 - Math.random()); for (let i = 0; i < 100; i++) { const dir = shuffledDirections[i % shuffledDirections.length]; const row = Math.floor(Math.random() * gameState.gridSize); const col = Math.floor(Math.random() * gameState.gridSize); if (canPlaceWord(grid, word, row, col, dir)) { for (let j = 0; j < word.length; j++) { grid[row + j * dir.y][col + j * dir.x] = word[j]; } gameState.wordLocations[word] = { r: row, c: col, dir: dir }; return true; } } return false; }
     function canPlaceWord(grid, word, row, col, dir) { for (let i = 0; i < word.length; i++) { let r = row + i * dir.y, c = col + i * dir.x; if (r < 0 || r >= gameState.gridSize || c < 0 || c >= gameState.gridSize) return false; if (grid[r][c] !== null && grid[r][c] !== word[i]) return false; } return true; }
     function fillEmptyCells(grid) { const letters = alphabet[gameState.currentLanguage]; for (let r = 0; r < gameState.gridSize; r++) { for (let c = 0; c < gameState.gridSize; c++) { if (grid[r][c] === null) grid[r][c] = letters[Math.floor(Math.random() * letters.length)]; } } }
-    function getWordsForPuzzle(count) { const dictionary = standardDictionaries[gameState.currentLanguage]; if (!dictionary) return []; const allWords = Object.keys(dictionary); const validWords = allWords.filter(word => word.length <= gameState.gridSize); let shuffled = validWords.sort(() => 0.5 - Math.random()); return shuffled.slice(0, count); }
+    function getWordsForPuzzle(count) {
+        const buckets = standardDictionaries[gameState.currentLanguage];
+        if (!buckets) return [];
+        // Pick random positions across the eligible length buckets instead of enumerating every key.
+        const eligible = Object.keys(buckets).filter(length => parseInt(length) <= gameState.gridSize).map(length => buckets[length]);
+        const total = eligible.reduce((sum, bucket) => sum + bucket.count, 0);
+        const picked = new Set();
+        while (picked.size < Math.min(count, total)) {
+            let index = Math.floor(Math.random() * total);
+            for (const bucket of eligible) {
+                if (index < bucket.count) { picked.add(bucket.wordAt(index)); break; }
+                index -= bucket.count;
+            }
+        }
+        return [...picked];
+    }
     
     // --- 6. RENDERING (UPDATED) ---
     function renderGame() {
@@ -240,7 +435,7 @@ document.addEventListener('DOMContentLoaded', () => {
     function handleSelectionMove(e) { if (!isSelecting) return; e.preventDefault(); const targetCell = getCellFromEvent(e); if (targetCell && targetCell.classList.contains('grid-cell')) { highlightLine(selectionStartCell, targetCell); } }
     function handleSelectionEnd() { if (!isSelecting) return; isSelecting = false; const selectedWord = selectedCells.map(cell => cell.textContent).join(''); const reversedWord = selectedCells.map(cell => cell.textContent).reverse().join(''); if (gameState.words.includes(selectedWord) && !gameState.foundWords.includes(selectedWord)) { processFoundWord(selectedWord); } else if (gameState.words.includes(reversedWord) && !gameState.foundWords.includes(reversedWord)) { processFoundWord(reversedWord); } else { if (selectedCells.length > 1) sound.play('error'); selectedCells.forEach(cell => cell.classList.remove('selected')); } selectionStartCell = null; }
     function highlightLine(startCell, endCell) { document.querySelectorAll('.grid-cell.selected').forEach(c => c.classList.remove('selected')); selectedCells = []; const start = { r: parseInt(startCell.dataset.row), c: parseInt(startCell.dataset.col) }; const end = { r: parseInt(endCell.dataset.row), c: parseInt(endCell.dataset.col) }; const dR = end.r - start.r, dC = end.c - start.c; if (start.r === end.r || start.c === end.c || Math.abs(dR) === Math.abs(dC)) { const steps = Math.max(Math.abs(dR), Math.abs(dC)); const stepR = Math.sign(dR), stepC = Math.sign(dC); for (let i = 0; i <= steps; i++) { const cell = document.querySelector(`[data-row='${start.r + i * stepR}'][data-col='${start.c + i * stepC}']`); if (cell) { cell.classList.add('selected'); selectedCells.push(cell); } } } }
-    function processFoundWord(word) { if (gameState.foundWords.includes(word)) return; sound.play('correct'); const points = word.length * 10; gameState.foundWords.push(word); gameState.score += points; gameState.currentLevelData.pointsEarned += points; gameState.currentLevelData.wordsFound = gameState.foundWords.length; verseDisplayEl.classList.add('hidden'); definitionDisplayEl.classList.add('hidden'); if (gameState.bibleMode && gameState.currentLevelData.verseMap[word]) { const verseInfo = gameState.currentLevelData.verseMap[word]; const verseText = bibleData[gameState.currentLanguage][verseInfo.book][verseInfo.chapter][verseInfo.verse]; verseDisplayEl.innerHTML = `${verseInfo.book} ${verseInfo.chapter}:${verseInfo.verse} - ${verseText.replace(new RegExp(word, 'i'), `<strong>$&</strong>`)}`; verseDisplayEl.classList.remove('hidden'); } else if (!gameState.bibleMode) { const definition = standardDictionaries[gameState.currentLanguage][word]; if (definition) { definitionWordEl.textContent = word; definitionTextEl.textContent = definition; definitionDisplayEl.classList.remove('hidden'); } } const wordColorVar = wordColorMap[word]; selectedCells.forEach(cell => { cell.classList.remove('selected'); cell.classList.add('found'); cell.style.backgroundColor = `var(${wordColorVar})`; }); const wordLi = document.getElementById(`word-${word}`); wordLi.classList.add('found'); wordLi.style.backgroundColor = `var(${wordColorVar})`; updateStats(); if (gameState.foundWords.length === gameState.words.length) { sound.play('complete'); stopTimer(); gameState.currentLevelData.completed = true; completionDetailsEl.textContent = `You earned ${gameState.currentLevelData.pointsEarned} points!`; completionMessageEl.classList.remove('hidden'); saveHistory(gameState.currentLevelData); newGameBtnText.textContent = "Next Level"; } saveState(); }
+    function processFoundWord(word) { if (gameState.foundWords.includes(word)) return; sound.play('correct'); const points = word.length * 10; gameState.foundWords.push(word); gameState.score += points; gameState.currentLevelData.pointsEarned += points; gameState.currentLevelData.wordsFound = gameState.foundWords.length; verseDisplayEl.classList.add('hidden'); definitionDisplayEl.classList.add('hidden'); if (gameState.bibleMode && gameState.currentLevelData.verseMap[word]) { const verseInfo = gameState.currentLevelData.verseMap[word]; const verseText = bibleData[gameState.currentLanguage][verseInfo.book][verseInfo.chapter][verseInfo.verse]; verseDisplayEl.innerHTML = `${verseInfo.book} ${verseInfo.chapter}:${verseInfo.verse} - ${verseText.replace(new RegExp(word, 'i'), `<strong>$&</strong>`)}`; verseDisplayEl.classList.remove('hidden'); } else if (!gameState.bibleMode) { const definition = lookupDefinition(gameState.currentLanguage, word); if (definition) { definitionWordEl.textContent = word; definitionTextEl.textContent = definition; definitionDisplayEl.classList.remove('hidden'); } } const wordColorVar = wordColorMap[word]; selectedCells.forEach(cell => { cell.classList.remove('selected'); cell.classList.add('found'); cell.style.backgroundColor = `var(${wordColorVar})`; }); const wordLi = document.getElementById(`word-${word}`); wordLi.classList.add('found'); wordLi.style.backgroundColor = `var(${wordColorVar})`; updateStats(); if (gameState.foundWords.length === gameState.words.length) { sound.play('complete'); stopTimer(); gameState.currentLevelData.completed = true; completionDetailsEl.textContent = `You earned ${gameState.currentLevelData.pointsEarned} points!`; completionMessageEl.classList.remove('hidden'); saveHistory(gameState.currentLevelData); newGameBtnText.textContent = "Next Level"; } saveState(); }
     
     // --- 8. HINT SYSTEM (Unchanged) ---
     function handleHintRequest(e) { const word = e.target.textContent; const hintCost = 75; if (gameState.foundWords.includes(word)) return; if (gameState.score < hintCost) { alert(`Not enough points! A hint costs ${hintCost} points.`); return; } sound.play('hint'); gameState.score -= hintCost; gameState.currentLevelData.pointsEarned -= hintCost; if (gameState.currentLevelData) gameState.currentLevelData.hintsUsed++; updateStats(); saveState(); const location = gameState.wordLocations[word]; if (location) { const hintCell = document.querySelector(`[data-row='${location.r}'][data-col='${location.c}']`); if (hintCell) { hintCell.classList.add('hint'); setTimeout(() => { hintCell.classList.remove('hint'); }, 1500); } } }
@@ -252,7 +447,7 @@ document.addEventListener('DOMContentLoaded', () => {
         startLevel();
     }
     
-    function startLevel() {
+    async function startLevel() {
         gridContainer.classList.remove('loaded');
         gridContainer.innerHTML = '<div id="loader"></div>';
         completionMessageEl.classList.add('hidden');
@@ -275,22 +470,22 @@ document.addEventListener('DOMContentLoaded', () => {
             timestamp: new Date().toISOString()
         };
 
+        const packedPuzzle = await takePackedPuzzle();
+        if (packedPuzzle) {
+            await startPackedLevel(packedPuzzle);
+            return;
+        }
+
         if (gameState.bibleMode) {
             gameTitleEl.textContent = "Bible Word Search";
-            const langBibleData = bibleData[gameState.currentLanguage];
-            if (!langBibleData || Object.keys(langBibleData).length === 0) {
+            const allChapters = getBibleChapters(gameState.currentLanguage);
+            if (allChapters.length === 0) {
                 alert(`Bible data not available for '${gameState.currentLanguage}'. Switching to Standard Mode.`);
                 bibleModeCheckbox.checked = false;
                 switchMode();
                 return;
             }
             if (gameState.level === 1 || !gameState.bibleChapterPlaylist || gameState.bibleChapterPlaylist.length === 0) {
-                const allChapters = [];
-                for (const book in langBibleData) {
-                    for (const chapterNum in langBibleData[book]) {
-                        allChapters.push({ book, chapterNum });
-                    }
-                }
                 gameState.bibleChapterPlaylist = allChapters.sort(() => 0.5 - Math.random());
             }
             if (gameState.bibleChapterPlaylist.length === 0) {
@@ -301,26 +496,45 @@ document.addEventListener('DOMContentLoaded', () => {
             }
             const chapterInfo = gameState.bibleChapterPlaylist[(gameState.level - 1) % gameState.bibleChapterPlaylist.length];
             const { book, chapterNum } = chapterInfo;
-            let wordsWithVerses = [];
-            const chapterData = langBibleData[book][chapterNum];
+            try {
+                await ensureBibleChapterLoaded(gameState.currentLanguage, book, chapterNum);
+            } catch (error) {
+                console.error("Failed to load Bible chapter.", error);
+                alert("Could not load this Bible chapter. Please check your connection and try again.");
+                return;
+            }
+            // Warm the cache for the chapter the next level will use.
+            const nextChapter = gameState.bibleChapterPlaylist[gameState.level % gameState.bibleChapterPlaylist.length];
+            ensureBibleChapterLoaded(gameState.currentLanguage, nextChapter.book, nextChapter.chapterNum).catch(error => console.error("Failed to prefetch the next Bible chapter.", error));
+            let uniqueWords = [];
+            const chapterIndex = bibleIndex[gameState.currentLanguage] && bibleIndex[gameState.currentLanguage][book] && bibleIndex[gameState.currentLanguage][book][chapterNum];
+            if (chapterIndex) {
+                // Precomputed at build time: unique normalized 4-9 letter words -> first verse.
+                for (const word in chapterIndex) {
+                    if (word.length <= gameState.gridSize) uniqueWords.push({ word, book, chapter: chapterNum, verse: chapterIndex[word] });
+                }
+            } else {
+                const chapterData = bibleData[gameState.currentLanguage][book][chapterNum];
+                const seenWords = new Set();
 
-            // FINAL FIX: Use Unicode Property Escapes and NORMALIZATION for truly robust multi-language word matching.
-            const wordRegex = new RegExp('\\p{L}+', 'gu');
-            for (const verseNum in chapterData) {
-                // NORMALIZE the string to its canonical form before processing to prevent truncation.
-                const verseText = chapterData[verseNum].normalize('NFC');
-                
-                // Match all whole words from the verse
-                const potentialWords = verseText.toUpperCase().match(wordRegex) || [];
+                // FINAL FIX: Use Unicode Property Escapes and NORMALIZATION for truly robust multi-language word matching.
+                const wordRegex = new RegExp('\\p{L}+', 'gu');
+                for (const verseNum in chapterData) {
+                    // NORMALIZE the string to its canonical form before processing to prevent truncation.
+                    const verseText = chapterData[verseNum].normalize('NFC');
+                    
+                    // Match all whole words from the verse
+                    const potentialWords = verseText.toUpperCase().match(wordRegex) || [];
 
-                // Now, filter the whole words by the desired length
-                potentialWords.forEach(word => {
-                    if (word.length >= 4 && word.length <= 9 && word.length <= gameState.gridSize) {
-                        wordsWithVerses.push({ word, book, chapter: chapterNum, verse: verseNum });
-                    }
-                });
+                    // Keep the first verse of each whole word of the desired length
+                    potentialWords.forEach(word => {
+                        if (word.length >= 4 && word.length <= 9 && word.length <= gameState.gridSize && !seenWords.has(word)) {
+                            seenWords.add(word);
+                            uniqueWords.push({ word, book, chapter: chapterNum, verse: verseNum });
+                        }
+                    });
+                }
             }
-            const uniqueWords = [...new Map(wordsWithVerses.map(item => [item.word, item])).values()];
             const shuffledWords = uniqueWords.sort(() => 0.5 - Math.random());
             const selectedWords = shuffledWords.slice(0, 10);
             gameState.words = selectedWords.map(w => w.word);
@@ -329,6 +543,13 @@ document.addEventListener('DOMContentLoaded', () => {
             });
         } else {
             gameTitleEl.textContent = "Bible Word Search";
+            try {
+                await ensureDictionaryLoaded(gameState.currentLanguage, gameState.gridSize);
+            } catch (error) {
+                console.error("Failed to load dictionary shards.", error);
+                alert("Could not load the dictionary. Please check your connection and try again.");
+                return;
+            }
             gameState.words = getWordsForPuzzle(10);
         }
 
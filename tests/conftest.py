@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+# The build tools are top-level modules rather than a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from helpers import write_wiktionary_jsonl  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def wiktionary_dump(tmp_path_factory):
+    """A small Wiktionary-shaped JSONL dump: several languages, duplicates, bad words and broken lines."""
+    path = tmp_path_factory.mktemp("sources") / "wiktionary.jsonl"
+    write_wiktionary_jsonl(str(path), 4000, seed=1)
+    return str(path)
@@ -0,0 +1,102 @@
+"""Shared helpers and small synthetic inputs for the tests."""
+import json
+import os
+import random
+
+ENGLISH_LETTERS = "abcdefghijklmnopqrstuvwxyz"
+ROMANIAN_LETTERS = "abcdefghijklmnopqrstuvwxyzăâîșț"
+WIKTIONARY_LANGS = ["en"] * 4 + ["fr", "de", "ro", "es", "it", "la"]
+VERSE_WORDS = ["and", "the", "LORD", "said", "unto", "Moses", "Dumnezeu", "pământul", "Și", "ÎMPĂRĂȚIA",
+               "heaven", "earth", "light", "darkness", "waters", "firmament", "spirit", "cuvântul", "lumina"]
+GLOSSES = ["A domesticated animal (Canis lupus familiaris).", "(informal) Something very large.",
+           "To move quickly on foot.", "The act of \"running\" away.", "(obsolete) A small coin; (figuratively) a trifle."]
+
+
+def quiet(*_):
+    pass
+
+
+def random_word(rng, letters, low, high):
+    return ''.join(rng.choice(letters) for _ in range(rng.randint(low, high)))
+
+
+def write_jsonl(path, entries):
+    """One line per entry: dicts are JSON-encoded, strings are written as they are."""
+    with open(path, 'w', encoding='utf-8') as f:
+        for entry in entries:
+            f.write((entry if isinstance(entry, str) else json.dumps(entry, ensure_ascii=False)) + "\n")
+
+
+def write_wiktionary_jsonl(path, lines, seed=0):
+    """Wiktionary-shaped JSONL: mixed languages and lengths, some bad words, duplicates and broken lines."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(lines):
+            if rng.random() < 0.005:
+                f.write('{"word": "broken\n')
+                continue
+            word = random_word(rng, ENGLISH_LETTERS, 2, 14)
+            if rng.random() < 0.05:
+                word = word[:3] + "-" + word[3:]
+            if rng.random() < 0.1:
+                word = f"word{i % 1000}"
+            entry = {"word": word, "lang_code": rng.choice(WIKTIONARY_LANGS), "pos": "noun",
+                     "senses": [{"glosses": [rng.choice(GLOSSES)], "tags": ["countable"]}] if rng.random() < 0.9 else [],
+                     "sounds": [{"ipa": "/ˈwɜːd/"}], "translations": [{"word": "cuvânt", "lang_code": "ro"}] * rng.randint(0, 5)}
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+
+def write_dex_json(path, entries, seed=0):
+    """DEX-shaped JSON object of {word: html definition}; short words repeat."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("{")
+        for i in range(entries):
+            word = random_word(rng, ROMANIAN_LETTERS, 2, 13)
+            html = (f"<b>{word.upper()},</b> <i>s. f.</i> Definiția {i} a cuvântului <i>{word}</i>. "
+                    f"<abbr class=\"abbrev\">Pl.</abbr> {word}e. &#8211; Din lat. {word}us.") if rng.random() < 0.95 else "<b></b>"
+            f.write((", " if i else "") + json.dumps(word, ensure_ascii=False) + ": " + json.dumps(html, ensure_ascii=False))
+        f.write("}")
+
+
+def random_verse(rng):
+    return ' '.join(rng.choice(VERSE_WORDS) for _ in range(rng.randint(8, 30))) + "."
+
+
+def write_formatted_bible(path, books, seed=0):
+    """"Chapter N" text with numbered verses; books maps each heading to its chapters' verse counts."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for book, chapters in books.items():
+            f.write(f"{book}\n\n")
+            for chapter, verses in enumerate(chapters, 1):
+                f.write(f"Chapter {chapter}\n")
+                f.write(''.join(f"{verse} {random_verse(rng)}\n" for verse in range(1, verses + 1)))
+                f.write("\n")
+
+
+def write_raw_bible(path, books, seed=0):
+    """Verse-per-line text under book headings, without chapter or verse numbers; books as for write_formatted_bible."""
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        for book, chapters in books.items():
+            f.write(book.title() + "\n")
+            for _ in range(sum(chapters)):
+                f.write(random_verse(rng) + "\n")
+
+
+def write_versification(path, books):
+    """A versification table (see bible_format.Versification) for the same books."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({"books": [{"name": book, "chapters": chapters} for book, chapters in books.items()]}, f)
+
+
+def read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def tree_files(root):
+    """The files under root as '/'-separated relative paths."""
+    return {os.path.relpath(os.path.join(folder, name), root).replace(os.sep, "/")
+            for folder, _, names in os.walk(root) for name in names}
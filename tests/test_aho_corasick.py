@@ -0,0 +1,29 @@
+import random
+
+import pytest
+
+from aho_corasick import AhoCorasick
+
+
+def naive_matches(patterns, text):
+    return sorted((start + len(pattern) - 1, index) for index, pattern in enumerate(patterns)
+                  for start in range(len(text)) if text.startswith(pattern, start))
+
+
+def test_docstring_example():
+    assert list(AhoCorasick(["HE", "SHE", "HERS"]).iter_matches("USHERS")) == [(3, 1), (3, 0), (5, 2)]
+
+
+def test_matches_equal_a_naive_search():
+    rng = random.Random(4)
+    for _ in range(50):
+        patterns = list({"".join(rng.choice("AB") for _ in range(rng.randint(1, 4))) for _ in range(6)})
+        text = "".join(rng.choice("ABC") for _ in range(40))
+        matcher = AhoCorasick(patterns)
+        assert sorted(matcher.iter_matches(text)) == naive_matches(patterns, text)
+        assert matcher.first_match(text) == next(iter(matcher.iter_matches(text)), None)
+
+
+def test_empty_patterns_are_rejected():
+    with pytest.raises(ValueError):
+        AhoCorasick(["A", ""])
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+import benchmark
+from helpers import quiet
+
+
+def test_generators_are_seeded(tmp_path):
+    for generate, size in ((benchmark.write_wiktionary_jsonl, 200), (benchmark.write_dex_json, 100)):
+        first, again, other = (tmp_path / "first", tmp_path / "again", tmp_path / "other")
+        generate(str(first), size, 1)
+        generate(str(again), size, 1)
+        generate(str(other), size, 2)
+        assert first.read_bytes() == again.read_bytes() != other.read_bytes()
+
+
+def test_a_small_run_reports_every_selected_stage():
+    run = benchmark.run_benchmarks(["wiktionary_build", "puzzle_pack"], scale=0.002, repeats=1, log=quiet)
+    assert list(run["stages"]) == ["wiktionary_build", "puzzle_pack"]
+    build = run["stages"]["wiktionary_build"]
+    assert build["items"] == int(benchmark.WIKTIONARY_LINES * 0.002) and build["input_mb"] > 0
+    assert build["wall_s"] > 0 and build["peak_mb"] > 0
+    assert run["stages"]["puzzle_pack"]["items"] == 1
+
+    report = benchmark.format_report(run, dict(run, commit="abc1234"))
+    assert report.splitlines()[0].endswith("vs baseline") and "@ abc1234" in report
+    assert "vs baseline" not in benchmark.format_report(run, dict(run, scale=1.0))
+
+
+def test_baseline_and_history_are_saved(tmp_path, capsys):
+    results = tmp_path / "results.json"
+    argv = ["--stages", "puzzle_pack", "--scale", "0.002", "--repeats", "1", "--results", str(results)]
+    assert benchmark.main(argv + ["--save-baseline"]) == 0
+    assert benchmark.main(argv) == 0
+    saved = json.loads(results.read_text(encoding="utf-8"))
+    assert len(saved["history"]) == 1 and saved["baseline"] == saved["history"][0]
+    assert "vs baseline" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("stages, inputs", [
+    (["dex_build"], {"dex.json"}),
+    (["bible_parse"], {"bible_raw.txt", "bible_formatted.txt"}),
+    (["puzzle_pack"], set()),
+    (["store_compact", "wiktionary_scan"], {"entries.tsv", "wiktionary.jsonl"}),
+])
+def test_only_the_selected_stages_inputs_are_generated(tmp_path, stages, inputs):
+    prepared = benchmark.prepare_stages(str(tmp_path), 0.002, 0, stages)
+    assert list(prepared) == stages
+    assert set(os.listdir(tmp_path)) == inputs
+
+
+def test_every_stage_declares_its_inputs(tmp_path):
+    assert set(benchmark.STAGE_INPUTS) == set(benchmark.STAGES)
+    prepared = benchmark.prepare_stages(str(tmp_path), 0.001, 0)
+    assert list(prepared) == list(benchmark.STAGES)
+    assert all(items > 0 for _, items, _ in prepared.values())
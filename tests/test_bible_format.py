@@ -0,0 +1,117 @@
+import io
+import json
+
+import pytest
+
+from bible_format import (Versification, available_versifications, format_bible_stream, format_niv_bible_text,
+                          iter_versified, load_versification)
+
+
+def raw_text(table, headings=None, drop_last_verse_of=()):
+    """Verse-per-line text of every book of a table, headed by headings[book] (default: the table's name)."""
+    lines = []
+    for book in table.book_order:
+        lines.append((headings or {}).get(book, book.title()))
+        verses = table.total_verses[book] - (1 if book in drop_last_verse_of else 0)
+        lines.extend(f"Verse {i} of {book}." for i in range(1, verses + 1))
+    return "\n".join(lines) + "\n"
+
+
+def test_shipped_niv_table():
+    assert "niv" in available_versifications()
+    niv = load_versification("niv")
+    assert len(niv.book_order) == 66 and niv.book_order[0] == "GENESIS" and niv.book_order[-1] == "REVELATION"
+    assert niv.chapters["GENESIS"][:3] == [31, 25, 24] and len(niv.chapters["PSALMS"]) == 150
+    # Explicit totals that differ from the sum of the chapters are kept
+    assert niv.total_verses["ISAIAH"] != sum(niv.chapters["ISAIAH"])
+
+
+def test_shipped_romanian_table():
+    assert "cornilescu" in available_versifications()
+    table = load_versification("cornilescu")
+    assert len(table.book_order) == 66 and table.book_order[0] == "GENEZA" and table.book_order[-1] == "APOCALIPSA"
+    # The Romanian names map onto the NIV's counts, explicit totals included
+    assert len(table.chapters["PSALMII"]) == 150
+    assert table.total_verses["ISAIA"] != sum(table.chapters["ISAIA"])
+
+
+def test_tables_can_rename_the_books_of_a_base_table(tmp_path):
+    (tmp_path / "base.json").write_text(json.dumps({"name": "Base", "books": [
+        {"name": "GENESIS", "chapters": [2, 3]}, {"name": "EXODUS", "chapters": [4], "total_verses": 5}]}),
+        encoding="utf-8")
+    (tmp_path / "renamed.json").write_text(json.dumps({"base": "base", "books": [
+        {"name": "Geneza", "base": "Genesis", "aliases": ["Facerea"]}, {"name": "Exodul", "base": "EXODUS"},
+        {"name": "Rut", "chapters": [1, 1]}]}), encoding="utf-8")
+    table = load_versification(str(tmp_path / "renamed.json"))
+    assert table.name == "renamed" and table.book_order == ["GENEZA", "EXODUL", "RUT"]
+    assert table.chapters == {"GENEZA": [2, 3], "EXODUL": [4], "RUT": [1, 1]}
+    assert table.total_verses == {"GENEZA": 5, "EXODUL": 5, "RUT": 2}
+    assert table.book_for_heading("Facerea") == "GENEZA"
+
+    (tmp_path / "broken.json").write_text(json.dumps({"base": "base", "books": [{"name": "LEVITICUL"}]}),
+                                          encoding="utf-8")
+    with pytest.raises(ValueError, match="LEVITICUL"):
+        load_versification(str(tmp_path / "broken.json"))
+
+
+def test_romanian_headings_are_recognised():
+    table = load_versification("cornilescu")
+    assert table.book_for_heading("Geneza") == "GENEZA"
+    assert table.book_for_heading("Facerea") == "GENEZA"
+    assert table.book_for_heading("  1 împăraţi ") == "1 ÎMPĂRAȚI"    # cedilla and odd spacing
+    assert table.book_for_heading("Ţefania") == "ȚEFANIA"
+    assert table.book_for_heading("Cântarea Cântărilor") == "CÂNTAREA CÂNTĂRILOR"
+    assert table.book_for_heading("La început Dumnezeu a făcut cerurile și pământul.") is None
+
+
+def test_romanian_text_matches_the_cornilescu_table():
+    table = load_versification("cornilescu")
+    headings = {"1 ÎMPĂRAȚI": "1 Împăraţi", "EXODUL": "Ieșirea", "APOCALIPSA": "Apocalipsa lui Ioan"}
+    log = []
+    events = list(iter_versified(io.StringIO(raw_text(table, headings, {"IUDA"})), table, log))
+    assert [event[1] for event in events if event[0] == "book"] == table.book_order
+    assert log.count("IUDA overall expected 25 verses but found 24 verses.") == 1
+    assert len([line for line in log if line.endswith(" - Good")]) == 65
+    assert not [line for line in log if line.endswith(" - Missing")]
+    assert ("verse", 2, 1, "Verse 32 of GENEZA.") in events
+
+
+def test_tables_load_from_a_path_with_aliases(tmp_path):
+    path = tmp_path / "tiny.json"
+    path.write_text(json.dumps({"books": [{"name": "Geneza", "chapters": [2, 3], "aliases": ["Facerea"]}]}),
+                    encoding="utf-8")
+    table = load_versification(str(path))
+    assert table.name == "tiny" and table.book_order == ["GENEZA"]
+    assert table.book_for_heading("facerea") == table.book_for_heading("GENEZA") == "GENEZA"
+    assert table.book_for_heading("Exodul") is None
+    # Verses past the last chapter stay in it and are numbered again from 1
+    assert [table.locate("GENEZA", index) for index in range(7)] == [(1, 1), (1, 2), (2, 1), (2, 2), (2, 3),
+                                                                     (2, 1), (2, 2)]
+
+
+@pytest.mark.parametrize("chapters", [[], [3, 0]])
+def test_invalid_tables_are_rejected(chapters):
+    with pytest.raises(ValueError):
+        Versification("broken", [{"name": "GENESIS", "chapters": chapters}])
+
+
+def test_format_bible_stream_numbers_chapters_and_verses():
+    table = load_versification("niv")
+    out = io.StringIO()
+    log = format_bible_stream(io.StringIO(raw_text(table)), out, table)
+    text = out.getvalue().split("\n")
+    assert text[:4] == ["GENESIS", "", "Chapter 1", "1 Verse 1 of GENESIS."]
+    assert text[text.index("Chapter 2") + 1] == "1 Verse 32 of GENESIS."
+    assert log == [f"{book} - Good" for book in table.book_order]
+
+
+def test_short_and_missing_books_are_logged():
+    table = load_versification("niv")
+    text = raw_text(table, drop_last_verse_of={"JUDE"})
+    text = text[:text.index("Revelation\n")]
+    log = []
+    events = list(iter_versified(io.StringIO(text), table, log))
+    assert [event[1] for event in events if event[0] == "book"] == table.book_order[:-1]
+    assert "JUDE overall expected 25 verses but found 24 verses." in log
+    assert log[-1] == "REVELATION - Missing"
+    assert format_niv_bible_text(text)[1] == log
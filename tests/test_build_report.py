@@ -0,0 +1,46 @@
+import json
+import time
+import tracemalloc
+
+from build_report import BuildReport, report_path_for
+
+
+def test_report_paths(tmp_path):
+    assert report_path_for(str(tmp_path / "bible_data.json")) == str(tmp_path / "bible_data_report.json")
+    assert report_path_for(str(tmp_path)) == str(tmp_path / "build_report.json")
+
+
+def test_chained_stages_add_up_to_the_chain(tmp_path):
+    report = BuildReport("test", str(tmp_path / "out.json"), {"seed": 1})
+
+    def slow(items, delay):
+        for item in items:
+            time.sleep(delay)
+            yield item
+
+    with report.phase("setup"):
+        time.sleep(0.01)
+    scanned = report.stage("scan", slow(range(5), 0.01))
+    reduced = report.stage("reduce", slow(scanned, 0.002))
+    started = time.perf_counter()
+    with report.phase("write", upstream="reduce"):
+        assert list(reduced) == list(range(5))
+    chain = time.perf_counter() - started
+    report.counters.update(b=2, a=1)
+
+    path = report.write()
+    with open(path, encoding="utf-8") as f:
+        written = json.load(f)
+    phases = {name: phase["wall_s"] for name, phase in written["phases"].items()}
+    assert list(phases) == ["setup", "scan", "reduce", "write"]
+    assert phases["scan"] >= 0.05 and 0.01 <= phases["reduce"] < phases["scan"]
+    assert abs(phases["scan"] + phases["reduce"] + phases["write"] - chain) < 0.01
+    assert list(written["counters"]) == ["a", "b"] and written["settings"] == {"seed": 1}
+
+
+def test_memory_tracing_stops_when_the_report_closes(tmp_path):
+    assert not tracemalloc.is_tracing()
+    report = BuildReport("test", str(tmp_path / "out.json"), trace_memory=True)
+    assert tracemalloc.is_tracing()
+    report.close()
+    assert not tracemalloc.is_tracing()
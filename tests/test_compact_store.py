@@ -0,0 +1,39 @@
+import random
+
+from compact_store import INITIAL_SLOTS, CompactEntries
+from helpers import ROMANIAN_LETTERS, random_word
+
+
+def random_entries(count, seed):
+    rng = random.Random(seed)
+    # Short words over a small alphabet, so many of them repeat
+    return [(random_word(rng, ROMANIAN_LETTERS[:6] + "ăș", 1, 4), random_word(rng, ROMANIAN_LETTERS, 0, 12))
+            for _ in range(count)]
+
+
+def test_behaves_like_a_first_wins_dict():
+    entries = random_entries(5 * INITIAL_SLOTS, 1)
+    store, expected = CompactEntries(), {}
+    for word, definition in entries:
+        assert store.add(word, definition) == (word not in expected)
+        expected.setdefault(word, definition)
+    assert len(store) == len(expected) > INITIAL_SLOTS
+    assert list(store) == list(expected.items())
+    assert all(store.get(word) == definition for word, definition in expected.items())
+    assert store.get("missing", "default") == "default" and "missing" not in store
+    assert [store.word(store.index(word)) for word in expected] == list(expected)
+
+
+def test_word_only_and_unindexed_stores():
+    entries = random_entries(500, 2)
+    seen, words = CompactEntries(definitions=False), set()
+    for word, _ in entries:
+        assert seen.add(word) == (word not in words)
+        words.add(word)
+    assert list(seen) == [(word, None) for word in dict.fromkeys(word for word, _ in entries)]
+
+    every = CompactEntries(indexed=False)
+    assert all(every.add(word, definition) for word, definition in entries)
+    assert list(every) == entries
+    text_bytes = sum(len(word.encode()) + len(definition.encode()) for word, definition in entries)
+    assert every.nbytes == text_bytes + 16 * len(entries)
@@ -0,0 +1,353 @@
+import json
+import os
+import threading
+
+import pytest
+
+import create_bible_json
+from bible_format import format_bible_stream, load_versification
+from create_bible_json import (build_bible_batch, build_bible_index, build_chapter_index, extract_candidate_words,
+                               find_translation_files, index_path_for, js_key_order, parse_bible_text,
+                               parse_raw_bible_text, shard_slug, source_fingerprint, update_bible_json,
+                               write_bible_shards)
+from helpers import quiet, read_json, tree_files, write_formatted_bible, write_raw_bible, write_versification
+
+BOOKS = {"GENESIS": [31, 25, 24], "EXODUS": [22, 25], "1 SAMUEL": [28, 36]}
+
+
+@pytest.fixture(scope="module")
+def translations(tmp_path_factory):
+    """Two generated translations in the 'Chapter N' format."""
+    folder = tmp_path_factory.mktemp("bibles")
+    paths = []
+    for seed in (3, 4):
+        write_formatted_bible(folder / f"formatted{seed}.txt", BOOKS, seed=seed)
+        paths.append(folder / f"formatted{seed}.txt")
+    return paths
+
+
+def parsed(*sources):
+    bible_data = {}
+    for path, lang_key in sources:
+        assert parse_bible_text(str(path), lang_key, bible_data, quiet)
+    return bible_data
+
+
+# --- Word index ---
+
+def test_candidate_words_are_normalized_like_the_game():
+    # Decomposed letters, a curly apostrophe, digits, short words and a word too long for the grid
+    text = "S\u0326i pa\u0302mântul ȘARPELUI’s 123 la 1 început, înțelepciunea S\u0326ARPE"
+    assert list(extract_candidate_words(text)) == ["PÂMÂNTUL", "ȘARPELUI", "ÎNCEPUT", "ȘARPE"]
+    assert list(extract_candidate_words("\U0001D4D0\U0001D4D1\U0001D4D2 ABCD")) == ["\U0001D4D0\U0001D4D1\U0001D4D2", "ABCD"]
+
+
+def test_keys_follow_javascript_object_order():
+    assert js_key_order(["10", "2", "a", "01", "1", "0"]) == ["0", "1", "2", "10", "a", "01"]
+
+
+def test_chapter_index_maps_words_to_their_first_verse():
+    chapter = {"10": "Light again.", "2": "Darkness and light.", "1": "In the beginning was light."}
+    assert build_chapter_index(chapter) == {"BEGINNING": "1", "LIGHT": "1", "DARKNESS": "2", "AGAIN": "10"}
+    assert list(build_chapter_index(chapter)) == ["BEGINNING", "LIGHT", "DARKNESS", "AGAIN"]
+
+
+def test_bible_index_mirrors_the_parsed_data(tmp_path):
+    source = tmp_path / "english.txt"
+    write_formatted_bible(source, BOOKS, seed=1)
+    bible_data = parsed((source, "english"))
+    index = build_bible_index(bible_data)
+    assert {book: list(chapters) for book, chapters in index["english"].items()} == \
+        {book: list(chapters) for book, chapters in bible_data["english"].items()}
+    for book, chapters in index["english"].items():
+        for chapter, words in chapters.items():
+            assert words and all(word in bible_data["english"][book][chapter][verse].upper()
+                                 for word, verse in words.items())
+    assert index_path_for("out/bible_data.json") == "out/bible_data_index.json"
+    assert index_path_for("bible") == "bible_index.json"
+
+
+# --- Progress and cancellation ---
+
+def test_progress_is_reported_in_batches(translations):
+    calls, bible_data = [], {}
+    assert parse_bible_text(str(translations[0]), "english", bible_data, quiet, lambda *done: calls.append(done))
+    total = os.path.getsize(translations[0])
+    lines = sum(1 for _ in open(translations[0], "rb"))
+    assert len(calls) == lines // create_bible_json.PROGRESS_EVERY_LINES + 1
+    assert calls[-1] == (total, total)
+    assert [done for done, _ in calls] == sorted(done for done, _ in calls)
+    assert bible_data == parsed((translations[0], "english"))
+
+
+def test_a_byte_order_mark_is_dropped(tmp_path):
+    source = tmp_path / "bom.txt"
+    source.write_bytes("\ufeffGENESIS\nChapter 1\n1 In the beginning.\n".encode("utf-8"))
+    assert parsed((source, "english")) == {"english": {"GENESIS": {"1": {"1": "In the beginning."}}}}
+
+
+def test_cancelling_leaves_the_output_unchanged(translations, tmp_path):
+    long_source = tmp_path / "long.txt"
+    write_formatted_bible(str(long_source), {"GENESIS": [400, 400]}, seed=9)
+    output = tmp_path / "bible_data.json"
+    assert update_bible_json(str(translations[0]), "english", str(output), quiet)
+    before = {name: (tmp_path / name).read_bytes() for name in tree_files(tmp_path)}
+
+    cancel = threading.Event()
+    cancel.set()
+    messages = []
+    assert not update_bible_json(str(long_source), "french", str(output), messages.append, cancel_event=cancel)
+    assert any("cancelled" in message for message in messages)
+
+    # Cancelled after the last line was parsed: still nothing is written
+    late_cancel = threading.Event()
+
+    def cancel_when_done(done, total):
+        if done == total:
+            late_cancel.set()
+    assert not update_bible_json(str(translations[1]), "french", str(output), quiet,
+                                 progress_callback=cancel_when_done, cancel_event=late_cancel)
+    assert {name: (tmp_path / name).read_bytes() for name in tree_files(tmp_path)} == before
+
+
+# --- Raw text ---
+
+@pytest.fixture
+def raw_bible(tmp_path):
+    raw, table = tmp_path / "raw.txt", tmp_path / "table.json"
+    write_raw_bible(str(raw), BOOKS, seed=5)
+    write_versification(str(table), BOOKS)
+    return str(raw), str(table)
+
+
+@pytest.mark.parametrize("versification", ["small", "niv"])
+def test_raw_parse_matches_format_then_parse(raw_bible, tmp_path, versification):
+    raw, table = raw_bible
+    if versification == "niv":
+        raw, table = str(tmp_path / "niv.txt"), "niv"
+        write_raw_bible(raw, load_versification("niv").chapters, seed=3)
+    formatted = tmp_path / "formatted.txt"
+    with open(raw, encoding="utf-8") as infile, open(formatted, "w", encoding="utf-8") as outfile:
+        format_bible_stream(infile, outfile, load_versification(table))
+    two_step, single_pass = {}, {}
+    assert parse_bible_text(str(formatted), "english", two_step, quiet)
+    assert parse_raw_bible_text(raw, "english", single_pass, quiet, table)
+    assert two_step == single_pass
+    # The next book's heading used to end up in the last verse of every book,
+    # or to overwrite its verse 1 when it starts with a number ("1 SAMUEL")
+    genesis = two_step["english"]["GENESIS"]
+    last_chapter = genesis[str(len(genesis))]
+    assert not last_chapter[str(len(last_chapter))].endswith("EXODUS")
+    assert two_step["english"]["EXODUS"]["2"]["1"] != "SAMUEL"
+
+
+def test_parse_bible_text_keeps_continuation_lines(tmp_path):
+    formatted = tmp_path / "formatted.txt"
+    formatted.write_text("GENESIS\nChapter 1\n1 In the beginning\ncontinued here.\n2 Second verse\n\n"
+                         "EXODUS\nChapter 1\n1 These are the names\nof the sons.\n2 Reuben\n\n"
+                         "1 SAMUEL\nChapter 1\n1 There was a man.\n", encoding="utf-8")
+    assert parsed((formatted, "english")) == {"english": {
+        "GENESIS": {"1": {"1": "In the beginning continued here.", "2": "Second verse"}},
+        "EXODUS": {"1": {"1": "These are the names of the sons.", "2": "Reuben"}},
+        "1 SAMUEL": {"1": {"1": "There was a man."}},
+    }}
+
+
+def test_raw_updates_are_fingerprinted_by_versification(raw_bible, tmp_path):
+    raw, table = raw_bible
+    output = str(tmp_path / "bible_data.json")
+    assert update_bible_json(raw, "english", output, quiet, versification=table)
+    expected = {}
+    assert parse_raw_bible_text(raw, "english", expected, quiet, table)
+    assert read_json(output) == expected
+
+    messages = []
+    assert update_bible_json(raw, "english", output, messages.append, versification=table)
+    assert any("Skipping parse" in message for message in messages)
+    assert source_fingerprint(raw, table) != source_fingerprint(raw)
+
+
+# --- Shards ---
+
+def read_shards(shard_dir):
+    """Reassembles the verses and word indexes of every language from a shard manifest, as the game reads them."""
+    manifest = read_json(os.path.join(shard_dir, "manifest.json"))
+    verses, words, shards = {}, {}, {}
+    for lang_key, books in manifest["languages"].items():
+        for book, entry in books.items():
+            for chapter, shard_file in entry["chapters"].items():
+                if shard_file not in shards:
+                    shards[shard_file] = read_json(os.path.join(shard_dir, *shard_file.split("/")))
+                chapter_shard = shards[shard_file][chapter]
+                verses.setdefault(lang_key, {}).setdefault(book, {})[chapter] = chapter_shard["verses"]
+                words.setdefault(lang_key, {}).setdefault(book, {})[chapter] = chapter_shard["words"]
+    return manifest, verses, words
+
+
+def manifest_files(manifest):
+    return {shard_file for books in manifest["languages"].values() for book in books.values()
+            for shard_file in book["chapters"].values()}
+
+
+@pytest.mark.parametrize("granularity", ["book", "chapter"])
+def test_shards_match_the_combined_json(translations, tmp_path, granularity):
+    bible_data = parsed((translations[0], "english"), (translations[1], "french"))
+    shard_dir = str(tmp_path / "bible")
+    written = write_bible_shards(bible_data, shard_dir, granularity)
+    manifest, verses, words = read_shards(shard_dir)
+    assert verses == bible_data and words == build_bible_index(bible_data)
+    assert list(manifest["languages"]["english"]) == list(bible_data["english"])    # book order
+    assert tree_files(shard_dir) == manifest_files(manifest) | {"manifest.json"}
+    assert written == len(manifest_files(manifest)) == (6 if granularity == "book" else 14)
+    # Nothing changed: nothing is rewritten
+    assert write_bible_shards(bible_data, shard_dir, granularity) == 0
+
+
+def test_rewriting_one_language_keeps_the_others(translations, tmp_path):
+    bible_data = parsed((translations[0], "english"), (translations[1], "french"))
+    shard_dir = str(tmp_path / "bible")
+    write_bible_shards(bible_data, shard_dir, "chapter")
+    french = bible_data["french"]
+    french["GENESIS"]["1"]["1"] = "Au commencement."
+    del french["EXODUS"]
+    assert write_bible_shards({"french": french}, shard_dir, "chapter", ["french"]) == 1
+    manifest, verses, _ = read_shards(shard_dir)
+    assert verses == bible_data
+    assert tree_files(shard_dir) == manifest_files(manifest) | {"manifest.json"}
+    assert not os.path.exists(os.path.join(shard_dir, "french", "EXODUS"))
+    with pytest.raises(ValueError):
+        write_bible_shards({"french": french}, shard_dir, "book", ["french"])
+
+
+def test_changing_the_layout_removes_stale_shards(translations, tmp_path):
+    bible_data = parsed((translations[0], "english"), (translations[1], "french"))
+    shard_dir = str(tmp_path / "bible")
+    write_bible_shards(bible_data, shard_dir, "chapter")
+    del bible_data["french"]["EXODUS"]
+    write_bible_shards(bible_data, shard_dir, "book")
+    manifest, verses, _ = read_shards(shard_dir)
+    assert verses == bible_data
+    assert tree_files(shard_dir) == manifest_files(manifest) | {"manifest.json"}
+    assert sorted(os.listdir(os.path.join(shard_dir, "french"))) == ["1_SAMUEL.json", "GENESIS.json"]
+    with pytest.raises(ValueError):
+        write_bible_shards(bible_data, shard_dir, "verse")
+
+
+def test_book_slugs_are_unique(tmp_path):
+    assert shard_slug("1 Samuel") == "1_Samuel" and shard_slug("Cântarea Cântărilor") == "Cântarea_Cântărilor"
+    assert shard_slug("???") == "book"
+    write_bible_shards({"english": {"1 Samuel": {"1": {"1": "A"}}, "1-Samuel": {"1": {"1": "B"}}}}, str(tmp_path))
+    books = read_json(tmp_path / "manifest.json")["languages"]["english"]
+    assert [book["chapters"]["1"] for book in books.values()] == ["english/1_Samuel.json", "english/1_Samuel_.json"]
+
+
+# --- Incremental updates ---
+
+def full_rewrite(bible_data):
+    """What the combined JSON used to be written as: the whole dict, re-encoded on every update."""
+    return json.dumps(bible_data, ensure_ascii=False, indent=2)
+
+
+def test_incremental_updates_match_the_combined_json(translations, tmp_path):
+    output = str(tmp_path / "bible_data.json")
+    partial = tmp_path / "partial.txt"
+    partial.write_text("GENESIS\n\nChapter 1\n1 A new first verse.\n2 And a second.\n\n"
+                       "TOBIT\n\nChapter 1\n1 An extra book.\n", encoding="utf-8")
+    sources = [(translations[0], "english"), (translations[1], "french"), (partial, "english")]
+    expected = parsed(*sources)
+
+    for source, lang_key in sources:
+        assert update_bible_json(str(source), lang_key, output, quiet, shard_granularity="book")
+    with open(output, encoding="utf-8") as f:
+        assert f.read() == full_rewrite(expected)
+    assert read_json(tmp_path / "bible_data_index.json") == build_bible_index(expected)
+    _, verses, words = read_shards(str(tmp_path / "bible"))
+    assert verses == expected and words == build_bible_index(expected)
+
+    messages = []
+    assert update_bible_json(str(translations[1]), "french", output, messages.append, shard_granularity="chapter")
+    assert any("Skipping parse" in message for message in messages)
+    with open(output, encoding="utf-8") as f:
+        assert f.read() == full_rewrite(expected)
+    manifest, verses, _ = read_shards(str(tmp_path / "bible"))
+    assert manifest["granularity"] == "chapter" and verses == expected
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_update_imports_an_existing_combined_file(translations, tmp_path):
+    output = tmp_path / "bible_data.json"
+    existing = {"romanian": {"GENEZA": {"1": {"1": "La început."}}}}
+    output.write_text(full_rewrite(existing), encoding="utf-8")
+    assert update_bible_json(str(translations[0]), "english", str(output), quiet)
+    expected = dict(existing, **parsed((translations[0], "english")))
+    assert output.read_text(encoding="utf-8") == full_rewrite(expected)
+
+
+# --- Batch build ---
+
+@pytest.fixture
+def source_dir(translations, tmp_path):
+    folder = tmp_path / "sources"
+    folder.mkdir()
+    (folder / "english.txt").write_bytes(translations[0].read_bytes())
+    (folder / "kjv.txt").write_bytes(translations[1].read_bytes())
+    (folder / "notes.md").write_text("not a translation", encoding="utf-8")
+    return folder
+
+
+def test_translation_files_are_keyed_by_stem(source_dir):
+    assert find_translation_files(str(source_dir)) == [(str(source_dir / "english.txt"), "english"),
+                                                       (str(source_dir / "kjv.txt"), "kjv")]
+    assert [lang_key for _, lang_key in find_translation_files(str(source_dir), {"kjv.txt": "french"})] == \
+        ["english", "french"]
+
+
+def test_batch_build_matches_sequential_updates(translations, source_dir, tmp_path):
+    language_map = {"kjv": "french"}
+    batch, sequential = tmp_path / "batch", tmp_path / "sequential"
+    batch.mkdir()
+    sequential.mkdir()
+    summary = build_bible_batch(str(source_dir), str(batch / "bible_data.json"), language_map, workers=2,
+                                shard_granularity="book", log=quiet)
+    assert [(row["file"], row["language"], row["status"]) for row in summary] == \
+        [("english.txt", "english", "parsed"), ("kjv.txt", "french", "parsed")]
+    assert summary[0]["books"] == len(BOOKS) and summary[0]["chapters"] == sum(map(len, BOOKS.values()))
+    assert summary[0]["verses"] == sum(sum(chapters) for chapters in BOOKS.values())
+
+    for source, lang_key in ((translations[0], "english"), (translations[1], "french")):
+        assert update_bible_json(str(source), lang_key, str(sequential / "bible_data.json"), quiet,
+                                 shard_granularity="book")
+    for name in ("bible_data.json", "bible_data_index.json"):
+        assert (batch / name).read_bytes() == (sequential / name).read_bytes()
+    assert read_shards(str(batch / "bible")) == read_shards(str(sequential / "bible"))
+
+    # A second run skips the unchanged sources and writes nothing
+    before = (batch / "bible_data.json").stat().st_mtime_ns
+    summary = build_bible_batch(str(source_dir), str(batch / "bible_data.json"), language_map, log=quiet)
+    assert [row["status"] for row in summary] == ["unchanged", "unchanged"]
+    assert (batch / "bible_data.json").stat().st_mtime_ns == before
+
+
+def test_batch_build_needs_translation_files(tmp_path):
+    with pytest.raises(ValueError):
+        build_bible_batch(str(tmp_path), str(tmp_path / "bible_data.json"), log=quiet)
+
+
+# --- Build reports ---
+
+def test_reports_count_the_parsed_structure(source_dir, tmp_path):
+    books = {"GENESIS": [31, 25, 24], "EXODUS": [22, 25]}
+    source, output = tmp_path / "genesis.txt", tmp_path / "bible_data.json"
+    write_formatted_bible(str(source), books, seed=2)
+    assert update_bible_json(str(source), "english", str(output), quiet)
+    report = read_json(tmp_path / "bible_data_report.json")
+    assert {name: report["counters"][name] for name in ("books", "chapters", "verses", "files_parsed")} == \
+        {"books": 2, "chapters": 5, "verses": 127, "files_parsed": 1}
+    assert list(report["phases"]) == ["load", "hash", "parse", "merge", "write"]
+
+    batch_output = tmp_path / "batch" / "bible_data.json"
+    batch_output.parent.mkdir()
+    build_bible_batch(str(source_dir), str(batch_output), log=quiet)
+    report = read_json(tmp_path / "batch" / "bible_data_report.json")
+    assert report["counters"]["files_parsed"] == 2 and report["counters"]["books"] == 2 * len(BOOKS)
+    assert [row["status"] for row in report["details"]["files"]] == ["parsed", "parsed"]
@@ -0,0 +1,812 @@
+import bz2
+import gzip
+import io
+import json
+import lzma
+import os
+import random
+import re
+import tracemalloc
+from collections import Counter
+from functools import partial
+
+import pytest
+
+import dict_pipeline
+from dict_pipeline import (EmptyDictionaryError, ExclusionRules, WordFilter, build_dictionaries, build_dictionary,
+                           iter_json_object, load_targets, main, write_dictionary)
+from helpers import quiet, read_json, tree_files, write_dex_json, write_jsonl
+from language_profiles import LANGUAGE_PROFILES
+
+ENGLISH = LANGUAGE_PROFILES["english"]
+
+
+def build(source, output, **options):
+    """build_dictionary with a fixed seed and reduction; returns the bytes written."""
+    options = dict({'reduction_percent': 20, 'seed': 7, 'write_report': False, 'log': quiet}, **options)
+    build_dictionary(source, str(output), **options)
+    with open(output, 'rb') as f:
+        return f.read()
+
+
+def entry(word, gloss, lang_code="en"):
+    return {"word": word, "lang_code": lang_code, "senses": [{"glosses": [gloss]}]}
+
+
+def interrupt_parse_after(monkeypatch, calls):
+    """Makes the Wiktionary scan raise KeyboardInterrupt at the given parse call."""
+    parse, count = dict_pipeline.parse_wiktionary_entry, [0]
+
+    def interrupted(*args, **kwargs):
+        count[0] += 1
+        if count[0] == calls:
+            raise KeyboardInterrupt
+        return parse(*args, **kwargs)
+    monkeypatch.setattr(dict_pipeline, 'parse_wiktionary_entry', interrupted)
+
+
+# --- Pipeline ---
+
+def test_wiktionary_words_are_filtered_and_cleaned(tmp_path):
+    source, exclusions, output = tmp_path / "wiktionary.jsonl", tmp_path / "exclude.txt", tmp_path / "out.json"
+    write_jsonl(source, [
+        entry("house", "(architecture) A building to live in."),
+        entry("house", "A second meaning."),
+        entry("maison", "house", "fr"),
+        entry("cat", "Too short."),
+        entry("cathedrals", "Too long."),
+        entry("pre-war", "Not letters."),
+        entry("Damned", "Excluded."),
+        {"word": "nosense", "lang_code": "en", "senses": []},
+        '{"word": "broken',
+        entry("garden", "land (for plants)"),
+    ])
+    exclusions.write_text("damned\n", encoding="utf-8")
+    counts = build_dictionary(str(source), str(output), str(exclusions), reduction_percent=0, log=quiet)
+    assert (counts['phase1'], counts['written']) == (2, 2)
+    assert read_json(output) == {"HOUSE": "A building to live in.", "GARDEN": "Land"}
+
+
+def test_dex_words_are_filtered_and_cleaned(tmp_path):
+    source, output = tmp_path / "dex.json", tmp_path / "out.json"
+    source.write_text(json.dumps({
+        "casă": "<b>CASĂ,</b> <i>case,</i> s. f. Clădire de locuit. - Din lat. <i>casa</i>.",
+        "masă": "<b></b>",
+        "oaspete": "<b>OASPETE,</b> oaspeți, s. m. Musafir.",
+        "café": "<b>CAFÉ,</b> s. n. Cafenea.",
+    }, ensure_ascii=False), encoding="utf-8")
+    build(str(source), output, reduction_percent=0)
+    assert read_json(output) == {"CASĂ": "Case, s. f. Clădire de locuit.", "OASPETE": "Oaspeți, s. m. Musafir."}
+
+
+def test_cedilla_and_comma_below_spellings_are_one_word(tmp_path):
+    source, output = tmp_path / "dex.json", tmp_path / "out.json"
+    source.write_text(json.dumps({
+        "ţară": "<b>ŢARĂ,</b> ţări, s. f. Stat.",
+        "țară": "<b>ȚARĂ,</b> țări, s. f. Alt sens.",
+        "pas\u0327i": "<b>PAŞI,</b> s. m. pl. Mers.",
+    }, ensure_ascii=False), encoding="utf-8")
+    counts = build_dictionary(str(source), str(output), reduction_percent=0, write_report=False, log=quiet)
+    assert counts["duplicates"] == 1
+    assert read_json(output) == {"ȚARĂ": "Țări, s. f. Stat.", "PAȘI": "S. m. pl. Mers."}
+
+
+def test_reduction_is_reproducible_for_a_seed(wiktionary_dump, tmp_path):
+    reduced = build(wiktionary_dump, tmp_path / "a.json")
+    assert build(wiktionary_dump, tmp_path / "b.json") == reduced
+    assert build(wiktionary_dump, tmp_path / "c.json", seed=8) != reduced
+    full = build_dictionary(wiktionary_dump, str(tmp_path / "full.json"), reduction_percent=0, log=quiet)
+    assert len(json.loads(reduced)) == int(full['phase1'] * 0.8)
+    assert set(json.loads(reduced)) <= set(read_json(tmp_path / "full.json"))
+
+
+@pytest.mark.parametrize("minify, options", [(True, {'separators': (',', ':')}), (False, {'indent': 2})])
+def test_written_json_matches_json_dump(tmp_path, minify, options):
+    entries = [("ÎNCĂ", 'Still "quoted"'), ("ABC", "Line\nbreak")]
+    output = tmp_path / "out.json"
+    assert write_dictionary(iter(entries), str(output), minify) == 2
+    assert output.read_text(encoding="utf-8") == json.dumps(dict(entries), ensure_ascii=False, **options)
+    write_dictionary(iter(()), str(output), minify)
+    assert output.read_text(encoding="utf-8") == "{}"
+
+
+def test_no_matching_word_writes_nothing(tmp_path):
+    source, output = tmp_path / "wiktionary.jsonl", tmp_path / "out.json"
+    write_jsonl(source, [entry("cat", "Too short."), entry("maison", "house", "fr")])
+    with pytest.raises(EmptyDictionaryError):
+        build(str(source), output)
+    assert not output.exists()
+    assert main([str(source), str(output)]) == 1
+
+
+# --- Exclusion rules ---
+
+WORDS = ["a", "ab", "dog", "dogma", "hotdog", "underdogs", "cat"]
+
+
+def excluded_by(rules):
+    matcher = ExclusionRules(rules)
+    return {word: matcher.match(word) for word in WORDS if matcher.match(word) is not None}
+
+
+def test_exclusion_rule_kinds():
+    assert excluded_by(["dog"]) == {"dog": "dog"}
+    assert excluded_by(["dog*"]) == {"dog": "dog*", "dogma": "dog*"}
+    assert excluded_by(["*dog"]) == {"dog": "*dog", "hotdog": "*dog"}
+    assert excluded_by(["*dog*"]) == {"dog": "*dog*", "dogma": "*dog*", "hotdog": "*dog*", "underdogs": "*dog*"}
+
+
+@pytest.mark.parametrize("rule", ["*", "**", "***"])
+def test_star_only_rules_are_skipped(rule):
+    assert excluded_by([rule, "dog"]) == {"dog": "dog"}
+    assert ExclusionRules([rule]).skipped == [rule] and not ExclusionRules([rule])
+
+
+@pytest.mark.parametrize("rule, expected", [
+    ("?", ["a"]),
+    ("???", ["dog", "cat"]),
+    ("??*", ["ab", "dog", "dogma", "hotdog", "underdogs", "cat"]),
+    ("*?*", WORDS),
+    ("d?g", ["dog"]),
+    ("*d?g*", ["dog", "dogma", "hotdog", "underdogs"]),
+    ("d*a", ["dogma"]),
+    ("?o*", ["dog", "dogma", "hotdog"]),
+])
+def test_wildcard_rules(rule, expected):
+    assert sorted(excluded_by([rule])) == sorted(expected)
+
+
+def test_rules_are_normalized_like_the_words():
+    romanian = LANGUAGE_PROFILES["romanian"]
+    for rules in (["ţâţă"], ["ŢÂŢĂ"], ExclusionRules(["ţâţă"])):
+        word_filter = WordFilter(4, 9, romanian, rules)
+        assert word_filter.rejection(romanian.normalize_word("ŢÂŢĂ")) == "excluded"
+        assert word_filter.rejection(romanian.normalize_word("ȚÂȚĂ")) == "excluded"
+        assert word_filter.removed == {"ȚÂȚĂ": "țâță"}
+
+
+def test_first_rule_in_file_order_wins():
+    assert excluded_by(["*dog*", "dog", "*?*"])["dog"] == "*dog*"
+    assert excluded_by(["*?*", "dog"])["dog"] == "*?*"
+    assert excluded_by(["???", "d?g"])["dog"] == "???"
+
+
+def test_excluded_words_are_listed_in_the_report(tmp_path):
+    source, exclusions, output = tmp_path / "wiktionary.jsonl", tmp_path / "exclude.txt", tmp_path / "out.json"
+    write_jsonl(source, [entry("house", "A building."), entry("hotdog", "A sausage."), entry("dogma", "A belief."),
+                         entry("garden", "A plot.")])
+    exclusions.write_text("# Comments and blank lines are ignored\n\n*dog\n  DOG*  \n", encoding="utf-8")
+    assert json.loads(build(str(source), output, exclusion_path=str(exclusions), reduction_percent=0,
+                            write_report=True)) == {"HOUSE": "A building.", "GARDEN": "A plot."}
+    assert read_json(tmp_path / "out_report.json")["details"]["excluded"] == {"HOTDOG": "*dog", "DOGMA": "dog*"}
+
+
+def test_a_star_only_rule_does_not_empty_the_dictionary(tmp_path):
+    source, exclusions, output = tmp_path / "wiktionary.jsonl", tmp_path / "exclude.txt", tmp_path / "out.json"
+    write_jsonl(source, [entry("house", "A building."), entry("hotdog", "A sausage.")])
+    exclusions.write_text("*dog\n**\n", encoding="utf-8")
+    messages = []
+    assert json.loads(build(str(source), output, exclusion_path=str(exclusions), reduction_percent=0,
+                            log=messages.append)) == {"HOUSE": "A building."}
+    assert [message for message in messages if message.startswith("WARNING")] == [
+        f"WARNING: Ignoring the exclusion rule '**' in '{exclusions}': it would exclude every word."]
+
+
+# --- Parallel scanning ---
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    """Splits the parallel scans into 64 KB chunks so the small dump spans many of them."""
+    for name in ('scan_wiktionary_parallel', 'scan_languages_parallel'):
+        monkeypatch.setattr(dict_pipeline, name, partial(getattr(dict_pipeline, name), chunk_size=64 << 10))
+
+
+def test_line_aligned_chunks_cover_the_file(wiktionary_dump):
+    with open(wiktionary_dump, "rb") as f:
+        data = f.read()
+    chunks = list(dict_pipeline.line_aligned_chunks(wiktionary_dump, 10000))
+    assert len(chunks) > 10
+    assert chunks[0][0] == 0 and chunks[-1][1] == len(data)
+    assert all(end == next_start for (_, end), (next_start, _) in zip(chunks, chunks[1:]))
+    assert all(data[end - 1:end] == b"\n" for _, end in chunks)
+
+
+def test_parallel_scan_matches_a_serial_scan(wiktionary_dump):
+    serial_filter = WordFilter(3, 9, ENGLISH, ["*ab*", "word7"])
+    parallel_filter = WordFilter(3, 9, ENGLISH, ["*ab*", "word7"])
+    with open(wiktionary_dump, "rb") as f:
+        serial = list(dict_pipeline.first_occurrence(dict_pipeline.filter_wiktionary(f, serial_filter)))
+    parallel = list(dict_pipeline.first_occurrence(dict_pipeline.scan_wiktionary_parallel(
+        wiktionary_dump, parallel_filter, 2, chunk_size=16 << 10, log=quiet)))
+    assert parallel == serial and len(serial) > 500
+    assert parallel_filter.removed == serial_filter.removed and serial_filter.removed
+
+
+@pytest.mark.parametrize("checkpoint", [True, False])
+def test_parallel_build_matches_a_serial_build(wiktionary_dump, tmp_path, small_chunks, checkpoint):
+    messages = []
+    assert build(wiktionary_dump, tmp_path / "parallel.json", workers=3, checkpoint=checkpoint,
+                 log=messages.append) == build(wiktionary_dump, tmp_path / "serial.json", checkpoint=checkpoint)
+    assert any(re.search(r"scanning \d\d+ chunks with 3 worker processes", message) for message in messages)
+
+
+def test_parallel_multi_language_build_matches_a_serial_build(wiktionary_dump, tmp_path, small_chunks):
+    outputs = {}
+    for workers in (1, 2):
+        paths = {language: tmp_path / f"{language}_{workers}.json" for language in ("english", "french")}
+        targets = {language: {"output": str(path), "min_len": 3, "max_len": 9, "exclude": None}
+                   for language, path in paths.items()}
+        build_dictionaries(wiktionary_dump, targets, reduction_percent=20, seed=3, workers=workers,
+                           write_report=False, log=quiet)
+        outputs[workers] = [path.read_bytes() for path in paths.values()]
+    assert outputs[1] == outputs[2]
+
+
+# --- Wiktionary prefilter ---
+
+TRICKY_LINES = [
+    b'{"word": "cat", "lang_code": "en", "senses": [{"glosses": ["a pet"]}]}',
+    b'{"lang_code":"en","word":"dog","senses":[{"glosses":["barks"]}]}',
+    b'{"word": "caf\\u00e9", "lang_code": "en", "senses": [{"glosses": ["coffee house"]}]}',
+    b'{"w\\u006frd": "sneaky", "lang_code": "en", "senses": [{"glosses": ["escaped key"]}]}',
+    b'{"word": "x", "lang_code": "en", "forms": [{"word": "house"}], "senses": [{"glosses": ["short"]}]}',
+    b'{"word": "house", "lang_code": "fr", "translations": [{"lang_code": "en", "word": "maison"}]}',
+    b'{"word": "tab\\tbed", "lang_code": "en", "senses": [{"glosses": ["escape in word"]}]}',
+    b'{"word": "quote\\"d", "lang_code": "en", "senses": [{"glosses": ["quote"]}]}',
+    b'{"word": "dogs", "lang_code" : "en", "senses": [{"glosses": ["spaced colon"]}]}',
+    b'{"word": "trailing", "lang_code": "en", "senses": [{"glosses": ["cut"]}',
+    'not json at all, "lang_code": "en", "word": "mirror"'.encode("utf-8"),
+    '{"word": "țară", "lang_code": "en", "senses": [{"glosses": ["not English letters"]}]}'.encode("utf-8"),
+]
+
+
+def dump_lines(path):
+    with open(path, "rb") as f:
+        return f.read().splitlines() + TRICKY_LINES
+
+
+def test_prefilter_only_drops_lines_the_parse_rejects(wiktionary_dump):
+    lines = dump_lines(wiktionary_dump)
+    word_filter = WordFilter(3, 8, ENGLISH)
+    rejected = [line for line in lines if dict_pipeline.prefilter_rejects(line, word_filter)]
+    assert len(rejected) > len(lines) // 2
+    assert not [line for line in rejected if dict_pipeline.parse_wiktionary_line(line, word_filter)]
+
+
+def test_prefiltered_scan_matches_a_full_parse(wiktionary_dump):
+    lines = dump_lines(wiktionary_dump)
+    word_filter = WordFilter(3, 8, ENGLISH, {"dog", "house"})
+    counters, full_counters = Counter(), Counter()
+    entries = list(dict_pipeline.filter_wiktionary(lines, word_filter, True, counters))
+    assert entries == list(dict_pipeline.filter_wiktionary(lines, word_filter, False, full_counters))
+    assert counters["lines"] == full_counters["lines"] == len(lines)
+    assert counters["prefiltered"] > 0 and full_counters["prefiltered"] == 0
+    assert {"CAT", "SNEAKY", "DOGS"} <= {word for word, _ in entries}
+
+
+def test_prefiltered_build_matches_a_full_parse(wiktionary_dump, tmp_path):
+    assert build(wiktionary_dump, tmp_path / "prefiltered.json") == \
+        build(wiktionary_dump, tmp_path / "full.json", prefilter=False)
+
+
+# --- Streaming DEX parser ---
+
+DEX_SAMPLE = json.dumps({
+    "casă": "<b>CÁSĂ,</b> <i>case,</i> s. f. Clădire &#8211; Din lat. <i>casa</i>.",
+    "a\\\"b": "escaped \\u0219 \"quotes\" and a \\n newline",
+    "număr": 1.5e3, "listă": [1, {"a": None}, "}"], "gol": "", "adevărat": True,
+}, ensure_ascii=False, indent=1)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 64, 1 << 20])
+def test_iter_json_object_matches_json_load(chunk_size):
+    members = list(iter_json_object(io.StringIO(DEX_SAMPLE), chunk_size))
+    assert dict(members) == json.loads(DEX_SAMPLE)
+    assert [key for key, _ in members] == list(json.loads(DEX_SAMPLE))
+
+
+def test_iter_json_object_matches_json_load_on_a_dex_export(tmp_path):
+    path = str(tmp_path / "dex.json")
+    write_dex_json(path, 2000, seed=2)
+    with open(path, encoding="utf-8") as f:
+        streamed = list(iter_json_object(f, 4096))
+    # The generated words repeat: json.load keeps each key's last value, the stream yields every member
+    assert len(streamed) == 2000
+    assert dict(streamed) == read_json(path)
+
+
+@pytest.mark.parametrize("text", ["{}", " {\n} \n", '{"a": 1}\n\n'])
+def test_iter_json_object_accepts_surrounding_whitespace(text):
+    assert dict(iter_json_object(io.StringIO(text), 2)) == json.loads(text)
+
+
+@pytest.mark.parametrize("text", ['{"a": 1} x', '{"a": 1}{"b": 2}', '{} []', '{"a": 1,}', '[1]', '{"a" 1}',
+                                  '{"a": 1', '{1: 2}', ''])
+def test_iter_json_object_rejects_anything_but_one_object(text):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_object(io.StringIO(text), 3))
+
+
+def test_streamed_dex_build_matches_a_loaded_one(tmp_path):
+    dex = tmp_path / "dex.json"
+    dex.write_text(DEX_SAMPLE, encoding="utf-8")
+    assert list(dict_pipeline.read_dex(str(dex))) == list(json.loads(DEX_SAMPLE).items())
+    write_dex_json(str(dex), 500, seed=4)
+    build(str(dex), tmp_path / "ro.json", reduction_percent=0)
+    words = read_json(tmp_path / "ro.json")
+    assert len(words) > 100 and all(word == word.upper() for word in words)
+
+
+def test_repeated_dex_words_are_read_like_json_load(tmp_path):
+    # A repeated key keeps its last value at its first position, even when that value has no definition
+    repeated = tmp_path / "repeated.json"
+    repeated.write_text('{"casă": "<b></b>", "masă": "<b>MASĂ,</b> mobilă.", "casă": "<b>CASĂ,</b> clădire.", '
+                        '"CASĂ": "<b>CASĂ,</b> alta.", "masă": "", "zână": "<b>ZÂNĂ,</b> ființă."}', encoding="utf-8")
+    assert list(dict_pipeline.read_dex(str(repeated))) == list(json.loads(repeated.read_text(encoding="utf-8")).items())
+    assert json.loads(build(str(repeated), tmp_path / "ro.json", reduction_percent=0)) == {
+        "CASĂ": "Clădire.", "ZÂNĂ": "Ființă."}
+
+
+def test_streamed_dex_build_matches_a_build_from_json_load(tmp_path):
+    streamed = tmp_path / "dex.json"
+    # The generated words repeat, with different definitions
+    write_dex_json(str(streamed), 3000, seed=9)
+    loaded = tmp_path / "loaded.json"
+    loaded.write_text(json.dumps(read_json(streamed), ensure_ascii=False), encoding="utf-8")
+    assert len(read_json(loaded)) < 3000
+    assert build(str(streamed), tmp_path / "streamed_ro.json") == build(str(loaded), tmp_path / "loaded_ro.json")
+
+
+# --- Reduction modes ---
+
+def words_of_lengths(counts):
+    return [(f"{length}" * length + f"{i:05}", "definition") for length, count in counts.items() for i in range(count)]
+
+
+def test_shuffle_reduction_draws_the_same_permutation_as_a_list_shuffle():
+    entries = [(f"WORD{i}", f"definition {i}") for i in range(1000)]
+    expected = list(entries)
+    random.Random(5).shuffle(expected)
+    assert list(dict_pipeline.reduce_entries(iter(entries), 30, random.Random(5))) == expected[:700]
+
+
+def test_reservoir_sample_is_exact_and_reproducible():
+    entries = [(f"W{i}", "d") for i in range(1000)]
+    sample = dict_pipeline.reservoir_sample(iter(entries), 100, seed=3)
+    assert len(sample) == len(set(sample)) == 100 and set(sample) <= set(entries)
+    assert dict_pipeline.reservoir_sample(iter(entries), 100, seed=3) == sample
+    assert dict_pipeline.reservoir_sample(iter(entries), 100, seed=4) != sample
+    assert sorted(dict_pipeline.reservoir_sample(iter(entries[:50]), 100, seed=3)) == sorted(entries[:50])
+
+
+def test_reservoir_sample_is_uniform():
+    hits = Counter()
+    for seed in range(3000):
+        hits.update(dict_pipeline.reservoir_sample(iter(range(10)), 3, seed=seed))
+    assert all(800 < hits[item] < 1000 for item in range(10))
+
+
+def test_stratified_reservoir_keeps_the_length_mix():
+    counts = {4: 500, 5: 300, 9: 200}
+    sample = dict_pipeline.reservoir_sample(iter(words_of_lengths(counts)), 100, seed=1, stratify=True)
+    lengths = Counter(len(word) - 5 for word, _ in sample)
+    assert lengths == {4: 50, 5: 30, 9: 20}
+    assert sum(dict_pipeline._allocate(7, {"a": 1, "b": 1, "c": 1}).values()) == 7
+
+
+def test_stratified_bernoulli_streams_are_independent_per_length():
+    def kept(counts):
+        sample = dict_pipeline.bernoulli_sample(iter(words_of_lengths(counts)), 0.3, seed=5, stratify=True)
+        return [word for word, _ in sample if len(word) == 9]
+    assert kept({4: 400, 5: 100}) == kept({4: 400, 5: 900}) != []
+
+
+@pytest.mark.parametrize("options", [{"reduction_mode": "bernoulli"}, {"reduction_mode": "bernoulli", "stratify": True},
+                                     {"reduction_mode": "reservoir", "sample_size": 150},
+                                     {"reduction_mode": "reservoir", "sample_size": 150, "stratify": True}])
+def test_streaming_reductions_are_reproducible(wiktionary_dump, tmp_path, options):
+    output = build(wiktionary_dump, tmp_path / "a.json", **options)
+    assert build(wiktionary_dump, tmp_path / "b.json", **options) == output
+    words, full = json.loads(output), json.loads(build(wiktionary_dump, tmp_path / "full.json", reduction_percent=0))
+    assert set(words) <= set(full)
+    if options["reduction_mode"] == "reservoir":
+        assert len(words) == 150
+    else:
+        assert abs(len(words) - 0.8 * len(full)) < 0.1 * len(full)
+    assert not (tmp_path / "a.json.part").exists()
+
+
+def test_invalid_reduction_settings(tmp_path, wiktionary_dump):
+    with pytest.raises(ValueError):
+        build(wiktionary_dump, tmp_path / "out.json", reduction_mode="random")
+    with pytest.raises(ValueError):
+        build(wiktionary_dump, tmp_path / "out.json", reduction_mode="reservoir")
+
+
+# --- Checkpoints ---
+
+def test_resumed_scan_matches_an_uninterrupted_build(wiktionary_dump, tmp_path, monkeypatch):
+    expected = build(wiktionary_dump, tmp_path / "reference.json", checkpoint=False)
+    monkeypatch.setattr(dict_pipeline, 'CHECKPOINT_EVERY', 64 << 10)
+    output = tmp_path / "resumed.json"
+    with monkeypatch.context() as patched:
+        interrupt_parse_after(patched, 400)
+        with pytest.raises(KeyboardInterrupt):
+            build(wiktionary_dump, output)
+    assert read_json(tmp_path / "resumed.json.checkpoint" / "checkpoint.json")['offset'] > 0
+
+    messages = []
+    assert build(wiktionary_dump, output, log=messages.append) == expected
+    assert any("resuming from the checkpoint" in message for message in messages)
+    assert not os.path.exists(tmp_path / "resumed.json.checkpoint")
+
+
+def test_a_changed_source_discards_the_checkpoint(wiktionary_dump, tmp_path, monkeypatch):
+    source = tmp_path / "wiktionary.jsonl"
+    with open(wiktionary_dump, "rb") as f:
+        source.write_bytes(f.read())
+    monkeypatch.setattr(dict_pipeline, 'CHECKPOINT_EVERY', 64 << 10)
+    with monkeypatch.context() as patched:
+        interrupt_parse_after(patched, 400)
+        with pytest.raises(KeyboardInterrupt):
+            build(str(source), tmp_path / "out.json")
+    with open(source, "ab") as f:
+        f.write((json.dumps(entry("zebra", "A striped animal.")) + "\n").encode("utf-8"))
+
+    messages = []
+    output = build(str(source), tmp_path / "out.json", reduction_percent=0, log=messages.append)
+    assert not any("resuming" in message for message in messages)
+    assert output == build(str(source), tmp_path / "direct.json", reduction_percent=0, checkpoint=False)
+    assert "ZEBRA" in json.loads(output)
+
+
+def test_completed_checkpoint_is_reused(wiktionary_dump, tmp_path, monkeypatch):
+    expected = build(wiktionary_dump, tmp_path / "reference.json", checkpoint=False)
+    output = tmp_path / "out.json"
+
+    def failing_write(entries, writer):
+        for _ in entries:
+            pass
+        raise OSError("disk full")
+    with monkeypatch.context() as patched:
+        patched.setattr(dict_pipeline, 'write_entries', failing_write)
+        with pytest.raises(OSError):
+            build(wiktionary_dump, output)
+    assert os.path.exists(tmp_path / "out.json.checkpoint")
+
+    messages = []
+    assert build(wiktionary_dump, output, log=messages.append) == expected
+    assert any("reusing the completed scan" in message for message in messages)
+    assert not any("None" in message for message in messages)
+    assert not os.path.exists(tmp_path / "out.json.checkpoint")
+
+
+# --- Phase 1 cache ---
+
+@pytest.mark.parametrize("options", [
+    {},
+    {"min_len": 5, "max_len": 7, "reduction_percent": 50},
+    {"reduction_mode": "bernoulli", "stratify": True},
+])
+def test_cache_hit_matches_a_direct_build(wiktionary_dump, tmp_path, options):
+    cache_dir = str(tmp_path / "cache")
+    build(wiktionary_dump, tmp_path / "warm.json", cache_dir=cache_dir)
+    expected = build(wiktionary_dump, tmp_path / "direct.json", **options)
+    messages = []
+    assert build(wiktionary_dump, tmp_path / "cached.json", cache_dir=cache_dir, log=messages.append, **options) == expected
+    assert any("Reading cached scan" in message for message in messages)
+
+
+def cache_entry(cache, name, source, words):
+    key = cache.key_for(str(source), {"name": name})
+    assert list(cache.record(key, [(word, f"{word}\tdefined\non two lines") for word in words], str(source))) \
+        == [(word, f"{word}\tdefined\non two lines") for word in words]
+    return key
+
+
+def test_cache_entries_round_trip_and_evict_the_least_recently_used(tmp_path):
+    source = tmp_path / "source.jsonl"
+    source.write_text("{}\n", encoding="utf-8")
+    cache = dict_pipeline.Phase1Cache(str(tmp_path / "cache"))
+    words = [f"WORD{i}" for i in range(200)]
+    first, second = cache_entry(cache, "first", source, words), cache_entry(cache, "second", source, words)
+    for key, age in ((first, 20), (second, 10)):
+        entry_path = tmp_path / "cache" / f"{key}.tsv.gz"
+        os.utime(entry_path, (entry_path.stat().st_atime - age, entry_path.stat().st_mtime - age))
+    index = (tmp_path / "cache" / "index.json").read_bytes()
+    assert list(cache.read(first)) == [(word, f"{word}\tdefined\non two lines") for word in words]
+    # A cache hit only touches the entry's file
+    assert (tmp_path / "cache" / "index.json").read_bytes() == index
+
+    # first was read after second was written, so second is the one to go
+    cache.max_bytes = cache.index["entries"][first]["bytes"] * 2
+    third = cache_entry(cache, "third", source, words)
+    assert first in cache and second not in cache and third in cache
+    reopened = dict_pipeline.Phase1Cache(str(tmp_path / "cache"))
+    assert sorted(reopened.index["entries"]) == sorted([first, third])
+
+
+def test_an_interrupted_scan_is_not_cached(tmp_path):
+    source = tmp_path / "source.jsonl"
+    source.write_text("{}\n", encoding="utf-8")
+    cache = dict_pipeline.Phase1Cache(str(tmp_path / "cache"))
+    key = cache.key_for(str(source), {})
+    recording = cache.record(key, iter([("ONE", "1"), ("TWO", "2")]), str(source))
+    next(recording)
+    recording.close()
+    assert key not in cache and sorted(os.listdir(tmp_path / "cache")) == ["index.json"]
+
+
+# --- Output formats ---
+
+def test_shards_hold_the_json_output_split_by_length(wiktionary_dump, tmp_path):
+    expected = json.loads(build(wiktionary_dump, tmp_path / "english_dictionary.json"))
+    shard_dir = tmp_path / "dictionary"
+    build_dictionary(wiktionary_dump, str(shard_dir), reduction_percent=20, seed=7, output_format="shards",
+                     write_report=False, log=quiet)
+    manifest = read_json(shard_dir / "manifest.json")["languages"]["english"]
+    words = {}
+    for length, shard in manifest["shards"].items():
+        shard_words = read_json(shard_dir / shard["file"])
+        assert {len(word) for word in shard_words} == {int(length)}
+        assert shard["count"] == len(shard_words) and shard["bytes"] == os.path.getsize(shard_dir / shard["file"])
+        words.update(shard_words)
+    assert words == expected and manifest["count"] == len(expected)
+    assert tree_files(shard_dir) == {"manifest.json"} | {shard["file"] for shard in manifest["shards"].values()}
+
+
+def test_shards_keep_other_languages_and_drop_stale_lengths(wiktionary_dump, tmp_path):
+    def shards(language, **options):
+        build_dictionary(wiktionary_dump, str(tmp_path), reduction_percent=0, output_format="shards",
+                         language=language, log=quiet, **options)
+        return read_json(tmp_path / "manifest.json")["languages"]
+
+    shards("french")
+    assert sorted(shards("english")) == ["english", "french"]
+    assert sorted(shards("english", min_len=6, max_len=7)["english"]["shards"]) == ["6", "7"]
+    assert sorted(os.listdir(tmp_path / "english")) == ["6.json", "7.json"]
+    assert len(os.listdir(tmp_path / "french")) == 6
+
+
+PACKED_ENTRIES = {"CAT": "a pet", "\U0001D4D0B": "script A and B", "ﬀXY": "ligature ff", "ÎNȚ": "diacritics",
+                  "A\U0001F600": "emoji \U0001F600 inside", "BB": "", "ZZZZ": "last"}
+
+
+def write_packed(path, entries):
+    writer = dict_pipeline.PackedWriter(str(path), "english")
+    for word, definition in entries.items():
+        writer.add(word, definition)
+    writer.commit()
+    return dict_pipeline.load_packed(str(path))
+
+
+def test_packed_round_trip_counts_utf16_code_units(tmp_path):
+    path = tmp_path / "packed.json"
+    # Outside the BMP a character takes two UTF-16 code units
+    packed = write_packed(path, PACKED_ENTRIES)
+    assert dict_pipeline.verify_packed(str(path), PACKED_ENTRIES) == []
+    assert dict(packed.items()) == PACKED_ENTRIES and len(packed) == len(PACKED_ENTRIES)
+    # Sorted as JavaScript compares strings: surrogate pairs come before U+E000-U+FFFF
+    assert [word for word, _ in packed.items()] == ["BB", "A\U0001F600", "CAT", "ÎNȚ", "\U0001D4D0B", "ﬀXY", "ZZZZ"]
+    assert sorted(packed.lengths) == [2, 3, 4]
+    assert all(packed.lookup(word) == definition for word, definition in PACKED_ENTRIES.items())
+    assert packed.lookup("DOG") is None and packed.lookup("TOOLONG") is None
+    raw = read_json(path)
+    # Python slices of the UTF-16 encoding stand in for JavaScript's substr at the stored offsets
+    words, bucket = raw["words"].encode("utf-16-le"), raw["lengths"]["3"]
+    assert [words[2 * (bucket["offset"] + 4 * i):][:6].decode("utf-16-le") for i in range(bucket["count"])] == \
+        [packed.word(3, i) for i in range(bucket["count"])]
+    assert read_json(tmp_path / "manifest.json")["languages"]["english"] == {
+        "format": "packed", "file": "packed.json", "count": len(PACKED_ENTRIES), "bytes": os.path.getsize(path)}
+
+
+def test_packed_build_matches_the_json_output(wiktionary_dump, tmp_path):
+    build(wiktionary_dump, tmp_path / "english_dictionary.json")
+    build(wiktionary_dump, tmp_path / "english.json", output_format="packed")
+    assert dict_pipeline.verify_packed(str(tmp_path / "english.json"), str(tmp_path / "english_dictionary.json")) == []
+    with pytest.raises(ValueError):
+        dict_pipeline.PackedDictionary(read_json(tmp_path / "english_dictionary.json"))
+
+
+def test_switching_format_retires_the_previous_output(wiktionary_dump, tmp_path):
+    def build_as(output_format, output):
+        build_dictionary(wiktionary_dump, str(tmp_path / output), reduction_percent=0, seed=1, write_report=False,
+                         output_format=output_format, language="english", log=quiet)
+        return tree_files(tmp_path), read_json(tmp_path / "dictionary" / "manifest.json")["languages"]
+
+    (tmp_path / "dictionary").mkdir()
+    files, languages = build_as("shards", "dictionary")
+    assert languages["english"]["shards"] and all(f"dictionary/{shard['file']}" in files
+                                                  for shard in languages["english"]["shards"].values())
+
+    files, languages = build_as("packed", "dictionary/english.json")
+    assert files == {"dictionary/manifest.json", "dictionary/english.json"}
+    assert languages["english"]["file"] == "english.json"
+
+    files, languages = build_as("json", "english_dictionary.json")
+    assert files == {"dictionary/manifest.json", "english_dictionary.json"}
+    assert languages == {}
+
+    build_as("shards", "dictionary")
+    # Only the file the game falls back to retires the manifest entry
+    assert "english" in build_as("json", "other_name.json")[1]
+
+
+def test_an_empty_build_keeps_the_previous_output(wiktionary_dump, tmp_path):
+    output = tmp_path / "out.json"
+    previous = build(wiktionary_dump, output)
+    with pytest.raises(EmptyDictionaryError):
+        build(wiktionary_dump, output, min_len=30, max_len=40)
+    assert output.read_bytes() == previous
+    assert os.listdir(tmp_path) == ["out.json"]
+    with pytest.raises(ValueError):
+        build(wiktionary_dump, output, output_format="xml")
+
+
+# --- Build reports ---
+
+def test_the_report_counts_every_line_and_rejection(tmp_path):
+    source, output = tmp_path / "wiktionary.jsonl", tmp_path / "out.json"
+    write_jsonl(source, [entry("house", "A building."), entry("cat", "Too short."), entry("maison", "house", "fr"),
+                         entry("re-do", "Not letters."), entry("garden", ""), "{not json", entry("house", "Again.")])
+    counters = build_dictionary(str(source), str(output), reduction_percent=0, prefilter=False, log=quiet)
+    report = read_json(tmp_path / "out_report.json")
+    assert report["tool"] == "dict_pipeline" and report["settings"]["min_len"] == 4
+    assert report["counters"] == dict(sorted(counters.items()))
+    assert {name: report["counters"].get(name) for name in
+            ("lines", "json_errors", "duplicates", "rejected_language", "rejected_length", "rejected_alphabet",
+             "rejected_empty_gloss", "phase1", "written")} == \
+        {"lines": 7, "json_errors": 1, "duplicates": 1, "rejected_language": 1, "rejected_length": 1,
+         "rejected_alphabet": 1, "rejected_empty_gloss": 1, "phase1": 1, "written": 1}
+    assert list(report["phases"]) == ["load_exclusions", "read", "scan", "reduce", "write", "commit"]
+    assert "memory" not in report
+
+
+def test_the_report_is_written_for_an_empty_build(tmp_path):
+    source, output = tmp_path / "wiktionary.jsonl", tmp_path / "out.json"
+    write_jsonl(source, [entry("cat", "Too short.")])
+    with pytest.raises(EmptyDictionaryError):
+        build(str(source), output, prefilter=False, write_report=True, trace_memory=True)
+    report = read_json(tmp_path / "out_report.json")
+    assert report["counters"]["rejected_length"] == 1 and "peak_mb" in report["memory"]
+    assert not output.exists()
+
+
+def test_a_failed_build_stops_tracing_memory(wiktionary_dump, tmp_path, monkeypatch):
+    interrupt_parse_after(monkeypatch, 50)
+    with pytest.raises(KeyboardInterrupt):
+        build(wiktionary_dump, tmp_path / "out.json", trace_memory=True, checkpoint=False)
+    assert not tracemalloc.is_tracing()
+    interrupt_parse_after(monkeypatch, 50)
+    with pytest.raises(KeyboardInterrupt):
+        build_dictionaries(wiktionary_dump, {"english": {"output": str(tmp_path / "english.json")}},
+                           trace_memory=True, write_report=False, log=quiet)
+    assert not tracemalloc.is_tracing()
+
+
+# --- Multi-language builds ---
+
+def test_one_scan_matches_a_build_per_language(wiktionary_dump, tmp_path):
+    exclusions = tmp_path / "exclude.txt"
+    exclusions.write_text("*ab*\n", encoding="utf-8")
+    targets = {"english": {"output": str(tmp_path / "english.json"), "min_len": 4, "max_len": 9,
+                           "exclude": str(exclusions)},
+               "french": {"output": str(tmp_path / "french.json"), "min_len": 3, "max_len": 6}}
+    results = build_dictionaries(wiktionary_dump, targets, reduction_percent=20, seed=3, write_report=False, log=quiet)
+    assert {language: result["status"] for language, result in results.items()} == \
+        {"english": "written", "french": "written"}
+    assert (tmp_path / "english.json").read_bytes() == \
+        build(wiktionary_dump, tmp_path / "single.json", exclusion_path=str(exclusions), seed=3)
+    french = read_json(tmp_path / "french.json")
+    assert french and all(3 <= len(word) <= 6 for word in french)
+
+
+def test_an_empty_language_does_not_stop_the_others(wiktionary_dump, tmp_path):
+    targets = {"english": {"output": str(tmp_path / "english.json")},
+               "german": {"output": str(tmp_path / "german.json"), "min_len": 30, "max_len": 40}}
+    results = build_dictionaries(wiktionary_dump, targets, seed=1, write_report=False, log=quiet)
+    assert results["english"]["status"] == "written" and results["german"]["status"] == "empty"
+    assert sorted(os.listdir(tmp_path)) == ["english.json"]
+    with pytest.raises(ValueError):
+        build_dictionaries(wiktionary_dump, {"klingon": {"output": str(tmp_path / "tlh.json")}}, log=quiet)
+
+
+def test_languages_are_read_from_and_added_to_the_cache(wiktionary_dump, tmp_path, monkeypatch):
+    cache_dir = str(tmp_path / "cache")
+
+    def build_all(folder, log=quiet, **options):
+        targets = {"english": {"output": str(tmp_path / folder / "english.json"), "exclude": None},
+                   "french": {"output": str(tmp_path / folder / "french.json"), "min_len": 3, "max_len": 6}}
+        os.makedirs(tmp_path / folder)
+        results = build_dictionaries(wiktionary_dump, targets, reduction_percent=20, seed=3, write_report=False,
+                                     log=log, **options)
+        assert {result["status"] for result in results.values()} == {"written"}
+        return {language: (tmp_path / folder / f"{language}.json").read_bytes() for language in targets}, results
+
+    expected, _ = build_all("direct")
+    # English shares its cache entry with build_dictionary, so only French is scanned
+    build(wiktionary_dump, tmp_path / "warm.json", cache_dir=cache_dir)
+    messages = []
+    outputs, results = build_all("partial", messages.append, cache_dir=cache_dir)
+    assert outputs == expected
+    assert (results["english"]["cache_hits"], results["french"]["cache_misses"]) == (1, 1)
+    assert "lines" not in results["english"] and results["french"]["lines"] > 0
+    assert any("cache miss for fr" in message for message in messages)
+
+    monkeypatch.setattr(dict_pipeline, "scan_languages", None)
+    outputs, results = build_all("cached", cache_dir=cache_dir)
+    assert outputs == expected and {result["cache_hits"] for result in results.values()} == {1}
+
+
+def test_targets_can_use_the_cache(wiktionary_dump, tmp_path):
+    config = tmp_path / "targets.json"
+    config.write_text(json.dumps({"english": {}, "french": {"min_len": 3}}))
+    argv = [wiktionary_dump, str(tmp_path / "out"), "--targets", str(config), "--seed", "1", "--no-report",
+            "--cache-dir", str(tmp_path / "cache")]
+    assert main(argv) == 0
+    assert len(dict_pipeline.Phase1Cache(str(tmp_path / "cache")).index["entries"]) == 2
+
+
+def test_targets_shards_share_the_output_folder(wiktionary_dump, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    config = tmp_path / "targets.json"
+    config.write_text(json.dumps({"english": {}, "french": {"min_len": 3}, "german": {"output": "de"}}))
+    targets = load_targets(str(config), "out", "shards")
+    assert {language: target["output"] for language, target in targets.items()} == {
+        "english": "out", "french": "out", "german": os.path.join("out", "de")}
+
+    results = build_dictionaries(wiktionary_dump, targets, reduction_percent=0, seed=1, output_format="shards",
+                                 log=quiet)
+    assert {result["status"] for result in results.values()} == {"written"}
+    assert sorted(os.listdir("out")) == ["de", "english", "english_build_report.json", "french",
+                                         "french_build_report.json", "manifest.json"]
+    for language in ("english", "french"):
+        assert read_json(os.path.join("out", f"{language}_build_report.json"))["settings"]["language"] == language
+    assert os.path.exists(os.path.join("out", "de", "german_build_report.json"))
+
+
+def test_targets_json_outputs(tmp_path):
+    config = tmp_path / "targets.json"
+    config.write_text(json.dumps({"english": {}, "romanian": {"output": "ro.json", "max_len": 7}}))
+    targets = load_targets(str(config), "out")
+    assert targets["english"]["output"] == os.path.join("out", "english_dictionary.json")
+    assert targets["romanian"]["output"] == os.path.join("out", "ro.json")
+    assert targets["romanian"]["max_len"] == 7
+
+
+# --- Compressed sources ---
+
+COMPRESSORS = {".gz": gzip.compress, ".bz2": bz2.compress, ".xz": lzma.compress}
+
+
+def compressed_copy(source, folder, suffix, name=None):
+    """The source compressed with the codec of suffix, saved under name (default: source name + suffix)."""
+    path = folder / (name or os.path.basename(source) + suffix)
+    with open(source, "rb") as f:
+        path.write_bytes(COMPRESSORS[suffix](f.read()))
+    return str(path)
+
+
+@pytest.mark.parametrize("suffix", sorted(COMPRESSORS))
+def test_compressed_sources_match_the_plain_build(wiktionary_dump, tmp_path, suffix):
+    dex = tmp_path / "dex.json"
+    write_dex_json(str(dex), 1000, seed=3)
+    for source in (wiktionary_dump, str(dex)):
+        expected = build(source, tmp_path / "plain.json")
+        messages = []
+        # The format comes from the content, not from the (misleading) file name
+        compressed = compressed_copy(source, tmp_path, suffix, "source.txt")
+        assert dict_pipeline.detect_source_format(compressed) == dict_pipeline.detect_source_format(source)
+        assert build(compressed, tmp_path / "compressed.json", workers=2, log=messages.append) == expected
+        if source == wiktionary_dump:
+            assert any("scanned without worker processes" in message for message in messages)
+
+
+def test_the_report_shows_decompression_apart_from_parsing(wiktionary_dump, tmp_path):
+    source = compressed_copy(wiktionary_dump, tmp_path, ".gz")
+    build(source, tmp_path / "out.json", write_report=True)
+    report = read_json(tmp_path / "out_report.json")
+    assert report["counters"]["source_bytes"] == os.path.getsize(source)
+    assert report["counters"]["bytes_read"] == os.path.getsize(wiktionary_dump)
+    assert report["phases"]["read"]["items"] == 4000 and report["phases"]["read"]["mb"] > 0
+    assert {"items", "items_per_s", "mb", "mb_per_s"} <= set(report["phases"]["scan"])
@@ -0,0 +1,37 @@
+import json
+
+import pytest
+
+import puzzle_engine
+from language_profiles import LANGUAGE_PROFILES, LanguageProfile, load_profiles
+
+
+def test_romanian_cedilla_letters_become_comma_below():
+    romanian = LANGUAGE_PROFILES["romanian"]
+    assert romanian.normalize_word("Ţară şi ŞARPE") == "ȚARĂ ȘI ȘARPE"
+    assert romanian.normalize_text("Ţară şi") == "Țară și"
+    assert romanian.matches("ȚARĂ") and not romanian.matches("ŢARĂ")
+
+
+def test_english_words_use_a_to_z_only():
+    english = LANGUAGE_PROFILES["english"]
+    assert english.matches("HOUSE")
+    assert not english.matches("CAFÉ") and not english.matches("house") and not english.matches("")
+    assert english.normalize_text("Café") == "Café"
+
+
+def test_the_grid_alphabets_come_from_the_profiles():
+    for language, alphabet in puzzle_engine.ALPHABETS.items():
+        assert alphabet == LANGUAGE_PROFILES[language].fill_letters
+    assert LanguageProfile("x", "x", "AB").fill_letters == "AB"
+
+
+@pytest.mark.parametrize("data", [
+    {"version": 2, "languages": {}},
+    {"version": 1, "languages": {"empty": {"lang_code": "xx", "letters": ""}}},
+])
+def test_invalid_profile_files_are_rejected(tmp_path, data):
+    path = tmp_path / "profiles.json"
+    path.write_text(json.dumps(data), encoding="utf-8")
+    with pytest.raises(ValueError):
+        load_profiles(str(path))
@@ -0,0 +1,168 @@
+import json
+import random
+
+import pytest
+
+import puzzle_engine
+from create_bible_json import build_bible_index, parse_bible_text
+from dict_pipeline import build_dictionary
+from helpers import quiet, tree_files, write_formatted_bible
+from puzzle_engine import (ALL_DIRECTIONS, DIRECTIONS, WORDS_PER_PUZZLE, PlacementTable, build_packs, check_packs,
+                           verify_pack)
+
+
+@pytest.fixture(scope="module")
+def dictionary(wiktionary_dump, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("dictionary") / "english_dictionary.json")
+    build_dictionary(wiktionary_dump, path, min_len=4, max_len=9, reduction_percent=0, write_report=False, log=quiet)
+    return path
+
+
+@pytest.fixture(scope="module")
+def bible_index(tmp_path_factory):
+    folder = tmp_path_factory.mktemp("bible")
+    formatted, index = str(folder / "formatted.txt"), folder / "bible_data_index.json"
+    write_formatted_bible(formatted, {"GENESIS": [31, 25, 24], "EXODUS": [22, 25]}, seed=5)
+    bible_data = {}
+    assert parse_bible_text(formatted, "english", bible_data, quiet)
+    index.write_text(json.dumps(build_bible_index(bible_data)), encoding="utf-8")
+    return str(index)
+
+
+def pack_files(output_dir):
+    files = {}
+    for name in tree_files(output_dir):
+        with open(output_dir / name, "rb") as f:
+            files[name] = f.read()
+    return files
+
+
+def read_pack(output_dir, mode, size):
+    with open(output_dir / "english" / mode / f"{size}.json", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def spelled(rows, location, length):
+    dx, dy = location["dir"]["x"], location["dir"]["y"]
+    return "".join(rows[location["r"] + i * dy][location["c"] + i * dx] for i in range(length))
+
+
+# --- Placement ---
+
+@pytest.mark.parametrize("size", [2, 5, 10])
+def test_placement_paths_stay_inside_the_grid(size):
+    table = PlacementTable(size)
+    for length in range(1, size + 2):
+        for dx, dy in ALL_DIRECTIONS:
+            expected = [(r, c, tuple((r + i * dy) * size + c + i * dx for i in range(length)))
+                        for r in range(size) for c in range(size)
+                        if 0 <= r + (length - 1) * dy < size and 0 <= c + (length - 1) * dx < size]
+            assert table.paths(length, (dx, dy)) == expected
+
+
+# --- Puzzle packs ---
+
+@pytest.mark.parametrize("mode", ["standard", "bible"])
+def test_packs_are_reproducible_for_a_seed(dictionary, bible_index, tmp_path, mode):
+    def packs(output, seed, workers):
+        build_packs(str(tmp_path / output), "english", mode, [10, 12], 15, seed, dictionary=dictionary,
+                    bible_index=bible_index, workers=workers, log=quiet)
+        return pack_files(tmp_path / output)
+
+    first = packs("first", 7, 1)
+    assert sorted(first) == [f"english/{mode}/10.json", f"english/{mode}/12.json", "manifest.json"]
+    assert packs("again", 7, 2) == first
+    assert packs("other", 8, 1)[f"english/{mode}/10.json"] != first[f"english/{mode}/10.json"]
+
+
+def test_a_single_puzzle_can_be_regenerated(dictionary, tmp_path):
+    build_packs(str(tmp_path), "english", "standard", [11], 6, 3, dictionary=dictionary, log=quiet)
+    pack = read_pack(tmp_path, "standard", 11)
+    words = puzzle_engine.load_dictionary_words(dictionary, "english")
+    source = puzzle_engine.WordSource("standard", 11, words)
+    rng = puzzle_engine.puzzle_rng(3, "english", "standard", 11, 4)
+    assert puzzle_engine.generate_puzzle(source, 11, puzzle_engine.ALPHABETS["english"], rng) == pack["puzzles"][4]
+
+
+@pytest.mark.parametrize("mode", ["standard", "bible"])
+def test_generated_packs_pass_the_grid_verifier(dictionary, bible_index, tmp_path, mode):
+    sizes = [10, 13, 16]
+    build_packs(str(tmp_path), "english", mode, sizes, 20, 11, dictionary=dictionary, bible_index=bible_index,
+                log=quiet)
+    messages = []
+    assert check_packs(str(tmp_path), "english", mode, sizes, log=messages.append) == 0
+    assert len([message for message in messages if "20 puzzles checked" in message]) == len(sizes)
+    for size in sizes:
+        assert verify_pack(str(tmp_path / "english" / mode / f"{size}.json")) == (20, [])
+        pack = read_pack(tmp_path, mode, size)
+        for puzzle in pack["puzzles"]:
+            rows, words, locations = puzzle["grid"], puzzle["words"], puzzle["locations"]
+            assert len(set(words)) == WORDS_PER_PUZZLE and set(locations) == set(words)
+            assert len(rows) == size and all(len(row) == size for row in rows)
+            assert all(spelled(rows, locations[word], len(word)) == word for word in words)
+            kinds = [kind for word in words for kind, steps in DIRECTIONS.items()
+                     if (locations[word]["dir"]["x"], locations[word]["dir"]["y"]) in steps]
+            assert all(kinds.count(kind) >= 2 for kind in DIRECTIONS)
+            if mode == "bible":
+                assert set(puzzle["verses"]) == set(words)
+
+
+def test_too_few_words_for_a_grid_size_is_an_error():
+    with pytest.raises(puzzle_engine.PuzzleGenerationError):
+        puzzle_engine.WordSource("standard", 10, {4: ["WORD"] * 5, 11: ["LONGERWORDS"] * 20})
+
+
+def test_verify_pack_reports_a_tampered_grid(dictionary, tmp_path):
+    build_packs(str(tmp_path), "english", "standard", [10], 3, 1, dictionary=dictionary, log=quiet)
+    pack = read_pack(tmp_path, "standard", 10)
+    puzzle = pack["puzzles"][1]
+    word = puzzle["words"][0]
+    location = puzzle["locations"][word]
+    rows = [list(row) for row in puzzle["grid"]]
+    r, c = location["r"], location["c"]
+    rows[r][c] = "Q" if rows[r][c] != "Q" else "Z"
+    puzzle["grid"] = ["".join(row) for row in rows]
+    path = tmp_path / "english" / "standard" / "10.json"
+    path.write_text(json.dumps(pack), encoding="utf-8")
+    checked, failures = verify_pack(str(path))
+    assert checked == 3 and [number for number, _ in failures] == [1]
+    assert failures[0][1][word] in ("not at its location", "0 occurrences")
+
+
+# --- Grid verifier ---
+
+def naive_occurrences(rows, word):
+    """Distinct occurrences of word by walking all 8 directions from every cell."""
+    size, ends = len(rows), set()
+    for r in range(size):
+        for c in range(size):
+            for dx, dy in ALL_DIRECTIONS:
+                cells = [(r + i * dy, c + i * dx) for i in range(len(word))]
+                if all(0 <= y < size and 0 <= x < size for y, x in cells) and \
+                        "".join(rows[y][x] for y, x in cells) == word:
+                    first, last = cells[0][0] * size + cells[0][1], cells[-1][0] * size + cells[-1][1]
+                    ends.add((min(first, last), max(first, last)))
+    return len(ends)
+
+
+@pytest.mark.parametrize("size", [1, 2, 5, 10])
+def test_grid_verifier_matches_a_naive_count(size):
+    rng = random.Random(size)
+    verifier = puzzle_engine.GridVerifier(size)
+    words = {"A", "AB", "BA", "ABA", "AAB", "BAAB", "ABAB"}
+    for _ in range(20):
+        rows = ["".join(rng.choice("ABA") for _ in range(size)) for _ in range(size)]
+        assert verifier.count_occurrences(rows, words) == {word: naive_occurrences(rows, word) for word in words}
+
+
+def test_grid_verifier_reports_duplicates_and_missing_words():
+    rows = ["CATXX",
+            "XXXXX",
+            "XXXXX",
+            "XXXXX",
+            "TACXX"]
+    verifier = puzzle_engine.GridVerifier(5)
+    assert verifier.count_occurrences(rows, ["CAT", "DOG"]) == {"CAT": 2, "DOG": 0}
+    assert verifier.problems(rows, ["CAT", "DOG", "ATX"]) == {"CAT": 2, "DOG": 0}
+    # A palindrome read both ways is still one selection
+    assert puzzle_engine.GridVerifier(3).count_occurrences(["XAX", "QQQ", "QQQ"], ["XAX"]) == {"XAX": 1}